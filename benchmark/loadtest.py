@@ -0,0 +1,356 @@
+"""MCP-level load test: drive server.py with concurrent clients over stdio and HTTP
+
+Usage: python -m benchmark.loadtest [--transport stdio|http|both] [--clients 8]
+                                    [--duration 30] [--json results.json]
+                                    [--compare previous.json] [--base-url URL]
+
+Unless ``--base-url`` is given, a local stand-in server (benchmark.standin) is
+started with the given latency / error rate / page count and server.py is
+pointed at it. Each simulated client loops over a realistic session: browse a
+listing page, open two job details, check the competition of one job, open two
+competitor profiles and price a payout. Over stdio all clients share the single
+session of one server process (as concurrent requests); over HTTP every client
+opens its own session to one server process.
+
+Reported per transport: sessions/s, requests/s, p50/p95/p99 latency and error
+count per tool, and the peak RSS of the server process.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from fastmcp import Client
+from fastmcp.client.transports import StdioTransport, StreamableHttpTransport
+from .run import percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_PATH = os.path.join(REPO_ROOT, "server.py")
+
+# Runs server.py with its stderr sent to a log file, so stdio runs keep the console clean
+STDIO_LAUNCHER = (
+    "import os, runpy, sys\n"
+    "server, log = sys.argv[1:3]\n"
+    "os.dup2(os.open(log, os.O_WRONLY | os.O_CREAT | os.O_APPEND), 2)\n"
+    "sys.argv = [server]\n"
+    "runpy.run_path(server, run_name='__main__')\n"
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"nothing listening on port {port} after {timeout:.0f}s")
+
+
+def peak_rss_kib(pid: Optional[int]) -> Optional[int]:
+    """Peak resident set size (VmHWM) of a process, Linux only"""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def server_child_pid() -> Optional[int]:
+    """PID of the server.py process spawned by this process (stdio transport)"""
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except (OSError, ValueError, IndexError):
+            continue
+        if parent == os.getpid() and SERVER_PATH.encode() in cmdline:
+            return int(entry)
+    return None
+
+
+class Recorder:
+    """Latency samples and error counts per tool"""
+
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.sessions = 0
+
+    async def call(self, client: Client, tool: str, arguments: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = await client.call_tool(tool, arguments, raise_on_error=False)
+        except Exception:
+            result = None
+        self.timings[tool].append(time.perf_counter() - started)
+        if result is None or result.is_error:
+            self.errors[tool] += 1
+            return None
+        data = result.structured_content
+        if isinstance(data, dict) and set(data) == {"result"}:
+            return data["result"]
+        return data
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        tools = {}
+        for tool, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            tools[tool] = {
+                "count": len(timings),
+                "errors": self.errors[tool],
+                "mean_ms": round(sum(timings) / len(timings) * 1000, 2),
+                "p50_ms": round(percentile(timings, 50) * 1000, 2),
+                "p95_ms": round(percentile(timings, 95) * 1000, 2),
+                "p99_ms": round(percentile(timings, 99) * 1000, 2),
+            }
+        requests = sum(len(timings) for timings in self.timings.values())
+        return {
+            "duration_s": round(elapsed, 2),
+            "sessions": self.sessions,
+            "sessions_per_s": round(self.sessions / elapsed, 2),
+            "requests": requests,
+            "errors": sum(self.errors.values()),
+            "requests_per_s": round(requests / elapsed, 2),
+            "tools": tools,
+        }
+
+
+async def session(client: Client, recorder: Recorder, rng: random.Random, pages: int) -> None:
+    """One simulated user session: browse -> details -> competition -> profiles -> billing"""
+    language = rng.choice(("en", "pl"))
+    jobs = await recorder.call(
+        client, "browse_jobs", {"page": rng.randint(1, pages), "language": language}
+    )
+    urls = [job["url"] for job in jobs or [] if job.get("url")]
+    for url in rng.sample(urls, min(2, len(urls))):
+        await recorder.call(client, "get_job_details", {"job_url": url})
+    if urls:
+        competition = await recorder.call(
+            client, "get_job_competition", {"job_url": rng.choice(urls)}
+        )
+        competitors = (competition or {}).get("competitors") or []
+        for competitor in rng.sample(competitors, min(2, len(competitors))):
+            await recorder.call(
+                client, "get_user_profile", {"profile_url": competitor["profile_url"]}
+            )
+    await recorder.call(
+        client, "calculate_useme_billing", {"payout_amount": rng.randrange(100, 5000, 50)}
+    )
+    recorder.sessions += 1
+
+
+async def worker(
+    client: Client, recorder: Recorder, deadline: float, seed: int, pages: int
+) -> None:
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        await session(client, recorder, rng, pages)
+
+
+def server_env(base_url: str, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    env = {**os.environ, "USEME_BASE_URL": base_url, "PYTHONUNBUFFERED": "1"}
+    env.update(extra or {})
+    return env
+
+
+async def run_stdio(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    transport = StdioTransport(
+        command=sys.executable,
+        args=["-c", STDIO_LAUNCHER, SERVER_PATH, args.server_log],
+        env=server_env(base_url),
+        cwd=REPO_ROOT,
+    )
+    recorder = Recorder()
+    async with Client(transport, timeout=args.timeout) as client:
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                worker(client, recorder, deadline, args.seed + index, args.pages)
+                for index in range(args.clients)
+            )
+        )
+        elapsed = time.monotonic() - started
+        peak = peak_rss_kib(server_child_pid())
+    return {
+        "transport": "stdio",
+        "clients": args.clients,
+        **recorder.summary(elapsed),
+        "peak_rss_kib": peak,
+    }
+
+
+async def run_http(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    port = free_port()
+    env = server_env(base_url, {"USEME_MCP_TRANSPORT": "http", "USEME_MCP_PORT": str(port)})
+    with open(args.server_log, "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, SERVER_PATH], env=env, cwd=REPO_ROOT, stdout=log, stderr=log
+        )
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/mcp/"
+        recorder = Recorder()
+        clients = [
+            Client(StreamableHttpTransport(url), timeout=args.timeout) for _ in range(args.clients)
+        ]
+        for client in clients:
+            await client.__aenter__()
+        try:
+            started = time.monotonic()
+            deadline = started + args.duration
+            await asyncio.gather(
+                *(
+                    worker(client, recorder, deadline, args.seed + index, args.pages)
+                    for index, client in enumerate(clients)
+                )
+            )
+            elapsed = time.monotonic() - started
+        finally:
+            for client in clients:
+                await client.__aexit__(None, None, None)
+        peak = peak_rss_kib(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {
+        "transport": "http",
+        "clients": args.clients,
+        **recorder.summary(elapsed),
+        "peak_rss_kib": peak,
+    }
+
+
+def start_standin(args: argparse.Namespace) -> tuple:
+    port = free_port()
+    command = [
+        sys.executable,
+        "-m",
+        "benchmark.standin",
+        "--port",
+        str(port),
+        "--latency",
+        str(args.latency),
+        "--jitter",
+        str(args.jitter),
+        "--error-rate",
+        str(args.error_rate),
+        "--pages",
+        str(args.pages),
+        "--seed",
+        str(args.seed),
+    ]
+    process = subprocess.Popen(
+        command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    wait_for_port(port)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def print_run(run: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> None:
+    rss = f"{run['peak_rss_kib'] / 1024:.0f} MiB" if run["peak_rss_kib"] else "n/a"
+    line = (
+        f"\n[{run['transport']}] {run['clients']} clients, {run['duration_s']}s: "
+        f"{run['requests_per_s']} req/s, {run['sessions_per_s']} sessions/s, "
+        f"{run['errors']} errors, peak RSS {rss}"
+    )
+    if previous:
+        line += f" (req/s {run['requests_per_s'] / previous['requests_per_s']:.2f}x previous)"
+    print(line)
+    print(f"{'tool':<26}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for tool, row in run["tools"].items():
+        extra = ""
+        before = (previous or {}).get("tools", {}).get(tool)
+        if before and before["p95_ms"]:
+            extra = f"  p95 {row['p95_ms'] / before['p95_ms']:.2f}x"
+        print(
+            f"{tool:<26}{row['count']:>7}{row['errors']:>8}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{extra}"
+        )
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    standin = None
+    base_url = args.base_url
+    if not base_url:
+        standin, base_url = start_standin(args)
+    try:
+        runs = []
+        transports = ("stdio", "http") if args.transport == "both" else (args.transport,)
+        for transport in transports:
+            run = run_stdio if transport == "stdio" else run_http
+            runs.append(await run(args, base_url))
+    finally:
+        if standin:
+            standin.terminate()
+            standin.wait(timeout=10)
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "base_url": args.base_url or "stand-in",
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("json", "compare", "server_log")
+        },
+        "runs": runs,
+    }
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Useme MCP server load test")
+    parser.add_argument("--transport", choices=("stdio", "http", "both"), default="both")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent simulated clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per transport")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-call timeout")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url", help="use this site instead of starting the stand-in")
+    parser.add_argument("--latency", type=float, default=50.0, help="stand-in latency in ms")
+    parser.add_argument("--jitter", type=float, default=20.0, help="stand-in jitter in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stand-in error rate")
+    parser.add_argument("--pages", type=int, default=10, help="listing pages to browse")
+    parser.add_argument("--server-log", default=os.devnull, help="file for server output")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results JSON of a previous run to compare with")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(main_async(args))
+
+    previous_runs = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous_runs = {run["transport"]: run for run in json.load(f)["runs"]}
+    for run in results["runs"]:
+        print_run(run, previous_runs.get(run["transport"]))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
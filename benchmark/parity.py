@@ -0,0 +1,133 @@
+"""Check that every HTML parser backend yields identical models for the fixture corpus
+
+Usage: python -m benchmark.parity [--fixtures DIR]
+
+Each fixture page is parsed the way the fetchers parse live responses (only the
+content container, from raw bytes) once per installed backend, and the resulting
+JobOffer / JobDetail / UserProfile dumps are compared field by field.
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from useme_mcp.services.html_parsing import available_backends, parse_container
+from useme_mcp.services.job_scraper import (
+    JOBS_CONTAINER,
+    JOB_DETAIL_CONTAINER,
+    parse_jobs_from_html,
+    parse_job_detail_from_html,
+)
+from useme_mcp.services.user_profile import PROFILE_CONTAINER, parse_user_profile_from_html
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+LANGS = ("en", "pl")
+
+
+def _dump(result: Any) -> Any:
+    if result is None:
+        return None
+    if isinstance(result, list):
+        return [item.model_dump(mode="json") for item in result]
+    return result.model_dump(mode="json")
+
+
+# Fixture name -> (content container, parse function)
+CORPUS: Dict[str, Tuple[Tuple[str, Dict[str, str]], Callable[[Any], Any]]] = {
+    "listing": (JOBS_CONTAINER, parse_jobs_from_html),
+    "category": (JOBS_CONTAINER, parse_jobs_from_html),
+    "job_detail": (
+        JOB_DETAIL_CONTAINER,
+        lambda node: parse_job_detail_from_html(node, "https://useme.com/jobs/fixture,1/"),
+    ),
+    "profile_small": (
+        PROFILE_CONTAINER,
+        lambda node: parse_user_profile_from_html(node, "https://useme.com/roles/fixture,1/"),
+    ),
+    "profile_large": (
+        PROFILE_CONTAINER,
+        lambda node: parse_user_profile_from_html(node, "https://useme.com/roles/fixture,1/"),
+    ),
+}
+
+
+def fixture_paths(fixtures_dir: str = FIXTURES_DIR) -> List[Tuple[str, str, str]]:
+    """(lang, fixture name, path) of every HTML fixture present in the corpus"""
+    paths = []
+    for lang in LANGS:
+        for name in CORPUS:
+            path = os.path.join(fixtures_dir, lang, f"{name}.html")
+            if os.path.exists(path):
+                paths.append((lang, name, path))
+    return paths
+
+
+def parse_fixture(name: str, content: bytes, backend: Optional[str] = None) -> Any:
+    """Parse a fixture page like the fetchers do and return the JSON dump of the models"""
+    container, parse = CORPUS[name]
+    node = parse_container(content, *container, "utf-8", backend)
+    return _dump(parse(node)) if node is not None else None
+
+
+def first_difference(expected: Any, actual: Any, path: str = "") -> Optional[str]:
+    """Path of the first field whose values differ, or None when equal"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            found = first_difference(expected.get(key), actual.get(key), f"{path}.{key}")
+            if found:
+                return found
+        return None
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f"{path} (length {len(expected)} != {len(actual)})"
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            found = first_difference(left, right, f"{path}[{index}]")
+            if found:
+                return found
+        return None
+    if expected != actual:
+        return f"{path or '<root>'}: {expected!r} != {actual!r}"
+    return None
+
+
+def check(fixtures_dir: str = FIXTURES_DIR) -> List[Dict[str, Any]]:
+    """Compare every available backend with html.parser on every fixture"""
+    backends = available_backends()
+    report = []
+    for lang, name, path in fixture_paths(fixtures_dir):
+        with open(path, "rb") as f:
+            content = f.read()
+        reference = parse_fixture(name, content, "html.parser")
+        row = {"fixture": f"{lang}/{name}", "mismatches": {}}
+        if not reference:
+            row["mismatches"]["html.parser"] = "no content parsed"
+        for backend in backends:
+            if backend == "html.parser":
+                continue
+            difference = first_difference(reference, parse_fixture(name, content, backend))
+            if difference:
+                row["mismatches"][backend] = difference
+        report.append(row)
+    return report
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Useme HTML parser backend parity check")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="fixture corpus directory")
+    args = parser.parse_args(argv)
+
+    backends = available_backends()
+    print(f"Backends: {', '.join(backends)}")
+    if len(backends) < 2:
+        print("Only html.parser is installed; install the lxml extra to compare backends")
+
+    report = check(args.fixtures)
+    failures = [row for row in report if row["mismatches"]]
+    for row in failures:
+        print(json.dumps(row, ensure_ascii=False))
+    print(f"{len(report) - len(failures)}/{len(report)} fixtures identical across backends")
+    raise SystemExit(1 if failures or not report else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Record a live page or competition API response into the benchmark fixture corpus
+
+Usage: python -m benchmark.record NAME URL [--lang en|pl]
+
+NAME is one of the fixture names (listing, category, job_detail, profile_small,
+profile_large, competition). The raw response bytes are stored unchanged, so
+the benchmark and parity check parse exactly what the fetchers would.
+"""
+
+import argparse
+import os
+from typing import Optional
+from useme_mcp.services import http_client
+from useme_mcp.services.http_client import run_sync
+from .parity import CORPUS, FIXTURES_DIR, LANGS
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Record a Useme page as a benchmark fixture")
+    parser.add_argument("name", choices=[*CORPUS, "competition"])
+    parser.add_argument("url")
+    parser.add_argument("--lang", choices=LANGS, help="default: taken from the URL path")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="fixture corpus directory")
+    args = parser.parse_args(argv)
+
+    lang = args.lang or next((lang for lang in LANGS if f"/{lang}/" in args.url), None)
+    if lang is None:
+        parser.error("cannot tell the language from the URL, pass --lang")
+
+    response = run_sync(http_client.get(args.url))
+    response.raise_for_status()
+
+    extension = "json" if args.name == "competition" else "html"
+    path = os.path.join(args.fixtures, lang, f"{args.name}.{extension}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(response.content)
+    print(f"Recorded {len(response.content)} bytes to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Offline parser benchmark over the fixture corpus
+
+Usage: python -m benchmark.run [--iterations N] [--backend lxml|html.parser]
+                               [--save-baseline] [--threshold 1.25] [--json PATH]
+
+Times the parse path of every fixture (content container parsed from raw bytes,
+then parse_jobs_from_html / parse_job_detail_from_html / parse_user_profile_from_html,
+or json.loads + parse_competition_from_api_data) and reports throughput, latency
+percentiles and peak memory. Results are compared with the stored baseline for
+the same parser backend; a p50 slower than ``threshold`` times the baseline is a
+regression and makes the command exit with status 1. No network access is used.
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from useme_mcp.services.html_parsing import available_backends, parser_backend
+from useme_mcp.services.job_scraper import parse_competition_from_api_data
+from .parity import FIXTURES_DIR, LANGS, fixture_paths, parse_fixture
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    index = max(0, min(len(values) - 1, round(q / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def measure(parse: Callable[[bytes], Any], content: bytes, iterations: int) -> Dict[str, float]:
+    """Time repeated parses of one page and measure the peak memory of a single parse"""
+    for _ in range(min(3, iterations)):
+        parse(content)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        parse(content)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    # Separate pass: tracemalloc slows allocation down and would skew the timings
+    tracemalloc.start()
+    parse(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "bytes": len(content),
+        "pages_per_s": round(iterations / sum(timings), 2),
+        "mean_ms": round(sum(timings) / iterations * 1000, 3),
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def benchmark_cases(backend: str, fixtures_dir: str) -> Dict[str, tuple]:
+    """Fixture key -> (parse function, page content)"""
+    cases = {}
+    for lang, name, path in fixture_paths(fixtures_dir):
+        with open(path, "rb") as f:
+            cases[f"{lang}/{name}"] = (
+                lambda content, name=name: parse_fixture(name, content, backend),
+                f.read(),
+            )
+    for lang in LANGS:
+        path = os.path.join(fixtures_dir, lang, "competition.json")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                cases[f"{lang}/competition"] = (
+                    lambda content: parse_competition_from_api_data(
+                        json.loads(content), "https://useme.com/jobs/fixture,1/", "1"
+                    ),
+                    f.read(),
+                )
+    return cases
+
+
+def run(backend: str, iterations: int, fixtures_dir: str = FIXTURES_DIR) -> Dict[str, Any]:
+    """Benchmark every fixture with the given parser backend"""
+    results = {}
+    for key, (parse, content) in benchmark_cases(backend, fixtures_dir).items():
+        results[key] = measure(parse, content, iterations)
+    return {
+        "backend": backend,
+        "iterations": iterations,
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def compare(
+    report: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> Dict[str, Dict[str, float]]:
+    """p50 and peak memory ratios against the baseline; returns the regressions"""
+    regressions = {}
+    for key, current in report["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if not previous:
+            continue
+        current["p50_vs_baseline"] = round(current["p50_ms"] / previous["p50_ms"], 3)
+        current["peak_vs_baseline"] = round(current["peak_kib"] / previous["peak_kib"], 3)
+        if current["p50_vs_baseline"] > threshold or current["peak_vs_baseline"] > threshold:
+            regressions[key] = {
+                "p50_vs_baseline": current["p50_vs_baseline"],
+                "peak_vs_baseline": current["peak_vs_baseline"],
+            }
+    return regressions
+
+
+def print_table(report: Dict[str, Any]) -> None:
+    print(f"Parser backend: {report['backend']}, {report['iterations']} iterations per page")
+    print(
+        f"{'fixture':<20}{'KiB':>8}{'pages/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'peak KiB':>10}{'vs base':>9}"
+    )
+    for key, row in report["results"].items():
+        ratio = row.get("p50_vs_baseline")
+        print(
+            f"{key:<20}{row['bytes'] / 1024:>8.1f}{row['pages_per_s']:>10.1f}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+            f"{row['peak_kib']:>10.1f}{f'{ratio:.2f}x' if ratio else '-':>9}"
+        )
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Useme offline parser benchmark")
+    parser.add_argument("--iterations", type=int, default=50, help="parses per fixture")
+    parser.add_argument("--backend", default=parser_backend, choices=available_backends())
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="fixture corpus directory")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store results as baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=1.25, help="slowdown ratio reported as regression"
+    )
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.backend, max(1, args.iterations), args.fixtures)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f)
+    regressions = {}
+    if args.backend in baselines and not args.save_baseline:
+        regressions = compare(report, baselines[args.backend], args.threshold)
+
+    print_table(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        baselines[args.backend] = report
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"Saved {args.backend} baseline to {args.baseline}")
+    elif args.backend not in baselines:
+        print(f"No {args.backend} baseline stored yet (run with --save-baseline)")
+
+    for key, ratios in regressions.items():
+        print(f"REGRESSION {key}: {json.dumps(ratios)}")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""Local stand-in for useme.com serving the benchmark fixtures
+
+Usage: python -m benchmark.standin [--port 8765] [--latency 50] [--jitter 20]
+                                   [--error-rate 0.02] [--pages 10] [--offer-pages 3]
+
+Point the server at it with ``USEME_BASE_URL=http://127.0.0.1:8765``. Served routes:
+
+    /<lang>/jobs/?page=N                        listing pages 1..pages, empty after that
+    /<lang>/jobs/category/<slug>,<id>/?page=N   category pages 1..pages
+    /<lang>/jobs/<slug>,<id>/                   job detail (ETag / If-None-Match aware)
+    /<lang>/jobs/get-offers/<id>/?page=N        competition API pages 1..offer-pages
+    /<lang>/roles/contractor/<slug>,<id>/       small or large profile (ETag aware)
+    /internal-api/billing/                      billing API answered by the local engine
+    /_standin/stats                             request counters
+
+Job IDs differ per page and category so caches and deduplication see distinct jobs.
+Every request waits ``latency`` +- ``jitter`` milliseconds and fails with
+``error-status`` with probability ``error-rate``.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from useme_mcp.services.billing_engine import BillingParams, compute_billing
+from .parity import FIXTURES_DIR, LANGS
+
+JOB_LINK = re.compile(rb'(href="/(?:en|pl)/jobs/[^"]*?,)(\d+)(/")')
+
+ROUTES = (
+    ("listing", re.compile(r"^/(en|pl)/jobs/$")),
+    ("competition", re.compile(r"^/(en|pl)/jobs/get-offers/(\d+)/$")),
+    ("category", re.compile(r"^/(en|pl)/jobs/category/[^/]*,(\d+)/$")),
+    ("job_detail", re.compile(r"^/(en|pl)/jobs/[^/]*,(\d+)/$")),
+    ("profile", re.compile(r"^/(en|pl)/roles/contractor/[^/]*,(\d+)/$")),
+    ("billing", re.compile(r"^/internal-api/billing/$")),
+    ("stats", re.compile(r"^/_standin/stats$")),
+)
+
+
+class StandinConfig:
+    """Behaviour knobs of the stand-in server"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        pages: int = 10,
+        offer_pages: int = 3,
+        large_profiles: float = 0.2,
+        fixtures_dir: str = FIXTURES_DIR,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.pages = pages
+        self.offer_pages = offer_pages
+        self.large_profiles = large_profiles
+        self.fixtures_dir = fixtures_dir
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.not_modified = 0
+        self._fixtures: Dict[Tuple[str, str], bytes] = {}
+
+    def fixture(self, lang: str, name: str) -> bytes:
+        key = (lang, name)
+        if key not in self._fixtures:
+            extension = "json" if name == "competition" else "html"
+            with open(f"{self.fixtures_dir}/{lang}/{name}.{extension}", "rb") as f:
+                self._fixtures[key] = f.read()
+        return self._fixtures[key]
+
+    def delay_and_fail(self) -> bool:
+        """Sleep for the configured latency; True when the request should fail"""
+        with self.lock:
+            delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+            fail = self.random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+
+def renumber_jobs(page: bytes, offset: int) -> bytes:
+    """Give the jobs of a listing page IDs unique to the page / category"""
+    return JOB_LINK.sub(
+        lambda m: m.group(1) + str(int(m.group(2)) + offset).encode() + m.group(3), page
+    )
+
+
+def billing_response(payload: dict) -> Optional[dict]:
+    """Answer a billing API request in the API's JSON format using the local engine"""
+    contractor = payload.get("contractor") or {}
+    employer = payload.get("employer") or {}
+    params = BillingParams(
+        amount=float(payload.get("amount", 0)),
+        currency=payload.get("currency", "PLN"),
+        copyright_transfer=payload.get("copyright_transfer", "license"),
+        contractor_country=contractor.get("country", "PL"),
+        contractor_is_business=bool(contractor.get("is_business")),
+        contractor_is_vat_payer=bool(contractor.get("is_vat_payer")),
+        employer_country=employer.get("country", "PL"),
+        employer_is_business=bool(employer.get("is_business", True)),
+        employer_is_vat_payer=bool(employer.get("is_vat_payer", True)),
+    )
+    billing = compute_billing(params)
+    if billing is None:
+        return None
+
+    def components(items):
+        return [{"label": item.label, "value": f"{item.value:.2f}"} for item in items]
+
+    calculation = billing.calculation
+    return {
+        "data": {
+            "currency": calculation.currency,
+            "payin": components(calculation.payin),
+            "payout": components(calculation.payout),
+            "priceComponents": components(calculation.price_components),
+        }
+    }
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+    config: StandinConfig
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(
+        self,
+        status: int,
+        body: bytes = b"",
+        content_type: str = "text/html; charset=utf-8",
+        etag: Optional[str] = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_document(self, body: bytes) -> None:
+        """Send a page with an ETag, answering 304 when the client already has it"""
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.config.lock:
+                self.config.not_modified += 1
+            self._send(304, etag=etag)
+        else:
+            self._send(200, body, etag=etag)
+
+    def _send_json(self, data: dict, status: int = 200) -> None:
+        self._send(status, json.dumps(data).encode(), "application/json")
+
+    def _route(self) -> Tuple[Optional[str], Tuple[str, ...], Dict[str, list]]:
+        url = urlsplit(self.path)
+        for name, pattern in ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                return name, match.groups(), parse_qs(url.query)
+        return None, (), {}
+
+    def _handle(self, method: str) -> None:
+        config = self.config
+        route, groups, query = self._route()
+        if route == "stats":
+            with config.lock:
+                stats = {
+                    "requests": dict(config.requests),
+                    "errors": dict(config.errors),
+                    "not_modified": config.not_modified,
+                }
+            return self._send_json(stats)
+        if route is None or (route == "billing") != (method == "POST"):
+            return self._send(404, b"Not found")
+
+        with config.lock:
+            config.requests[route] += 1
+        if config.delay_and_fail():
+            with config.lock:
+                config.errors[route] += 1
+            return self._send(config.error_status, b"Service unavailable")
+
+        page = int(query.get("page", ["1"])[0] or 1)
+        if route in ("listing", "category"):
+            lang = groups[0]
+            if page > config.pages:
+                return self._send(200, b"<html><body><p>No jobs</p></body></html>")
+            category_id = int(groups[1]) if route == "category" else 0
+            body = renumber_jobs(config.fixture(lang, route), category_id * 100000 + page * 1000)
+            return self._send(200, body)
+        if route == "job_detail":
+            return self._send_document(config.fixture(groups[0], "job_detail"))
+        if route == "profile":
+            # Deterministic per profile ID, so revalidation sees the same page
+            large = random.Random(int(groups[1])).random() < config.large_profiles
+            name = "profile_large" if large else "profile_small"
+            return self._send_document(config.fixture(groups[0], name))
+        if route == "competition":
+            if page > config.offer_pages:
+                return self._send(404, b"Not found")
+            data = json.loads(config.fixture(groups[0], "competition"))
+            host = self.headers.get("Host", "127.0.0.1")
+            for result in data["results"]:
+                result["contractor_user"] = f"{result['contractor_user']}_p{page}"
+                result["contractor_url"] = f"http://{host}{result['contractor_url']}"
+            data.update(page=page, total_pages=config.offer_pages)
+            return self._send_json(data)
+
+        # billing
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json({"detail": "invalid JSON"}, 400)
+        response = billing_response(payload)
+        if response is None:
+            return self._send_json({"detail": "unsupported parameters"}, 400)
+        return self._send_json(response)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+def make_server(host: str, port: int, config: StandinConfig) -> ThreadingHTTPServer:
+    """Create (but do not start) a stand-in server bound to host:port"""
+    handler = type("ConfiguredStandinHandler", (StandinHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local useme.com stand-in for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="response delay in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +- delay in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of failed requests")
+    parser.add_argument("--error-status", type=int, default=503, help="status of failures")
+    parser.add_argument("--pages", type=int, default=10, help="listing pages with jobs")
+    parser.add_argument("--offer-pages", type=int, default=3, help="competition API pages")
+    parser.add_argument(
+        "--large-profiles", type=float, default=0.2, help="share of profiles served large"
+    )
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="fixture corpus directory")
+    parser.add_argument("--seed", type=int, help="seed of latency jitter and errors")
+    args = parser.parse_args(argv)
+
+    config = StandinConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        pages=args.pages,
+        offer_pages=args.offer_pages,
+        large_profiles=args.large_profiles,
+        fixtures_dir=args.fixtures,
+        seed=args.seed,
+    )
+    for lang in LANGS:
+        for name in ("listing", "category", "job_detail", "profile_small", "competition"):
+            config.fixture(lang, name)
+
+    server = make_server(args.host, args.port, config)
+    print(f"Useme stand-in listening on http://{args.host}:{args.port}")
+    print(f"Run the server with USEME_BASE_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
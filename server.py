@@ -8,15 +8,21 @@ This MCP server provides data fetching tools for freelancers to:
 """
 
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 from typing import List, Optional, Dict, Any
 import logging
 
 # Import our services and models
 from useme_mcp.services.job_scraper import (
-    fetch_jobs_page,
-    fetch_multiple_pages,
-    fetch_job_details,
-    fetch_job_competition,
+    fetch_jobs_page_async,
+    fetch_multiple_pages_async,
+    fetch_job_details_async,
+    fetch_job_details_batch_async,
+    fetch_job_competition_async,
+    listing_cache,
+    job_detail_cache,
+    competition_cache,
 )
 from useme_mcp.services.category_service import (
     load_categories,
@@ -24,17 +30,39 @@ from useme_mcp.services.category_service import (
     find_categories_by_name,
 )
 from useme_mcp.services.category_jobs import (
-    fetch_category_jobs_page,
-    fetch_category_jobs_multiple_pages,
+    fetch_category_jobs_page_async,
+    fetch_category_jobs_multiple_pages_async,
+)
+from useme_mcp.services.job_feed import poll_new_jobs_async
+from useme_mcp.services.job_store import job_store
+from useme_mcp.services.crawler import crawler
+from useme_mcp.services.billing_calculator import (
+    calculate_billing_async,
+    calculate_billing_sweep_async,
+    solve_payout_for_budget_async,
+    sweep_amounts,
+    billing_cache,
+)
+from useme_mcp.services.user_profile import fetch_user_profile_async, profile_cache
+from useme_mcp.services.cache_store import cache_store
+from useme_mcp.services.metrics import metrics, MetricsMiddleware
+from useme_mcp.services.rate_limiter import rate_limiter
+from useme_mcp.services.profiling import ProfilingMiddleware
+from useme_mcp.services.structured_logging import configure_logging, LoggingMiddleware
+from useme_mcp.settings import (
+    MCP_TRANSPORT,
+    MCP_HOST,
+    MCP_PORT,
+    PROFILE_DIR,
+    FEED_MAX_PAGES,
+    CRAWLER_ENABLED,
 )
-from useme_mcp.services.billing_calculator import calculate_billing
-from useme_mcp.services.user_profile import fetch_user_profile
 
 # Get system instructions
 from config.instructions import SYSTEM_INSTRUCTION
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (queued, to stderr or USEME_LOG_FILE; stdout carries the stdio protocol)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create the MCP server
@@ -42,6 +70,11 @@ mcp = FastMCP(
     name="useme-job-assistant",
     instructions=SYSTEM_INSTRUCTION,
 )
+mcp.add_middleware(LoggingMiddleware())
+if metrics.enabled:
+    mcp.add_middleware(MetricsMiddleware())
+if PROFILE_DIR:
+    mcp.add_middleware(ProfilingMiddleware())
 
 
 # Job Browsing Tools
@@ -53,15 +86,17 @@ Args:
 - **page**: Starting page number (default: 1)
 - **language**: Language version - `en` for English, `pl` for Polish (default: `en`)
 - **num_pages**: Number of pages to fetch (default: 1)
+- **bypass_cache**: Fetch fresh pages instead of using recently cached results (default: false)
 
 Returns:
 List of job offers with details like title, budget, client, and competition level.       
 """
 )
-def browse_jobs(
+async def browse_jobs(
     page: int = 1,
     language: str = "en",
     num_pages: int = 1,
+    bypass_cache: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     Browse available job offers from Useme platform
@@ -70,16 +105,20 @@ def browse_jobs(
         page: Starting page number (default: 1)
         language: Language version - 'en' for English, 'pl' for Polish (default: 'en')
         num_pages: Number of pages to fetch (default: 1)
+        bypass_cache: Fetch fresh pages instead of using cached results (default: False)
 
     Returns:
         List of job offers with details like title, budget, client, competition level
     """
     if num_pages == 1:
-        jobs = fetch_jobs_page(page, language, None)
+        jobs = await fetch_jobs_page_async(page, language, None, use_cache=not bypass_cache)
     else:
-        jobs = fetch_multiple_pages(page, num_pages, language, None)
+        jobs = await fetch_multiple_pages_async(
+            page, num_pages, language, None, use_cache=not bypass_cache
+        )
 
-    return [job.model_dump() for job in jobs]
+    with metrics.timed("serialise"):
+        return [job.model_dump() for job in jobs]
 
 
 @mcp.tool(
@@ -91,16 +130,18 @@ Args:
 - **page**: Starting page number (default: 1)
 - **language**: Language version - `en` or `pl` (default: `en`)
 - **num_pages**: Number of pages to fetch (default: 1)
+- **bypass_cache**: Fetch fresh pages instead of using recently cached results (default: false)
 
 Returns:
 List of job offers from the specified category.
 """
 )
-def browse_category_jobs(
+async def browse_category_jobs(
     category_id: int,
     page: int = 1,
     language: str = "en",
     num_pages: int = 1,
+    bypass_cache: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     Browse job offers from a specific category
@@ -110,16 +151,22 @@ def browse_category_jobs(
         page: Starting page number (default: 1)
         language: Language version - 'en' or 'pl' (default: 'en')
         num_pages: Number of pages to fetch (default: 1)
+        bypass_cache: Fetch fresh pages instead of using cached results (default: False)
 
     Returns:
         List of job offers from the specified category
     """
     if num_pages == 1:
-        jobs = fetch_category_jobs_page(category_id, page, language, None)
+        jobs = await fetch_category_jobs_page_async(
+            category_id, page, language, None, use_cache=not bypass_cache
+        )
     else:
-        jobs = fetch_category_jobs_multiple_pages(category_id, page, num_pages, language, None)
+        jobs = await fetch_category_jobs_multiple_pages_async(
+            category_id, page, num_pages, language, None, use_cache=not bypass_cache
+        )
 
-    return [job.model_dump() for job in jobs]
+    with metrics.timed("serialise"):
+        return [job.model_dump() for job in jobs]
 
 
 # Job Filtering Tools (with order_by support)
@@ -139,17 +186,19 @@ Args:
   - `payment_normalized`: Sort by lowest budget first
   - `-payment_normalized`: Sort by highest budget first
   - **Empty**: Default ordering (no sorting parameter)
+- **bypass_cache**: Fetch fresh pages instead of using recently cached results (default: false)
 
 Returns:
 List of filtered and sorted job offers with details like title, budget, client, and
 competition level.
 """
 )
-def filter_jobs(
+async def filter_jobs(
     page: int = 1,
     language: str = "en",
     num_pages: int = 1,
     order_by: Optional[str] = None,
+    bypass_cache: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     Filter and sort available job offers from Useme platform
@@ -166,17 +215,21 @@ def filter_jobs(
         - 'payment_normalized': Sort by lowest budget first
         - '-payment_normalized': Sort by highest budget first
         - Empty: Default ordering (no sorting parameter)
+        bypass_cache: Fetch fresh pages instead of using cached results (default: False)
 
     Returns:
         List of filtered and sorted job offers with details like title, budget, client,
         competition level
     """
     if num_pages == 1:
-        jobs = fetch_jobs_page(page, language, order_by)
+        jobs = await fetch_jobs_page_async(page, language, order_by, use_cache=not bypass_cache)
     else:
-        jobs = fetch_multiple_pages(page, num_pages, language, order_by)
+        jobs = await fetch_multiple_pages_async(
+            page, num_pages, language, order_by, use_cache=not bypass_cache
+        )
 
-    return [job.model_dump() for job in jobs]
+    with metrics.timed("serialise"):
+        return [job.model_dump() for job in jobs]
 
 
 @mcp.tool(
@@ -196,17 +249,19 @@ Args:
   - `payment_normalized`: Sort by lowest budget first
   - `-payment_normalized`: Sort by highest budget first
   - **Empty**: Default ordering (no sorting parameter)
+- **bypass_cache**: Fetch fresh pages instead of using recently cached results (default: false)
 
 Returns:
 List of filtered and sorted job offers from the specified category.
 """
 )
-def filter_category_jobs(
+async def filter_category_jobs(
     category_id: int,
     page: int = 1,
     language: str = "en",
     num_pages: int = 1,
     order_by: Optional[str] = None,
+    bypass_cache: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     Filter and sort job offers from a specific category
@@ -224,20 +279,148 @@ def filter_category_jobs(
         - 'payment_normalized': Sort by lowest budget first
         - '-payment_normalized': Sort by highest budget first
         - Empty: Default ordering (no sorting parameter)
+        bypass_cache: Fetch fresh pages instead of using cached results (default: False)
 
     Returns:
         List of filtered and sorted job offers from the specified category
     """
     if num_pages == 1:
-        jobs = fetch_category_jobs_page(category_id, page, language, order_by)
+        jobs = await fetch_category_jobs_page_async(
+            category_id, page, language, order_by, use_cache=not bypass_cache
+        )
     else:
-        jobs = fetch_category_jobs_multiple_pages(category_id, page, num_pages, language, order_by)
+        jobs = await fetch_category_jobs_multiple_pages_async(
+            category_id, page, num_pages, language, order_by, use_cache=not bypass_cache
+        )
+
+    with metrics.timed("serialise"):
+        return [job.model_dump() for job in jobs]
+
+
+@mcp.tool(
+    description="""
+Get Job Offers Published Since the Last Call
+
+Incremental feed over the newest-first listing. Each feed (language plus optional
+category) remembers the job IDs it has returned; a call pages forward only until it
+reaches known jobs and returns just the new offers, usually at the cost of one page.
+
+Args:
+- **language**: Language version - `en` for English, `pl` for Polish (default: `en`)
+- **category_id**: Follow one category instead of all jobs (default: none)
+- **max_pages**: Most pages to read in one call (default: 10)
+- **reset**: Forget the feed's watermark and start over (default: false)
+
+Returns:
+New job offers (newest first), pages fetched, whether known jobs were reached (false
+means more new jobs may exist beyond `max_pages`) and whether this was the first call.
+"""
+)
+async def get_new_jobs(
+    language: str = "en",
+    category_id: Optional[int] = None,
+    max_pages: int = FEED_MAX_PAGES,
+    reset: bool = False,
+) -> Dict[str, Any]:
+    """
+    Get job offers published since the previous call for the same feed
+
+    Args:
+        language: Language version - 'en' for English, 'pl' for Polish (default: 'en')
+        category_id: Follow one category instead of all jobs (default: None)
+        max_pages: Most pages to read in one call (default: 10)
+        reset: Forget the feed's watermark and start over (default: False)
+
+    Returns:
+        New job offers with paging details of the poll
+    """
+    feed = await poll_new_jobs_async(language, category_id, max_pages, reset)
+    with metrics.timed("serialise"):
+        return feed.model_dump()
+
+
+@mcp.tool(
+    description="""
+Search Jobs Seen So Far
 
-    return [job.model_dump() for job in jobs]
+Full-text search over the local job index, which is filled by every listing and job
+detail fetch of this server (browse, filter, category and feed tools). No request is
+sent to Useme; results cover only jobs fetched before, so browse first to widen it.
+Expired jobs are left out.
+
+Args:
+- **query**: Words that must all appear in title, description, skills/tags, category
+  or client; `word*` matches a prefix (default: empty, filters only)
+- **category**: Part of the category name (default: none)
+- **tags**: Skills/tags that must all be present (default: none)
+- **min_amount** / **max_amount**: Budget range, jobs without an amount are left out
+  when set (default: none)
+- **currency**: Budget currency, e.g. `PLN` (default: none)
+- **max_offers**: Most offers already submitted (default: none)
+- **min_days_left**: Fewest days the job must still be open (default: none)
+- **language**: `en` or `pl` job URLs only (default: both)
+- **order_by**: `relevance`, `newest`, `expires`, `offer_count`, `-offer_count`,
+  `amount` or `-amount` (default: `relevance`)
+- **limit**: Most results (default: 20)
+
+Returns:
+Matching jobs with a highlighted snippet, days left and whether the full description
+from the detail page is indexed.
+"""
+)
+def search_jobs(
+    query: str = "",
+    category: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    currency: Optional[str] = None,
+    max_offers: Optional[int] = None,
+    min_days_left: Optional[int] = None,
+    language: Optional[str] = None,
+    order_by: str = "relevance",
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Search the jobs fetched so far in the local full-text index
+
+    Args:
+        query: Words that must all appear; ``word*`` matches a prefix
+        category: Part of the category name
+        tags: Skills/tags that must all be present
+        min_amount: Lowest budget amount
+        max_amount: Highest budget amount
+        currency: Budget currency
+        max_offers: Most offers already submitted
+        min_days_left: Fewest days the job must still be open
+        language: 'en' or 'pl' job URLs only
+        order_by: Result order (default: 'relevance')
+        limit: Most results (default: 20)
+
+    Returns:
+        Matching jobs, best first
+    """
+    if job_store is None:
+        raise ValueError("The local job index is disabled (USEME_JOB_STORE=0)")
+    hits = job_store.search(
+        query,
+        category,
+        tags,
+        min_amount,
+        max_amount,
+        currency,
+        max_offers,
+        min_days_left,
+        language,
+        order_by,
+        min(limit, 100),
+    )
+    with metrics.timed("serialise"):
+        return [hit.model_dump() for hit in hits]
 
 
 @mcp.tool()
-def get_job_details(job_url: str) -> Optional[Dict[str, Any]]:
+async def get_job_details(job_url: str) -> Optional[Dict[str, Any]]:
     """
     Get detailed information about a specific job offer
 
@@ -247,12 +430,35 @@ def get_job_details(job_url: str) -> Optional[Dict[str, Any]]:
     Returns:
         Detailed job information including skills, custom fields, client info
     """
-    job_detail = fetch_job_details(job_url)
-    return job_detail.model_dump() if job_detail else None
+    job_detail = await fetch_job_details_async(job_url)
+    with metrics.timed("serialise"):
+        return job_detail.model_dump() if job_detail else None
 
 
 @mcp.tool()
-def get_job_competition(job_url: str) -> Optional[Dict[str, Any]]:
+async def get_job_details_batch(
+    job_urls: List[str], max_workers: Optional[int] = None, timeout: float = 30.0
+) -> Dict[str, Any]:
+    """
+    Get detailed information about several job offers in one call
+
+    Args:
+        job_urls: Full URLs of the job offers (at most 50); the /en/ and /pl/ URLs of
+            one job are fetched once
+        max_workers: Jobs fetched at the same time (default: USEME_FETCH_WORKERS)
+        timeout: Seconds one job may take before it is reported as an error (default: 30)
+
+    Returns:
+        Job details keyed by job ID, errors keyed by job ID (or by URL when it has no
+        job ID) and the number of duplicate URLs skipped
+    """
+    batch = await fetch_job_details_batch_async(job_urls, max_workers, timeout)
+    with metrics.timed("serialise"):
+        return batch.model_dump()
+
+
+@mcp.tool()
+async def get_job_competition(job_url: str) -> Optional[Dict[str, Any]]:
     """
     Get competition details for a specific job offer
 
@@ -268,12 +474,13 @@ def get_job_competition(job_url: str) -> Optional[Dict[str, Any]]:
     Returns:
         Competition analysis including list of competitors with their profiles and experience
     """
-    competition = fetch_job_competition(job_url)
-    return competition.model_dump() if competition else None
+    competition = await fetch_job_competition_async(job_url)
+    with metrics.timed("serialise"):
+        return competition.model_dump() if competition else None
 
 
 @mcp.tool()
-def calculate_useme_billing(
+async def calculate_useme_billing(
     payout_amount: float,
     currency: str = "PLN",
     copyright_transfer: str = "license",
@@ -313,7 +520,7 @@ def calculate_useme_billing(
         250 PLN payout → 362.85 PLN total client payment
         (295 PLN base + 67.85 PLN VAT, minus 29 PLN commission + 16 PLN PIT)
     """
-    billing = calculate_billing(
+    billing = await calculate_billing_async(
         amount=payout_amount,
         currency=currency,
         copyright_transfer=copyright_transfer,
@@ -324,11 +531,101 @@ def calculate_useme_billing(
         employer_is_business=employer_is_business,
         employer_is_vat_payer=employer_is_vat_payer,
     )
-    return billing.model_dump() if billing else None
+    with metrics.timed("serialise"):
+        return billing.model_dump() if billing else None
+
+
+@mcp.tool()
+async def calculate_useme_billing_sweep(
+    amounts: Optional[List[float]] = None,
+    amount_from: Optional[float] = None,
+    amount_to: Optional[float] = None,
+    amount_step: Optional[float] = None,
+    scenarios: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Calculate Useme billing for many payout amounts and scenarios in one call
+
+    Use this instead of repeated calculate_useme_billing calls when pricing a
+    proposal, e.g. 500-10000 PLN in 250 PLN steps for both copyright transfer types.
+
+    Args:
+        amounts: Explicit list of payout amounts
+        amount_from: First payout amount of a range (inclusive)
+        amount_to: Last payout amount of a range (inclusive)
+        amount_step: Step of the range (default: single step from amount_from to amount_to)
+        scenarios: List of scenarios, each a dict with any of the calculate_useme_billing
+                   parameters except the amount, e.g.
+                   [{"copyright_transfer": "license"}, {"copyright_transfer": "full"}].
+                   Missing keys use the calculate_useme_billing defaults (default: one
+                   default scenario)
+
+    Returns:
+        Compact table:
+        - scenarios: The normalised scenarios, referenced by index from the rows
+        - columns: ["scenario", "amount", "client_total", "vat", "commission", "pit", "error"]
+        - rows: One row per amount and scenario (figures are null when a calculation failed,
+                and error says why: unsupported by the local engine, API error, ...)
+        - unique_calculations: Number of distinct calculations performed
+    """
+    payout_amounts = sweep_amounts(amounts, amount_from, amount_to, amount_step)
+    if not payout_amounts:
+        raise ValueError("Provide amounts or amount_from and amount_to")
+    return await calculate_billing_sweep_async(payout_amounts, scenarios)
+
+
+@mcp.tool()
+async def calculate_useme_payout_for_budget(
+    client_budget: float,
+    budget_includes_vat: bool = True,
+    currency: str = "PLN",
+    copyright_transfer: str = "license",
+    contractor_country: str = "PL",
+    contractor_is_business: bool = False,
+    contractor_is_vat_payer: bool = False,
+    employer_country: str = "PL",
+    employer_is_business: bool = True,
+    employer_is_vat_payer: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    Find the payout a freelancer receives for a given client budget
+
+    The inverse of calculate_useme_billing: given what the client can spend, finds
+    the highest payout (to the cent) whose client cost does not exceed the budget.
+
+    Args:
+        client_budget: Client's budget
+        budget_includes_vat: Whether the budget is the total including VAT (default: True)
+                             or the net amount before VAT
+        (remaining arguments as in calculate_useme_billing)
+
+    Returns:
+        - payout_amount: Highest payout that fits the budget
+        - client_cost: Client cost of that payout (total or net, matching the budget)
+        - converged: Whether the payout was pinned down to the cent
+        - evaluations: Number of billing calculations performed
+        - billing: Full billing breakdown for the payout
+        Returns null when no payout fits the budget.
+
+    Example:
+        362.85 PLN client total → 250 PLN payout
+    """
+    return await solve_payout_for_budget_async(
+        client_budget,
+        budget_includes_vat=budget_includes_vat,
+        currency=currency,
+        copyright_transfer=copyright_transfer,
+        contractor_country=contractor_country,
+        contractor_is_business=contractor_is_business,
+        contractor_is_vat_payer=contractor_is_vat_payer,
+        employer_country=employer_country,
+        employer_is_business=employer_is_business,
+        employer_is_vat_payer=employer_is_vat_payer,
+    )
 
 
 @mcp.tool()
-def get_user_profile(profile_url: str) -> Optional[Dict[str, Any]]:
+async def get_user_profile(profile_url: str) -> Optional[Dict[str, Any]]:
     """
     Get comprehensive user profile information from Useme
 
@@ -347,8 +644,9 @@ def get_user_profile(profile_url: str) -> Optional[Dict[str, Any]]:
         - Social proof: client reviews and freelancer responses
         - Work history: completed projects with descriptions
     """
-    profile = fetch_user_profile(profile_url)
-    return profile.model_dump() if profile else None
+    profile = await fetch_user_profile_async(profile_url)
+    with metrics.timed("serialise"):
+        return profile.model_dump() if profile else None
 
 
 # Category Management Tools
@@ -364,7 +662,8 @@ def list_categories(language: Optional[str] = None) -> List[Dict[str, Any]]:
         List of available categories with their IDs and names
     """
     categories = load_categories(language)
-    return [cat.model_dump() for cat in categories]
+    with metrics.timed("serialise"):
+        return [cat.model_dump() for cat in categories]
 
 
 @mcp.tool()
@@ -380,7 +679,8 @@ def search_categories(search_term: str, language: Optional[str] = None) -> List[
         List of matching categories
     """
     categories = find_categories_by_name(search_term, language)
-    return [cat.model_dump() for cat in categories]
+    with metrics.timed("serialise"):
+        return [cat.model_dump() for cat in categories]
 
 
 @mcp.tool()
@@ -396,8 +696,79 @@ def get_category_info(category_id: int, language: str = "en") -> Optional[Dict[s
         Category information including name, slug, and parent category if applicable
     """
     category = get_category_by_id(category_id, language)
-    return category.model_dump() if category else None
+    with metrics.timed("serialise"):
+        return category.model_dump() if category else None
+
+
+# Server Status Resources
+@mcp.resource("useme://cache/stats", mime_type="application/json")
+def cache_stats() -> Dict[str, Any]:
+    """Size and hit/miss counters of the in-process caches"""
+    return {
+        "listings": listing_cache.stats(),
+        "job_details": job_detail_cache.stats(),
+        "profiles": profile_cache.stats(),
+        "competition": competition_cache.stats(),
+        "billing": billing_cache.stats(),
+        "disk": cache_store.stats() if cache_store else None,
+    }
+
+
+def cache_hit_rates() -> Dict[str, Dict[str, float]]:
+    """Cache hit rates exported as metric gauges"""
+    caches = {
+        "listings": listing_cache,
+        "job_details": job_detail_cache,
+        "profiles": profile_cache,
+        "competition": competition_cache,
+        "billing": billing_cache,
+    }
+    return {"cache_hit_rate": {name: cache.stats()["hit_rate"] for name, cache in caches.items()}}
+
+
+metrics.add_collector(cache_hit_rates)
+metrics.add_collector(rate_limiter.gauges)
+metrics.add_collector(crawler.gauges)
+
+
+@mcp.resource("useme://rate-limit/stats", mime_type="application/json")
+def rate_limit_stats() -> Dict[str, Any]:
+    """Current rate, concurrency limit and throttling counters per host"""
+    return {"enabled": rate_limiter.enabled, "hosts": rate_limiter.stats()}
+
+
+@mcp.resource("useme://job-store/stats", mime_type="application/json")
+def job_store_stats() -> Dict[str, Any]:
+    """Size of the local job index used by search_jobs"""
+    if job_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **job_store.stats()}
+
+
+@mcp.resource("useme://crawler/status", mime_type="application/json")
+def crawler_status() -> Dict[str, Any]:
+    """Queue depth, lag and request budget of the background crawler"""
+    return {"enabled": CRAWLER_ENABLED, **crawler.status()}
+
+
+@mcp.resource("useme://metrics", mime_type="application/json")
+def metrics_snapshot() -> Dict[str, Any]:
+    """Latency histograms per tool and stage, traffic counters and cache hit rates"""
+    return metrics.snapshot()
+
+
+if metrics.enabled:
+
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def prometheus_metrics(request: Request) -> PlainTextResponse:
+        """Prometheus scrape endpoint (HTTP transport only)"""
+        return PlainTextResponse(metrics.prometheus(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
-    mcp.run()
+    if CRAWLER_ENABLED:
+        crawler.start()
+    if MCP_TRANSPORT == "http":
+        mcp.run(transport="http", host=MCP_HOST, port=MCP_PORT)
+    else:
+        mcp.run()
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+from benchmark.standin import billing_response
+from useme_mcp.services.billing_engine import (
+    BillingParams,
+    calculate_billing_locally,
+    calibrated_scenarios,
+    is_supported,
+)
+
+EXAMPLE = BillingParams(amount=250.0)
+EUR = EXAMPLE._replace(currency="EUR")
+FULL = EXAMPLE._replace(copyright_transfer="full")
+
+
+def api_payload(params: BillingParams) -> dict:
+    return {
+        "amount": params.amount,
+        "currency": params.currency,
+        "copyright_transfer": params.copyright_transfer,
+        "contractor": {
+            "country": params.contractor_country,
+            "is_business": params.contractor_is_business,
+            "is_vat_payer": params.contractor_is_vat_payer,
+        },
+        "employer": {
+            "country": params.employer_country,
+            "is_business": params.employer_is_business,
+            "is_vat_payer": params.employer_is_vat_payer,
+        },
+    }
+
+
+class SupportedScenariosTest(unittest.TestCase):
+    def test_only_the_documented_example_is_supported_by_default(self):
+        self.assertTrue(is_supported(EXAMPLE))
+        self.assertEqual(calculate_billing_locally(EXAMPLE).calculation.payin[0].value, 295.0)
+        for params in (EUR, FULL, EXAMPLE._replace(employer_country="DE")):
+            with self.subTest(params=params):
+                self.assertFalse(is_supported(params))
+                self.assertIsNone(calculate_billing_locally(params))
+
+    def test_matching_recordings_extend_the_supported_scenarios(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "billing.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                for params in (EUR, EUR._replace(amount=1000.0)):
+                    response = billing_response(api_payload(params))
+                    f.write(json.dumps({"params": params._asdict(), "response": response}) + "\n")
+                # A recording the engine cannot reproduce keeps its scenario out
+                mismatch = billing_response(api_payload(EXAMPLE._replace(currency="USD")))
+                mismatch["data"]["payin"][-1]["value"] = "1.00"
+                usd = EXAMPLE._replace(currency="USD")
+                f.write(json.dumps({"params": usd._asdict(), "response": mismatch}) + "\n")
+            scenarios = calibrated_scenarios(path)
+        self.assertIn(tuple(EUR)[1:], scenarios)
+        self.assertIn(tuple(EXAMPLE)[1:], scenarios)
+        self.assertNotIn(tuple(EXAMPLE._replace(currency="USD"))[1:], scenarios)
+
+
+if __name__ == "__main__":
+    unittest.main()
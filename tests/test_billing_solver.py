@@ -0,0 +1,37 @@
+import unittest
+from unittest import mock
+from useme_mcp.services import billing_calculator
+from useme_mcp.services.billing_calculator import calculate_billing, solve_payout_for_budget
+from useme_mcp.services.billing_engine import summarize_billing
+
+
+def client_cost(payout: float, budget_includes_vat: bool) -> float:
+    summary = summarize_billing(calculate_billing(payout))
+    return summary["total"] if budget_includes_vat else summary["total"] - summary["vat"]
+
+
+class SolvePayoutTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(billing_calculator, "BILLING_MODE", "local")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_payout_is_highest_amount_within_budget(self):
+        for budget in (12345.67, 999.99, 50000.0):
+            for budget_includes_vat in (False, True):
+                with self.subTest(budget=budget, budget_includes_vat=budget_includes_vat):
+                    result = solve_payout_for_budget(
+                        budget, budget_includes_vat=budget_includes_vat
+                    )
+                    payout = result["payout_amount"]
+                    self.assertEqual(payout, round(payout, 2))
+                    self.assertTrue(result["converged"])
+                    self.assertLessEqual(client_cost(payout, budget_includes_vat), budget)
+                    self.assertGreater(
+                        client_cost(round(payout + 0.01, 2), budget_includes_vat), budget
+                    )
+                    self.assertLessEqual(result["evaluations"], 14)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import asyncio
+import unittest
+from unittest import mock
+from useme_mcp.services import billing_calculator
+from useme_mcp.services.billing_calculator import calculate_billing_sweep_async, sweep_amounts
+from useme_mcp.services.http_client import HttpError
+
+
+def sweep(amounts, scenarios):
+    result = asyncio.run(calculate_billing_sweep_async(amounts, scenarios))
+    error = result["columns"].index("error")
+    return [row[error] for row in result["rows"]]
+
+
+class SweepErrorsTest(unittest.TestCase):
+    def test_unsupported_scenario_says_why(self):
+        with mock.patch.object(billing_calculator, "BILLING_MODE", "local"):
+            errors = sweep([250], [{}, {"copyright_transfer": "full"}])
+        self.assertIsNone(errors[0])
+        self.assertIn("local billing engine", errors[1])
+
+    def test_api_error_says_why(self):
+        async def failing(params):
+            raise HttpError(500, "https://useme.com/internal-api/billing/")
+
+        with (
+            mock.patch.object(billing_calculator, "BILLING_MODE", "api"),
+            mock.patch.object(billing_calculator, "_request_billing_data", failing),
+        ):
+            errors = sweep([123.45], [{"currency": "EUR"}])
+        self.assertIn("HTTP 500", errors[0])
+
+
+class SweepAmountsTest(unittest.TestCase):
+    def test_range(self):
+        self.assertEqual(sweep_amounts([50], 100, 300, 100), [50.0, 100.0, 200.0, 300.0])
+
+    def test_reversed_range(self):
+        with self.assertRaisesRegex(ValueError, "amount_to must not be below amount_from"):
+            sweep_amounts(amount_from=500, amount_to=100)
+
+    def test_half_range(self):
+        for bounds in ({"amount_from": 100}, {"amount_to": 100}):
+            with self.subTest(bounds=bounds), self.assertRaises(ValueError):
+                sweep_amounts([50], **bounds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+from useme_mcp.services import cache
+from useme_mcp.services.cache import TTLCache
+from useme_mcp.services.cache_store import CacheStore
+
+
+class LockedStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = CacheStore(os.path.join(directory.name, "cache.db"))
+        self.store.set("listing", "page-1", ["job"], 60)
+        # Another process holding the write lock
+        self.writer = sqlite3.connect(self.store.path, isolation_level=None)
+        self.writer.execute("BEGIN EXCLUSIVE")
+        self.addCleanup(self.writer.close)
+        self.addCleanup(self.writer.execute, "ROLLBACK")
+
+    def test_locked_store_fails_fast(self):
+        started = time.monotonic()
+        with self.assertRaises(sqlite3.OperationalError):
+            self.store.set("listing", "page-2", ["job"], 60)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_locked_store_skips_writes(self):
+        listings = TTLCache(maxsize=0, ttl=60, kind="listing")
+        with mock.patch.object(cache, "cache_store", self.store):
+            started = time.monotonic()
+            listings.set("page-2", ["job"])
+            self.assertLess(time.monotonic() - started, 1.0)
+            # WAL readers are not blocked by the writer
+            self.assertEqual(listings.get("page-1"), ["job"])
+            self.assertIsNone(listings.get("page-2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+from useme_mcp.models import JobOffer
+from useme_mcp.services import crawler as crawler_module
+from useme_mcp.services.crawler import Crawler
+from useme_mcp.services.http_client import request_count
+
+JOB_URL = "https://useme.com/en/jobs/job,101000/"
+
+
+def make_job(days_left: int) -> JobOffer:
+    return JobOffer(
+        client="client",
+        offers_count=3,
+        days_left=days_left,
+        title="Job",
+        description="",
+        category="IT",
+        budget="Negotiable",
+        url=JOB_URL,
+    )
+
+
+class CrawlerTest(unittest.TestCase):
+    def setUp(self):
+        self.crawler = Crawler(budget=60)
+        self.crawler._observe(make_job(days_left=0), time.time())
+        self.task = self.crawler._tasks[("job", JOB_URL)]
+
+    def test_last_day_job_is_refreshed(self):
+        fetch = mock.AsyncMock(return_value=None)
+        with mock.patch.object(crawler_module, "fetch_job_details_async", fetch):
+            asyncio.run(self.crawler._run_task(self.task, 1))
+        fetch.assert_awaited_once_with(JOB_URL)
+        self.assertIn(("job", JOB_URL), self.crawler._tasks)
+
+    def test_retries_are_charged_to_the_budget(self):
+        async def fetch_with_retries(job_url):
+            request_count.get().value += 3
+            return None
+
+        spent = self.crawler.budget.spent
+        with mock.patch.object(crawler_module, "fetch_job_details_async", fetch_with_retries):
+            asyncio.run(self.crawler._run_task(self.task, 1))
+        self.assertEqual(self.crawler.budget.spent - spent, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest import mock
+from useme_mcp.models import JobOffer
+from useme_mcp.services import job_feed
+
+
+def make_job(job_id: int) -> JobOffer:
+    return JobOffer(
+        client="client",
+        offers_count=0,
+        days_left=7,
+        title=f"Job {job_id}",
+        description="",
+        category="IT",
+        budget="Negotiable",
+        url=f"https://useme.com/en/jobs/job,{job_id}/",
+    )
+
+
+class FakeListing:
+    """Newest-first listing of 20 jobs per page"""
+
+    def __init__(self, job_ids):
+        self.job_ids = sorted(job_ids, reverse=True)
+        self.pages_fetched = 0
+
+    async def fetch(self, page, lang, order_by):
+        self.pages_fetched += 1
+        return [make_job(job_id) for job_id in self.job_ids[(page - 1) * 20 : page * 20]]
+
+
+class PollNewJobsTest(unittest.TestCase):
+    def setUp(self):
+        job_feed._watermarks.clear()
+        patcher = mock.patch.object(job_feed, "cache_store", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.listing = FakeListing(range(1000, 1200))
+        patcher = mock.patch.object(job_feed, "fetch_jobs_page_async", self.listing.fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_first_poll_returns_first_page(self):
+        feed = job_feed.poll_new_jobs("en")
+        self.assertTrue(feed.first_poll)
+        self.assertEqual(len(feed.new_jobs), 20)
+        self.assertEqual(feed.highest_job_id, 1199)
+
+    def test_new_jobs_are_reported_once(self):
+        job_feed.poll_new_jobs("en")
+        self.listing.job_ids = list(range(1205, 1199, -1)) + self.listing.job_ids
+        feed = job_feed.poll_new_jobs("en")
+        self.assertEqual(
+            [job_feed.job_id_of(job) for job in feed.new_jobs], list(range(1205, 1199, -1))
+        )
+        self.assertTrue(feed.reached_known_jobs)
+        self.assertEqual(job_feed.poll_new_jobs("en").new_jobs, [])
+
+    def test_disappeared_job_does_not_report_older_jobs(self):
+        job_feed.poll_new_jobs("en")
+        self.listing.job_ids.remove(1190)
+        self.listing.pages_fetched = 0
+        feed = job_feed.poll_new_jobs("en")
+        self.assertEqual(feed.new_jobs, [])
+        self.assertTrue(feed.reached_known_jobs)
+        self.assertEqual(self.listing.pages_fetched, 1)
+
+    def test_empty_first_poll_keeps_no_watermark(self):
+        self.listing.job_ids = []
+        feed = job_feed.poll_new_jobs("en")
+        self.assertTrue(feed.first_poll)
+        self.listing.job_ids = list(range(1000, 1040))
+        self.listing.pages_fetched = 0
+        feed = job_feed.poll_new_jobs("en")
+        self.assertTrue(feed.first_poll)
+        self.assertEqual(self.listing.pages_fetched, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
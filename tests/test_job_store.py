@@ -0,0 +1,72 @@
+import time
+import unittest
+from decimal import Decimal
+from pathlib import Path
+from useme_mcp.services.job_fields import expiry_time, parse_budget, parse_days_left
+from useme_mcp.services.job_scraper import parse_job_detail_from_html, parse_jobs_from_html
+from useme_mcp.services.job_store import JobStore
+
+FIXTURES = Path(__file__).parent.parent / "benchmark" / "fixtures"
+
+
+class JobFieldsTest(unittest.TestCase):
+    def test_parse_budget(self):
+        self.assertEqual(parse_budget("1197 PLN"), (1197, "PLN"))
+        self.assertEqual(parse_budget("2 500 PLN"), (2500, "PLN"))
+        self.assertEqual(parse_budget("1,000.50 EUR"), (1000.5, "EUR"))
+        self.assertEqual(parse_budget("1 000,50 PLN"), (Decimal("1000.50"), "PLN"))
+        self.assertEqual(parse_budget("2 500 zł"), (2500, "PLN"))
+        self.assertEqual(parse_budget("Negotiable"), (None, None))
+
+    def test_parse_days_left(self):
+        self.assertEqual(parse_days_left("12 days"), 12)
+        self.assertEqual(parse_days_left("Znika za 3 dni"), 3)
+        self.assertEqual(parse_days_left("5 hours left"), 0)
+        self.assertIsNone(parse_days_left(""))
+
+    def test_last_day_is_not_expired(self):
+        now = time.time()
+        self.assertGreater(expiry_time(0, now), now)
+
+
+class JobStoreTest(unittest.TestCase):
+    def setUp(self):
+        html = (FIXTURES / "en" / "listing.html").read_text(encoding="utf-8")
+        self.jobs = parse_jobs_from_html(html)
+        self.store = JobStore("")
+        self.store.add_listing(self.jobs)
+        self.priced = [job for job in self.jobs if parse_budget(job.budget)[0] is not None]
+
+    def test_amount_and_currency_filters(self):
+        self.assertTrue(self.priced)
+        hits = self.store.search(min_amount=1, limit=100)
+        self.assertEqual(len(hits), len(self.priced))
+        self.assertEqual(len(self.store.search(currency="pln", limit=100)), len(self.priced))
+        cheapest = min(parse_budget(job.budget)[0] for job in self.priced)
+        self.assertEqual(self.store.search(order_by="amount", min_amount=1)[0].amount, cheapest)
+        self.assertEqual(self.store.search(max_amount=float(cheapest) - 1), [])
+
+    def test_unpriced_jobs_sort_last(self):
+        self.assertLess(len(self.priced), len(self.jobs))
+        for order_by in ("amount", "-amount"):
+            hits = self.store.search(order_by=order_by, limit=100)
+            self.assertIsNotNone(hits[0].amount)
+            self.assertIsNone(hits[-1].amount)
+
+    def test_jobs_in_their_last_day_are_found(self):
+        job = self.jobs[0].model_copy(update={"days_left": 0})
+        self.store.add_listing([job])
+        urls = [hit.url for hit in self.store.search(limit=100)]
+        self.assertIn(job.url, urls)
+
+    def test_detail_page_adds_description_and_expiry(self):
+        html = (FIXTURES / "en" / "job_detail.html").read_text(encoding="utf-8")
+        detail = parse_job_detail_from_html(html, self.jobs[0].url)
+        self.store.add_detail(detail)
+        hit = [hit for hit in self.store.search(limit=100) if hit.url == detail.url][0]
+        self.assertTrue(hit.has_details)
+        self.assertEqual(hit.days_left, parse_days_left(detail.valid_for))
+
+
+if __name__ == "__main__":
+    unittest.main()
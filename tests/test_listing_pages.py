@@ -0,0 +1,38 @@
+import asyncio
+import unittest
+from unittest import mock
+from useme_mcp.services import job_scraper
+from useme_mcp.services.http_client import HttpError, HttpResponse
+from useme_mcp.services.job_scraper import fetch_jobs_page_async, fetch_pages_concurrently
+
+
+def fake_pages(failing_page: int):
+    async def fetch_page(page: int):
+        if page == failing_page:
+            raise HttpError(500, f"https://useme.com/en/jobs/?page={page}")
+        return [f"job {page}"]
+
+    return fetch_page
+
+
+class ListingPagesTest(unittest.TestCase):
+    def test_failing_later_page_keeps_earlier_pages(self):
+        results = asyncio.run(fetch_pages_concurrently(fake_pages(3), range(1, 6)))
+        self.assertEqual(results, [["job 1"], ["job 2"]])
+
+    def test_failing_first_page_raises(self):
+        with self.assertRaises(HttpError):
+            asyncio.run(fetch_pages_concurrently(fake_pages(1), range(1, 4)))
+
+    def test_missing_later_page_is_end_of_listing(self):
+        async def not_found(operation, url, headers=None):
+            return HttpResponse(404, url, b"")
+
+        with mock.patch.object(job_scraper.retry, "get", not_found):
+            self.assertEqual(asyncio.run(fetch_jobs_page_async(7, use_cache=False)), [])
+            with self.assertRaises(HttpError):
+                asyncio.run(fetch_jobs_page_async(1, use_cache=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+import unittest
+from benchmark.parity import fixture_paths, first_difference, parse_fixture
+from useme_mcp.services.html_parsing import available_backends
+
+
+@unittest.skipUnless("lxml" in available_backends(), "lxml is not installed")
+class ParserParityTest(unittest.TestCase):
+    def test_lxml_matches_html_parser_on_every_fixture(self):
+        paths = fixture_paths()
+        self.assertTrue(paths)
+        for lang, name, path in paths:
+            with self.subTest(fixture=f"{lang}/{name}"):
+                with open(path, "rb") as f:
+                    content = f.read()
+                reference = parse_fixture(name, content, "html.parser")
+                self.assertTrue(reference)
+                self.assertIsNone(first_difference(reference, parse_fixture(name, content, "lxml")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import asyncio
+import time
+import unittest
+from useme_mcp.services.rate_limiter import HostLimiter
+
+
+def throttled_pause(retry_after):
+    limiter = HostLimiter("useme.com", rate=10, burst=10, backoff=1.0, max_backoff=60.0)
+    permit = asyncio.run(limiter.acquire())
+    permit.throttle("429", retry_after)
+    limiter.release(permit)
+    return limiter.paused_until - time.monotonic()
+
+
+class RetryAfterTest(unittest.TestCase):
+    def test_retry_after_is_honoured(self):
+        self.assertAlmostEqual(throttled_pause(5.0), 5.0, delta=0.5)
+
+    def test_retry_after_is_capped_at_max_backoff(self):
+        self.assertLessEqual(throttled_pause(86400.0), 60.0)
+
+    def test_backoff_without_retry_after(self):
+        self.assertAlmostEqual(throttled_pause(None), 1.0, delta=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, field_validator
 from decimal import Decimal
 import re
@@ -27,6 +27,33 @@ class JobOffer(BaseModel):
     url: str
 
 
+class NewJobsFeed(BaseModel):
+    language: str
+    category_id: Optional[int] = None
+    new_jobs: List[JobOffer] = []
+    pages_fetched: int
+    reached_known_jobs: bool
+    first_poll: bool
+    highest_job_id: Optional[int] = None
+
+
+class JobSearchHit(BaseModel):
+    job_id: int
+    url: str
+    title: str
+    description: str
+    category: str
+    tags: List[str] = []
+    client: str
+    budget: str
+    amount: Optional[Decimal] = None
+    currency: Optional[str] = None
+    offers_count: int
+    days_left: Optional[int] = None
+    has_details: bool = False
+    snippet: Optional[str] = None
+
+
 class JobDetail(BaseModel):
     title: str
     client: str
@@ -80,6 +107,12 @@ class JobDetail(BaseModel):
         return budget == "Negotiable"
 
 
+class JobDetailsBatch(BaseModel):
+    jobs: Dict[str, JobDetail] = {}  # keyed by job ID
+    errors: Dict[str, str] = {}  # keyed by job ID, or by the URL when it has none
+    duplicates: int = 0
+
+
 class JobCompetitor(BaseModel):
     username: str
     profile_url: str
@@ -94,6 +127,7 @@ class JobCompetition(BaseModel):
     total_offers: int
     total_pages: int
     competitors: List[JobCompetitor] = []
+    failed_pages: List[int] = []
 
 
 class BillingContractor(BaseModel):
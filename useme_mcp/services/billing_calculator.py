@@ -1,6 +1,19 @@
-import cloudscraper
+import asyncio
 import json
-from typing import Optional
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from . import retry
+from .http_client import run_sync
+from .cache import TTLCache
+from .metrics import metrics
+from .billing_engine import BillingParams, calculate_billing_locally, summarize_billing
+from ..settings import (
+    BASE_URL,
+    BILLING_CACHE_TTL,
+    BILLING_MODE,
+    BILLING_WORKERS,
+    LISTING_CACHE_SIZE,
+)
 from ..models import (
     BillingResult,
     BillingCalculation,
@@ -9,8 +22,121 @@ from ..models import (
     BillingComponent,
 )
 
+logger = logging.getLogger(__name__)
 
-def calculate_billing(
+# Billing results keyed by the full parameter tuple
+billing_cache: TTLCache[BillingResult] = TTLCache(
+    LISTING_CACHE_SIZE,
+    BILLING_CACHE_TTL,
+    kind="billing",
+    dump=lambda billing: billing.model_dump(mode="json"),
+    load=BillingResult.model_validate,
+)
+
+
+def build_billing_payload(params: BillingParams) -> dict:
+    """Build the request payload of the billing API"""
+    return {
+        "amount": str(params.amount),
+        "copyright_transfer": params.copyright_transfer,
+        "currency": params.currency,
+        "subcategory": 2,  # Default subcategory
+        "billing_calculator": "N2G",  # Default billing calculator
+        "contractor": {
+            "email": None,
+            "country": params.contractor_country,
+            "residence": None,
+            "is_business": params.contractor_is_business,
+            "is_vat_payer": params.contractor_is_vat_payer,
+            "user_class": "default",
+        },
+        "employer": {
+            "email": None,
+            "country": params.employer_country,
+            "is_business": params.employer_is_business,
+            "is_vat_payer": params.employer_is_vat_payer,
+            "user_class": "default",
+        },
+        "discount": None,
+        "max_income_cost": None,
+    }
+
+
+async def _request_billing_data(params: BillingParams) -> dict:
+    """Call the billing API and return its raw JSON response (raises on errors)"""
+    logger.debug("Calculating billing for %s %s", params.amount, params.currency)
+
+    # Make request to billing API
+    response = await retry.post(
+        "billing",
+        f"{BASE_URL}/internal-api/billing/",
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+        data=json.dumps(build_billing_payload(params)),
+    )
+
+    response.raise_for_status()
+    return response.json()
+
+
+async def fetch_billing_data_async(params: BillingParams) -> Optional[dict]:
+    """Call the billing API and return its raw JSON response"""
+    try:
+        return await _request_billing_data(params)
+    except Exception as e:
+        logger.warning("Error calculating billing: %s", e)
+        return None
+
+
+def parse_billing_from_api_data(data: dict, params: BillingParams) -> BillingResult:
+    """Parse billing API response data"""
+    billing_data = data.get("data", {})
+
+    # Parse payin components
+    payin_components = []
+    for item in billing_data.get("payin", []):
+        payin_components.append(BillingComponent(label=item["label"], value=float(item["value"])))
+
+    # Parse payout components
+    payout_components = []
+    for item in billing_data.get("payout", []):
+        payout_components.append(BillingComponent(label=item["label"], value=float(item["value"])))
+
+    # Parse price components
+    price_components = []
+    for item in billing_data.get("priceComponents", []):
+        price_components.append(BillingComponent(label=item["label"], value=float(item["value"])))
+
+    # Create models
+    contractor = BillingContractor(
+        country=params.contractor_country,
+        is_business=params.contractor_is_business,
+        is_vat_payer=params.contractor_is_vat_payer,
+    )
+
+    employer = BillingEmployer(
+        country=params.employer_country,
+        is_business=params.employer_is_business,
+        is_vat_payer=params.employer_is_vat_payer,
+    )
+
+    calculation = BillingCalculation(
+        currency=billing_data.get("currency", params.currency),
+        payin=payin_components,
+        payout=payout_components,
+        price_components=price_components,
+    )
+
+    return BillingResult(
+        amount=params.amount,
+        currency=params.currency,
+        copyright_transfer=params.copyright_transfer,
+        contractor=contractor,
+        employer=employer,
+        calculation=calculation,
+    )
+
+
+async def calculate_billing_async(
     amount: float,
     currency: str = "PLN",
     copyright_transfer: str = "license",
@@ -24,6 +150,10 @@ def calculate_billing(
     """
     Calculate billing costs for Useme freelance work
 
+    Depending on ``USEME_BILLING_MODE`` the result comes from the Useme billing API
+    (``api``), from the offline billing engine (``local``), or from the engine when
+    it supports the parameters and the API otherwise (``auto``).
+
     Args:
         amount: Amount to be paid out to contractor
         currency: Currency code (PLN, EUR, GBP, USD)
@@ -38,100 +168,300 @@ def calculate_billing(
     Returns:
         BillingResult with detailed cost breakdown
     """
-    scraper = cloudscraper.create_scraper()
+    params = BillingParams(
+        float(amount),
+        currency,
+        copyright_transfer,
+        contractor_country,
+        contractor_is_business,
+        contractor_is_vat_payer,
+        employer_country,
+        employer_is_business,
+        employer_is_vat_payer,
+    )
+    billing, _ = await _calculate_billing(params)
+    return billing
 
-    # Prepare request payload
-    payload = {
-        "amount": str(amount),
-        "copyright_transfer": copyright_transfer,
-        "currency": currency,
-        "subcategory": 2,  # Default subcategory
-        "billing_calculator": "N2G",  # Default billing calculator
-        "contractor": {
-            "email": None,
-            "country": contractor_country,
-            "residence": None,
-            "is_business": contractor_is_business,
-            "is_vat_payer": contractor_is_vat_payer,
-            "user_class": "default",
-        },
-        "employer": {
-            "email": None,
-            "country": employer_country,
-            "is_business": employer_is_business,
-            "is_vat_payer": employer_is_vat_payer,
-            "user_class": "default",
-        },
-        "discount": None,
-        "max_income_cost": None,
-    }
+
+async def _calculate_billing(params: BillingParams) -> Tuple[Optional[BillingResult], str]:
+    """Billing result, or None and the reason why there is none"""
+    if BILLING_MODE in ("local", "auto"):
+        billing = calculate_billing_locally(params)
+        if billing is not None:
+            return billing, ""
+        if BILLING_MODE == "local":
+            return None, "Not supported by the local billing engine"
+
+    cached = billing_cache.get(params)
+    if cached is not None:
+        return cached.model_copy(deep=True), ""
 
     try:
-        print(f"Calculating billing for {amount} {currency}")
+        data = await _request_billing_data(params)
+    except Exception as e:
+        logger.warning("Error calculating billing: %s", e)
+        return None, f"Billing API error: {e}"
 
-        # Make request to billing API
-        response = scraper.post(
-            "https://useme.com/internal-api/billing/",
-            headers={"Content-Type": "application/json", "Accept": "application/json"},
-            data=json.dumps(payload),
-        )
+    try:
+        with metrics.timed("validate"):
+            billing = parse_billing_from_api_data(data, params)
+    except Exception as e:
+        logger.warning("Error calculating billing: %s", e)
+        return None, f"Unexpected billing API response: {e}"
 
-        response.raise_for_status()
-        data = response.json()
-
-        # Parse response data
-        billing_data = data.get("data", {})
-
-        # Parse payin components
-        payin_components = []
-        for item in billing_data.get("payin", []):
-            payin_components.append(
-                BillingComponent(label=item["label"], value=float(item["value"]))
-            )
-
-        # Parse payout components
-        payout_components = []
-        for item in billing_data.get("payout", []):
-            payout_components.append(
-                BillingComponent(label=item["label"], value=float(item["value"]))
-            )
-
-        # Parse price components
-        price_components = []
-        for item in billing_data.get("priceComponents", []):
-            price_components.append(
-                BillingComponent(label=item["label"], value=float(item["value"]))
-            )
-
-        # Create models
-        contractor = BillingContractor(
-            country=contractor_country,
-            is_business=contractor_is_business,
-            is_vat_payer=contractor_is_vat_payer,
-        )
+    billing_cache.set(params, billing.model_copy(deep=True))
+    return billing, ""
 
-        employer = BillingEmployer(
-            country=employer_country,
-            is_business=employer_is_business,
-            is_vat_payer=employer_is_vat_payer,
-        )
 
-        calculation = BillingCalculation(
-            currency=billing_data.get("currency", currency),
-            payin=payin_components,
-            payout=payout_components,
-            price_components=price_components,
+def calculate_billing(
+    amount: float,
+    currency: str = "PLN",
+    copyright_transfer: str = "license",
+    contractor_country: str = "PL",
+    contractor_is_business: bool = False,
+    contractor_is_vat_payer: bool = False,
+    employer_country: str = "PL",
+    employer_is_business: bool = True,
+    employer_is_vat_payer: bool = True,
+) -> Optional[BillingResult]:
+    """Calculate billing costs for Useme freelance work (see calculate_billing_async)"""
+    return run_sync(
+        calculate_billing_async(
+            amount,
+            currency,
+            copyright_transfer,
+            contractor_country,
+            contractor_is_business,
+            contractor_is_vat_payer,
+            employer_country,
+            employer_is_business,
+            employer_is_vat_payer,
         )
+    )
+
+
+# Upper bound on amount x scenario rows of a single sweep
+MAX_SWEEP_ROWS = 2000
+
+SWEEP_COLUMNS = ["scenario", "amount", "client_total", "vat", "commission", "pit", "error"]
 
-        return BillingResult(
-            amount=amount,
-            currency=currency,
-            copyright_transfer=copyright_transfer,
-            contractor=contractor,
-            employer=employer,
-            calculation=calculation,
+
+def sweep_amounts(
+    amounts: Optional[List[float]] = None,
+    amount_from: Optional[float] = None,
+    amount_to: Optional[float] = None,
+    amount_step: Optional[float] = None,
+) -> List[float]:
+    """Expand an explicit amount list and/or an inclusive range into payout amounts"""
+    values = [float(amount) for amount in amounts or []]
+    if (amount_from is None) != (amount_to is None):
+        raise ValueError("amount_from and amount_to must be given together")
+    if amount_from is not None and amount_to is not None:
+        if amount_to < amount_from:
+            raise ValueError("amount_to must not be below amount_from")
+        step = amount_step or (amount_to - amount_from) or 1.0
+        if step <= 0:
+            raise ValueError("amount_step must be positive")
+        count = int((amount_to - amount_from) / step + 1e-9) + 1
+        values.extend(round(amount_from + i * step, 2) for i in range(count))
+    return values
+
+
+async def calculate_billing_sweep_async(
+    amounts: List[float],
+    scenarios: Optional[List[Dict[str, Any]]] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Calculate billing for every amount x scenario combination
+
+    Scenarios are dicts of ``calculate_billing`` keyword arguments other than the
+    amount (missing keys use the defaults). Identical parameter tuples are computed
+    once, at most ``max_workers`` at a time. Returns a compact table with one row
+    per combination; failed calculations have ``None`` figures and the reason in
+    the ``error`` column.
+    """
+    scenarios = scenarios or [{}]
+    if len(amounts) * len(scenarios) > MAX_SWEEP_ROWS:
+        raise ValueError(f"A sweep may contain at most {MAX_SWEEP_ROWS} rows")
+
+    normalised = []
+    for scenario in scenarios:
+        unknown = set(scenario) - set(BillingParams._fields)
+        if unknown:
+            raise ValueError(f"Unknown scenario fields: {', '.join(sorted(unknown))}")
+        normalised.append(BillingParams(**{**scenario, "amount": 0.0}))
+
+    combinations = [
+        (index, params._replace(amount=float(amount)))
+        for index, params in enumerate(normalised)
+        for amount in amounts
+    ]
+    unique = list(dict.fromkeys(params for _, params in combinations))
+
+    semaphore = asyncio.Semaphore(max(1, max_workers or BILLING_WORKERS))
+
+    async def calculate(params: BillingParams) -> Tuple[Optional[BillingResult], str]:
+        async with semaphore:
+            return await _calculate_billing(params)
+
+    results = dict(zip(unique, await asyncio.gather(*(calculate(p) for p in unique))))
+
+    rows = []
+    for index, params in combinations:
+        billing, error = results[params]
+        summary = summarize_billing(billing) if billing else {}
+        rows.append(
+            [
+                index,
+                params.amount,
+                summary.get("total"),
+                summary.get("vat"),
+                summary.get("commission"),
+                summary.get("pit"),
+                error or None,
+            ]
         )
 
-    except Exception as e:
-        print(f"Error calculating billing: {e}")
+    return {
+        "scenarios": [params._asdict() for params in normalised],
+        "columns": SWEEP_COLUMNS,
+        "rows": rows,
+        "unique_calculations": len(unique),
+    }
+
+
+def calculate_billing_sweep(
+    amounts: List[float],
+    scenarios: Optional[List[Dict[str, Any]]] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Calculate billing for every amount x scenario combination"""
+    return run_sync(calculate_billing_sweep_async(amounts, scenarios, max_workers))
+
+
+# Rough client total per unit of payout, used for the first guess of the solver
+INITIAL_COST_RATIO = 1.45
+MAX_SOLVER_EVALUATIONS = 24
+
+
+async def solve_payout_for_budget_async(
+    client_budget: float,
+    budget_includes_vat: bool = True,
+    currency: str = "PLN",
+    copyright_transfer: str = "license",
+    contractor_country: str = "PL",
+    contractor_is_business: bool = False,
+    contractor_is_vat_payer: bool = False,
+    employer_country: str = "PL",
+    employer_is_business: bool = True,
+    employer_is_vat_payer: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    Find the highest payout (to the cent) whose client cost fits a budget
+
+    The client cost grows monotonically with the payout, almost linearly, so the
+    search works in whole grosze: it starts from a ratio-based guess, rescales it by
+    the observed ratio until the budget is bracketed, then takes secant steps
+    between the closest amounts below and above the budget, falling back to
+    bisection when a step does not halve the bracket, and stops when the bracket is
+    one grosz wide. Each payout is evaluated at most once; evaluations also go
+    through the billing cache.
+
+    Args:
+        client_budget: Budget of the client
+        budget_includes_vat: Whether the budget is the client total including VAT
+                             (default) or the net amount before VAT
+        (remaining arguments as in calculate_billing)
+
+    Returns:
+        Dict with the payout amount, the matched client cost, the number of billing
+        evaluations and the full billing breakdown, or None when even the smallest
+        payout exceeds the budget or billing calculations fail
+    """
+    if client_budget <= 0:
+        raise ValueError("client_budget must be positive")
+
+    scenario = BillingParams(
+        0.0,
+        currency,
+        copyright_transfer,
+        contractor_country,
+        contractor_is_business,
+        contractor_is_vat_payer,
+        employer_country,
+        employer_is_business,
+        employer_is_vat_payer,
+    )
+    evaluations: Dict[int, Optional[float]] = {}  # keyed by payout in grosze
+    results: Dict[int, BillingResult] = {}
+
+    async def cost(cents: int) -> Optional[float]:
+        payout = cents / 100
+        if cents not in evaluations:
+            billing = await calculate_billing_async(*scenario._replace(amount=payout))
+            value = None
+            if billing:
+                summary = summarize_billing(billing)
+                if summary["total"] is not None:
+                    value = summary["total"]
+                    if not budget_includes_vat:
+                        value -= summary["vat"] or 0.0
+                    results[cents] = billing
+            evaluations[cents] = value
+        return evaluations[cents]
+
+    below = None  # (grosze, cost) with cost <= budget
+    above = None  # (grosze, cost) with cost > budget
+    guess = max(round(client_budget / INITIAL_COST_RATIO * 100), 1)
+    width = None  # bracket width before the last step
+
+    while len(evaluations) < MAX_SOLVER_EVALUATIONS:
+        value = await cost(guess)
+        if value is None:
+            return None
+        if value <= client_budget:
+            if below is None or guess > below[0]:
+                below = (guess, value)
+        elif above is None or guess < above[0]:
+            above = (guess, value)
+
+        if above is not None and above[0] <= 1:
+            return None  # even the smallest payout is over budget
+        if below is None or above is None:
+            # Only one side known yet: rescale by the observed cost ratio
+            anchor, anchor_cost = below or above
+            guess = round(client_budget * anchor / anchor_cost) if anchor_cost > 0 else anchor
+            guess = max(guess, below[0] + 1) if below else max(min(guess, above[0] - 1), 1)
+            continue
+
+        if above[0] - below[0] <= 1:
+            break
+        if width is not None and above[0] - below[0] > width / 2:
+            guess = (below[0] + above[0]) // 2
+        else:
+            # Secant step, staying strictly inside the bracket
+            slope = (above[1] - below[1]) / (above[0] - below[0])
+            step = (client_budget - below[1]) / slope if slope > 0 else 0
+            guess = min(max(below[0] + int(step), below[0] + 1), above[0] - 1)
+        if guess in evaluations:
+            guess = (below[0] + above[0]) // 2
+        width = above[0] - below[0]
+
+    if below is None:
         return None
+
+    cents, value = below
+    return {
+        "payout_amount": cents / 100,
+        "client_cost": value,
+        "client_budget": client_budget,
+        "budget_includes_vat": budget_includes_vat,
+        "converged": above is not None and above[0] - cents <= 1,
+        "evaluations": len(evaluations),
+        "billing": results[cents].model_dump(),
+    }
+
+
+def solve_payout_for_budget(client_budget: float, **kwargs: Any) -> Optional[Dict[str, Any]]:
+    """Find the highest payout whose client cost fits a budget (see the async version)"""
+    return run_sync(solve_payout_for_budget_async(client_budget, **kwargs))
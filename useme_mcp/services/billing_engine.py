@@ -0,0 +1,378 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from ..models import (
+    BillingResult,
+    BillingCalculation,
+    BillingContractor,
+    BillingEmployer,
+    BillingComponent,
+)
+from ..settings import BILLING_CALIBRATION
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_CURRENCIES = ("PLN", "EUR", "GBP", "USD")
+SUPPORTED_COPYRIGHT_TRANSFERS = ("license",)
+# The record grid also covers options the engine does not model yet
+RECORDED_COPYRIGHT_TRANSFERS = ("license", "full")
+
+EU_COUNTRIES = frozenset(
+    "AT BE BG CY CZ DE DK EE ES FI FR GR HR HU IE IT LT LU LV MT NL PL PT RO SE SI SK".split()
+)
+
+
+class BillingParams(NamedTuple):
+    """Full parameter tuple of a billing calculation"""
+
+    amount: float
+    currency: str = "PLN"
+    copyright_transfer: str = "license"
+    contractor_country: str = "PL"
+    contractor_is_business: bool = False
+    contractor_is_vat_payer: bool = False
+    employer_country: str = "PL"
+    employer_is_business: bool = True
+    employer_is_vat_payer: bool = True
+
+
+def scenario(params: BillingParams) -> Tuple:
+    """Every parameter but the amount"""
+    return tuple(params)[1:]
+
+
+# Scenarios checked against Useme's figures: the documented calculator example
+VERIFIED_SCENARIOS: FrozenSet[Tuple] = frozenset({scenario(BillingParams(amount=0.0))})
+
+
+@dataclass(frozen=True)
+class Tariff:
+    """Rates used by the local billing engine
+
+    The defaults reproduce the calculator example documented for Useme
+    (250 PLN payout -> 295 PLN net + 67.85 PLN VAT, 29 PLN commission, 16 PLN PIT).
+    Run ``python -m useme_mcp.services.billing_engine calibrate`` against recorded
+    API responses before relying on other scenarios.
+
+    Only the copyright options listed in ``deductible_costs`` are modelled; the
+    example covers the license, and the rate for a full transfer is not known, so
+    those calculations are left to the API rather than given the license figures.
+    """
+
+    commission_rate: float = 0.11  # share of the contractor's gross amount
+    pit_rate: float = 0.12  # first PIT bracket for individual contractors
+    # Share of copyright income treated as deductible costs (KUP) when computing PIT,
+    # per modelled copyright option
+    deductible_costs: Tuple[Tuple[str, float], ...] = (("license", 0.5),)
+    vat_rate: float = 0.23  # Polish VAT charged on Useme's invoice
+
+    def deductible_share(self, copyright_transfer: str) -> float:
+        return dict(self.deductible_costs).get(copyright_transfer, 0.0)
+
+    def models_copyright(self, copyright_transfer: str) -> bool:
+        return any(option == copyright_transfer for option, _ in self.deductible_costs)
+
+
+DEFAULT_TARIFF = Tariff()
+
+
+def _round_money(value: float) -> float:
+    return math.floor(value * 100 + 0.5) / 100
+
+
+def _round_whole(value: float) -> float:
+    return float(math.floor(value + 0.5))
+
+
+def is_modelled(params: BillingParams, tariff: Tariff = DEFAULT_TARIFF) -> bool:
+    """Whether the formulas cover this combination of parameters
+
+    Not modelled: copyright options without a deductible-cost rate, and
+    VAT-registered contractors, whose VAT flow between contractor, Useme and
+    client is not known.
+    """
+    return (
+        params.currency in SUPPORTED_CURRENCIES
+        and params.copyright_transfer in SUPPORTED_COPYRIGHT_TRANSFERS
+        and tariff.models_copyright(params.copyright_transfer)
+        and not params.contractor_is_vat_payer
+        and params.amount > 0
+    )
+
+
+@lru_cache(maxsize=8)
+def calibrated_scenarios(
+    path: str = BILLING_CALIBRATION, tariff: Tariff = DEFAULT_TARIFF
+) -> FrozenSet[Tuple]:
+    """Verified scenarios plus those whose recordings in ``path`` all match the engine"""
+    if not path:
+        return VERIFIED_SCENARIOS
+    try:
+        with open(path, encoding="utf-8") as f:
+            recordings = [json.loads(line) for line in f if line.strip()]
+        report = calibrate(recordings, tariff)
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        logger.warning("Error reading billing calibration %s: %s", path, e)
+        return VERIFIED_SCENARIOS
+    matched, failed = set(), set()
+    for row in report:
+        key = scenario(BillingParams(**row["params"]))
+        (failed if row["mismatches"] or not row["modelled"] else matched).add(key)
+    return VERIFIED_SCENARIOS | frozenset(matched - failed)
+
+
+def is_supported(params: BillingParams, tariff: Tariff = DEFAULT_TARIFF) -> bool:
+    """Whether the local engine answers for this combination of parameters
+
+    Only modelled scenarios that were checked against the API qualify: the
+    documented example and, with ``USEME_BILLING_CALIBRATION``, every scenario
+    whose recordings all match. Everything else is left to the API.
+    """
+    return is_modelled(params, tariff) and scenario(params) in calibrated_scenarios(tariff=tariff)
+
+
+def employer_vat_rate(params: BillingParams, tariff: Tariff = DEFAULT_TARIFF) -> float:
+    """VAT rate on Useme's invoice to the employer"""
+    if params.employer_country == "PL":
+        return tariff.vat_rate
+    if params.employer_country in EU_COUNTRIES:
+        # Reverse charge for VAT-registered EU businesses, Polish VAT otherwise
+        if params.employer_is_business and params.employer_is_vat_payer:
+            return 0.0
+        return tariff.vat_rate
+    # Services for businesses outside the EU are not subject to Polish VAT
+    return 0.0 if params.employer_is_business else tariff.vat_rate
+
+
+def contractor_pit(gross: float, params: BillingParams, tariff: Tariff = DEFAULT_TARIFF) -> float:
+    """PIT withheld for individual Polish contractors (businesses settle their own taxes)"""
+    if params.contractor_is_business or params.contractor_country != "PL":
+        return 0.0
+    costs = tariff.deductible_share(params.copyright_transfer)
+    return _round_whole(gross * (1 - costs) * tariff.pit_rate)
+
+
+def _contractor_gross(params: BillingParams, tariff: Tariff) -> float:
+    """Smallest gross amount whose payout after PIT covers the requested amount"""
+    costs = tariff.deductible_share(params.copyright_transfer)
+    effective_rate = 0.0
+    if not params.contractor_is_business and params.contractor_country == "PL":
+        effective_rate = (1 - costs) * tariff.pit_rate
+    gross = _round_money(params.amount / (1 - effective_rate))
+    # PIT is rounded to whole units, so settle on the exact fixed point
+    for _ in range(5):
+        adjusted = _round_money(params.amount + contractor_pit(gross, params, tariff))
+        if adjusted == gross:
+            break
+        gross = adjusted
+    return gross
+
+
+@lru_cache(maxsize=4096)
+def _calculate(params: BillingParams, tariff: Tariff) -> BillingResult:
+    gross = _contractor_gross(params, tariff)
+    pit = contractor_pit(gross, params, tariff)
+    commission = _round_whole(gross * tariff.commission_rate)
+    net = _round_money(gross + commission)
+    vat_rate = employer_vat_rate(params, tariff)
+    vat = _round_money(net * vat_rate)
+    total = _round_money(net + vat)
+
+    vat_label = f"VAT {round(vat_rate * 100)}%"
+    payin = [
+        BillingComponent(label="Net amount", value=net),
+        BillingComponent(label=vat_label, value=vat),
+        BillingComponent(label="Total", value=total),
+    ]
+    payout = [
+        BillingComponent(label="Useme commission", value=commission),
+        BillingComponent(label="PIT", value=pit),
+    ]
+    payout.append(BillingComponent(label="Payout", value=params.amount))
+    price_components = [
+        BillingComponent(label="Contractor gross", value=gross),
+        BillingComponent(label="Useme commission", value=commission),
+        BillingComponent(label=vat_label, value=vat),
+    ]
+
+    return BillingResult(
+        amount=params.amount,
+        currency=params.currency,
+        copyright_transfer=params.copyright_transfer,
+        contractor=BillingContractor(
+            country=params.contractor_country,
+            is_business=params.contractor_is_business,
+            is_vat_payer=params.contractor_is_vat_payer,
+        ),
+        employer=BillingEmployer(
+            country=params.employer_country,
+            is_business=params.employer_is_business,
+            is_vat_payer=params.employer_is_vat_payer,
+        ),
+        calculation=BillingCalculation(
+            currency=params.currency,
+            payin=payin,
+            payout=payout,
+            price_components=price_components,
+        ),
+    )
+
+
+def compute_billing(
+    params: BillingParams, tariff: Tariff = DEFAULT_TARIFF
+) -> Optional[BillingResult]:
+    """Formula result for any modelled combination, calibrated or not
+
+    Results are memoised on the full parameter tuple, so repeated calls only cost
+    a model copy. Returns None for parameter combinations the engine does not model.
+    """
+    if not is_modelled(params, tariff):
+        return None
+    return _calculate(params, tariff).model_copy(deep=True)
+
+
+def calculate_billing_locally(
+    params: BillingParams, tariff: Tariff = DEFAULT_TARIFF
+) -> Optional[BillingResult]:
+    """Compute a billing breakdown without calling the Useme API
+
+    Returns None for parameter combinations that are not modelled or not calibrated.
+    """
+    if not is_supported(params, tariff):
+        return None
+    return compute_billing(params, tariff)
+
+
+def summarize_billing(billing: BillingResult) -> Dict[str, Optional[float]]:
+    """Key figures of a billing breakdown, matched by label (English or Polish)"""
+
+    def find(components: List[BillingComponent], *keywords: str) -> Optional[float]:
+        for component in components:
+            label = component.label.lower()
+            if any(keyword in label for keyword in keywords):
+                return component.value
+        return None
+
+    calculation = billing.calculation
+    everything = calculation.payin + calculation.payout + calculation.price_components
+    return {
+        "total": find(calculation.payin, "total", "razem", "do zapłaty", "brutto"),
+        "vat": find(calculation.payin, "vat"),
+        "commission": find(everything, "commission", "prowizja"),
+        "pit": find(everything, "pit", "podatek"),
+        "payout": billing.amount,
+    }
+
+
+def calibrate(
+    recordings: List[dict], tariff: Tariff = DEFAULT_TARIFF, tolerance: float = 0.01
+) -> List[dict]:
+    """Compare the local engine with recorded API responses
+
+    Each recording is ``{"params": {...BillingParams fields}, "response": <API JSON>}``
+    as written by the ``record`` command. Returns one report row per recording.
+    """
+    from .billing_calculator import parse_billing_from_api_data
+
+    report = []
+    for recording in recordings:
+        params = BillingParams(**recording["params"])
+        expected = summarize_billing(parse_billing_from_api_data(recording["response"], params))
+        local = compute_billing(params, tariff)
+        actual = summarize_billing(local) if local else {}
+        mismatches = {
+            key: {"api": value, "local": actual.get(key)}
+            for key, value in expected.items()
+            if value is not None
+            and (actual.get(key) is None or abs(actual[key] - value) > tolerance)
+        }
+        report.append(
+            {"params": params._asdict(), "modelled": local is not None, "mismatches": mismatches}
+        )
+    return report
+
+
+def default_calibration_grid() -> List[BillingParams]:
+    """Scenarios recorded by the ``record`` command"""
+    grid = []
+    for amount in (100, 250, 1000, 5000):
+        for currency in SUPPORTED_CURRENCIES:
+            for copyright_transfer in RECORDED_COPYRIGHT_TRANSFERS:
+                for contractor_is_business, contractor_is_vat_payer in (
+                    (False, False),
+                    (True, False),
+                    (True, True),
+                ):
+                    for employer_country, employer_is_business, employer_is_vat_payer in (
+                        ("PL", True, True),
+                        ("PL", False, False),
+                        ("DE", True, True),
+                        ("US", True, False),
+                    ):
+                        grid.append(
+                            BillingParams(
+                                amount=float(amount),
+                                currency=currency,
+                                copyright_transfer=copyright_transfer,
+                                contractor_is_business=contractor_is_business,
+                                contractor_is_vat_payer=contractor_is_vat_payer,
+                                employer_country=employer_country,
+                                employer_is_business=employer_is_business,
+                                employer_is_vat_payer=employer_is_vat_payer,
+                            )
+                        )
+    return grid
+
+
+async def record(path: str, grid: List[BillingParams]) -> int:
+    """Call the billing API for every scenario and append the raw responses to a JSONL file"""
+    from .billing_calculator import fetch_billing_data_async
+
+    recorded = 0
+    with open(path, "a", encoding="utf-8") as f:
+        for params in grid:
+            data = await fetch_billing_data_async(params)
+            if data is None:
+                continue
+            f.write(json.dumps({"params": params._asdict(), "response": data}) + "\n")
+            recorded += 1
+    return recorded
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Record API responses or calibrate the local engine against them"""
+    parser = argparse.ArgumentParser(description="Useme local billing engine calibration")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="record API responses to a JSONL file")
+    record_parser.add_argument("path")
+    calibrate_parser = commands.add_parser("calibrate", help="compare engine with recordings")
+    calibrate_parser.add_argument("path")
+    calibrate_parser.add_argument("--tolerance", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        recorded = asyncio.run(record(args.path, default_calibration_grid()))
+        print(f"Recorded {recorded} responses to {args.path}")
+        return
+
+    with open(args.path, encoding="utf-8") as f:
+        recordings = [json.loads(line) for line in f if line.strip()]
+    report = calibrate(recordings, tolerance=args.tolerance)
+    modelled = [row for row in report if row["modelled"]]
+    failures = [row for row in modelled if row["mismatches"]]
+    for row in failures:
+        print(json.dumps(row))
+    print(
+        f"{len(modelled) - len(failures)}/{len(modelled)} modelled recordings match the "
+        f"local engine ({len(report) - len(modelled)} not modelled)"
+    )
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel
+from .cache_store import cache_store, error_level
+from .http_client import HttpResponse
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL
+
+    When ``kind`` is given and the disk store is enabled (``USEME_CACHE_PATH``),
+    entries are also written through to it with ``dump`` and memory misses are
+    looked up there and decoded with ``load``, so the cache survives restarts.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        kind: Optional[str] = None,
+        dump: Optional[Callable[[V], Any]] = None,
+        load: Optional[Callable[[Any], V]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.kind = kind
+        self.dump = dump
+        self.load = load
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def persistent(self) -> bool:
+        return cache_store is not None and self.kind is not None
+
+    @staticmethod
+    def _store_key(key: Hashable) -> str:
+        return key if isinstance(key, str) else json.dumps(key, separators=(",", ":"))
+
+    def _remember(self, key: Hashable, value: V, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _load_persisted(self, key: Hashable) -> Optional[V]:
+        """Look a key up in the disk store and promote it to memory"""
+        if not self.persistent:
+            return None
+        try:
+            found = cache_store.get(self.kind, self._store_key(key))
+            if found is None:
+                return None
+            payload, expires_at = found
+            with metrics.timed("validate"):
+                value = self.load(payload) if self.load else payload
+        except (sqlite3.Error, ValueError) as e:
+            logger.log(error_level(e), "Error reading %s from disk cache: %s", self.kind, e)
+            return None
+        if self.maxsize > 0:
+            self._remember(key, value, expires_at - time.time())
+        return value
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the cached value, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._load_persisted(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries when full"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        if self.maxsize > 0:
+            self._remember(key, value, ttl)
+        if self.persistent:
+            try:
+                payload = self.dump(value) if self.dump else value
+                cache_store.set(self.kind, self._store_key(key), payload, ttl)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.log(error_level(e), "Error writing %s to disk cache: %s", self.kind, e)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry (from the disk store as well)"""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.persistent:
+            try:
+                cache_store.delete(self.kind, self._store_key(key))
+            except sqlite3.Error as e:
+                logger.log(error_level(e), "Error deleting %s from disk cache: %s", self.kind, e)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "persistent": self.persistent,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+# Attributes that change on every request and would defeat content hashing
+VOLATILE_CONTENT = re.compile(
+    rb'nonce="[^"]*"'
+    rb'|name="csrfmiddlewaretoken" value="[^"]*"'
+    rb"|csrf[-_]?token[\"']?\s*[:=]\s*[\"'][^\"']*[\"']",
+    re.IGNORECASE,
+)
+
+
+def content_hash(content: bytes) -> str:
+    """Hash of a response body with per-request tokens stripped"""
+    return hashlib.sha256(VOLATILE_CONTENT.sub(b"", content)).hexdigest()
+
+
+@dataclass
+class CachedDocument(Generic[V]):
+    """Parsed document together with the validators of the response it came from"""
+
+    value: V
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+
+class DocumentCache(TTLCache[CachedDocument]):
+    """Cache of parsed pages that revalidates them with conditional requests
+
+    Entries store the ETag / Last-Modified validators returned by the server and
+    a hash of the body. A ``304 Not Modified`` answer or an unchanged body hash
+    means the cached parsed value can be returned without parsing the page again.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        kind: Optional[str] = None,
+        model: Optional[Type[BaseModel]] = None,
+    ):
+        super().__init__(maxsize, ttl, kind, dump=self._dump_document, load=self._load_document)
+        self.model = model
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+
+    @staticmethod
+    def _dump_document(entry: CachedDocument) -> Dict[str, Any]:
+        # Only fields set during parsing, so "before" validators run exactly as they did
+        return {
+            "value": entry.value.model_dump(mode="json", exclude_unset=True),
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "content_hash": entry.content_hash,
+        }
+
+    def _load_document(self, payload: Dict[str, Any]) -> CachedDocument:
+        return CachedDocument(
+            value=self.model.model_validate(payload["value"]),
+            etag=payload.get("etag"),
+            last_modified=payload.get("last_modified"),
+            content_hash=payload.get("content_hash"),
+        )
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CachedDocument]) -> Optional[Dict[str, str]]:
+        """Request headers that let the server answer 304 for an unchanged page"""
+        if entry is None:
+            return None
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers or None
+
+    def revalidate(self, entry: Optional[CachedDocument], response: HttpResponse) -> Optional[V]:
+        """Return the cached value when the response shows the page has not changed"""
+        if entry is None:
+            return None
+        if response.status_code == 304:
+            with self._lock:
+                self.not_modified += 1
+            return entry.value
+        if (
+            response.status_code == 200
+            and entry.content_hash is not None
+            and entry.content_hash == content_hash(response.content)
+        ):
+            with self._lock:
+                self.unchanged += 1
+            return entry.value
+        with self._lock:
+            self.changed += 1
+        return None
+
+    def store(self, key: Hashable, response: HttpResponse, value: V) -> None:
+        """Remember a freshly parsed value with the validators of its response"""
+        self.set(
+            key,
+            CachedDocument(
+                value=value,
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+                content_hash=content_hash(response.content),
+            ),
+        )
+
+    def stats(self) -> Dict[str, float]:
+        stats = super().stats()
+        with self._lock:
+            stats.update(
+                not_modified=self.not_modified, unchanged=self.unchanged, changed=self.changed
+            )
+        return stats
@@ -0,0 +1,202 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from .metrics import metrics
+from ..settings import CACHE_PATH, CACHE_MAX_BYTES
+
+# How many writes happen between two size/expiry sweeps
+SWEEP_INTERVAL = 200
+
+# Seconds a call waits for another process's write lock. The server queries the
+# store from the event loop, so a locked database fails fast with "database is
+# locked" and callers treat it as a miss or a skipped write; the command-line
+# tool runs on its own and can afford to wait.
+BUSY_TIMEOUT = 0.05
+CLI_BUSY_TIMEOUT = 10.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+"""
+
+
+class CacheStore:
+    """SQLite-backed cache shared by server processes and kept across restarts
+
+    Values are stored as JSON under a ``(kind, key)`` pair with an absolute expiry
+    time. The database runs in WAL mode so several server processes can read and
+    write it at once; every ``SWEEP_INTERVAL`` writes expired rows are removed and
+    the oldest-expiring rows are evicted until the payload fits in ``max_bytes``.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int = CACHE_MAX_BYTES, busy_timeout: float = BUSY_TIMEOUT
+    ):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections cannot be shared across threads)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, kind: str, key: str) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, expires_at)`` for a fresh entry, or None"""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value, expires_at FROM entries "
+                "WHERE kind = ? AND key = ? AND expires_at > ?",
+                (kind, key, time.time()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, kind: str, key: str, value: Any, ttl: float) -> None:
+        """Store a JSON-serialisable value for ``ttl`` seconds"""
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (kind, key, value, stored_at, expires_at, size) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, key, payload, now, now + ttl, len(payload)),
+        )
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % SWEEP_INTERVAL == 0
+        if sweep:
+            self.sweep()
+
+    def delete(self, kind: str, key: str) -> None:
+        """Delete a single entry"""
+        self._connect().execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+
+    def sweep(self) -> int:
+        """Delete expired entries and evict until the store fits in max_bytes"""
+        conn = self._connect()
+        removed = conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if self.max_bytes > 0 and total > self.max_bytes:
+            # Evict the entries that would expire soonest until under the limit
+            excess = total - self.max_bytes
+            rows = conn.execute("SELECT kind, key, size FROM entries ORDER BY expires_at")
+            victims = []
+            for kind, key, size in rows:
+                if excess <= 0:
+                    break
+                victims.append((kind, key))
+                excess -= size
+            conn.executemany("DELETE FROM entries WHERE kind = ? AND key = ?", victims)
+            removed += len(victims)
+        if removed:
+            conn.execute("PRAGMA incremental_vacuum")
+        return removed
+
+    def purge(self, kind: Optional[str] = None, expired_only: bool = False) -> int:
+        """Delete entries, optionally only of one kind and/or only expired ones"""
+        query = "DELETE FROM entries WHERE 1 = 1"
+        params: list = []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if expired_only:
+            query += " AND expires_at <= ?"
+            params.append(time.time())
+        conn = self._connect()
+        removed = conn.execute(query, params).rowcount
+        conn.execute("PRAGMA incremental_vacuum")
+        return removed
+
+    def vacuum(self) -> None:
+        """Rebuild the database file to reclaim all free space"""
+        self._connect().execute("VACUUM")
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts and payload sizes per kind"""
+        now = time.time()
+        conn = self._connect()
+        kinds = {}
+        for kind, count, size, expired in conn.execute(
+            "SELECT kind, COUNT(*), SUM(size), SUM(expires_at <= ?) FROM entries GROUP BY kind",
+            (now,),
+        ):
+            kinds[kind] = {"entries": count, "bytes": size, "expired": expired}
+        return {
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "file_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "kinds": kinds,
+        }
+
+
+cache_store: Optional[CacheStore] = CacheStore(CACHE_PATH) if CACHE_PATH else None
+
+
+def error_level(error: Exception) -> int:
+    """Log level for a failed store call: a locked database is an expected miss"""
+    if isinstance(error, sqlite3.OperationalError) and "locked" in str(error):
+        metrics.count("disk_cache_busy")
+        return logging.DEBUG
+    return logging.WARNING
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Inspect or purge the persistent cache: python -m useme_mcp.services.cache_store"""
+    parser = argparse.ArgumentParser(description="Inspect and purge the Useme MCP disk cache")
+    parser.add_argument("--path", default=CACHE_PATH, help="cache database (USEME_CACHE_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="show entry counts and sizes per kind")
+    purge = commands.add_parser("purge", help="delete cached entries")
+    purge.add_argument("--kind", help="only purge entries of this kind")
+    purge.add_argument("--expired", action="store_true", help="only purge expired entries")
+    commands.add_parser("sweep", help="drop expired entries and enforce the size limit")
+    commands.add_parser("vacuum", help="compact the database file")
+    args = parser.parse_args(argv)
+
+    if not args.path:
+        parser.error("no cache path given (use --path or set USEME_CACHE_PATH)")
+    store = CacheStore(args.path, busy_timeout=CLI_BUSY_TIMEOUT)
+
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == "purge":
+        print(f"Removed {store.purge(args.kind, args.expired)} entries")
+    elif args.command == "sweep":
+        print(f"Removed {store.sweep()} entries")
+    elif args.command == "vacuum":
+        store.vacuum()
+        print(f"Vacuumed {store.path}")
+
+
+if __name__ == "__main__":
+    main()
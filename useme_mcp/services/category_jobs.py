@@ -1,57 +1,121 @@
-import cloudscraper
-import bs4
+import logging
 from typing import List, Optional
-from .job_scraper import parse_jobs_from_html
+from . import retry
+from .http_client import run_sync
+from .html_parsing import parse_container
+from .job_store import job_store
+from .metrics import metrics
+from .job_scraper import (
+    parse_jobs_from_html,
+    JOBS_CONTAINER,
+    fetch_pages_concurrently,
+    listing_cache,
+    listing_cache_ttl,
+    listing_flights,
+)
 from .category_service import get_category_by_id
+from ..settings import BASE_URL
 from ..models import JobOffer
 
+logger = logging.getLogger(__name__)
 
-def fetch_category_jobs_page(
-    category_id: int, page: int = 1, lang: str = "en", order_by: Optional[str] = None
+
+async def fetch_category_jobs_page_async(
+    category_id: int,
+    page: int = 1,
+    lang: str = "en",
+    order_by: Optional[str] = None,
+    use_cache: bool = True,
 ) -> List[JobOffer]:
     """Fetch jobs from a specific category page"""
+    cache_key = (lang, page, order_by or "", category_id)
+    if use_cache:
+        cached = listing_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
     category = get_category_by_id(category_id, lang)
     if not category:
-        print(f"Category {category_id} not found for language {lang}")
+        logger.warning("Category %s not found for language %s", category_id, lang)
         return []
 
-    scraper = cloudscraper.create_scraper()
-
     # Build URL with optional ordering
-    url = f"https://useme.com/{lang}/jobs/category/{category.slug},{category_id}/?page={page}"
+    url = f"{BASE_URL}/{lang}/jobs/category/{category.slug},{category_id}/?page={page}"
     if order_by:
         url += f"&order_by={order_by}"
+    return await listing_flights.run(
+        cache_key, lambda: _fetch_category_jobs_page(cache_key, url, page, order_by), share=list
+    )
 
-    print(f"Fetching category jobs page {page} from {url}")
-    response = scraper.get(url)
 
-    # Extract HTML from <div class="jobs">
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
-    jobs_div = soup.find("div", class_="jobs")
+async def _fetch_category_jobs_page(
+    cache_key: tuple, url: str, page: int, order_by: Optional[str]
+) -> List[JobOffer]:
+    logger.debug("Fetching category jobs page %s", page, extra={"url": url})
+    response = await retry.get("listing", url)
+    if response.status_code == 404 and page > 1:
+        logger.info("Category page %s not found, end of listing", page, extra={"url": url})
+        return []
+    response.raise_for_status()
+
+    # Parse only <div class="jobs"> out of the page
+    with metrics.timed("parse"):
+        jobs_div = parse_container(response.content, *JOBS_CONTAINER, response.encoding)
 
     if not jobs_div:
-        print(f"No jobs found on category page {page}")
+        logger.info("No jobs found on category page %s", page, extra={"url": url})
         return []
 
-    return parse_jobs_from_html(str(jobs_div))
+    with metrics.timed("extract"):
+        jobs = parse_jobs_from_html(jobs_div)
+    if jobs:
+        listing_cache.set(cache_key, jobs, listing_cache_ttl(order_by))
+        if job_store is not None:
+            job_store.add_listing(jobs)
+    return list(jobs)
 
 
-def fetch_category_jobs_multiple_pages(
+def fetch_category_jobs_page(
+    category_id: int,
+    page: int = 1,
+    lang: str = "en",
+    order_by: Optional[str] = None,
+    use_cache: bool = True,
+) -> List[JobOffer]:
+    """Fetch jobs from a specific category page"""
+    return run_sync(fetch_category_jobs_page_async(category_id, page, lang, order_by, use_cache))
+
+
+async def fetch_category_jobs_multiple_pages_async(
     category_id: int,
     start_page: int = 1,
     num_pages: int = 3,
     lang: str = "en",
     order_by: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
 ) -> List[JobOffer]:
     """Fetch jobs from multiple pages of a specific category"""
-    all_jobs = []
+    pages = await fetch_pages_concurrently(
+        lambda page: fetch_category_jobs_page_async(category_id, page, lang, order_by, use_cache),
+        range(start_page, start_page + num_pages),
+        max_workers,
+    )
+    return [job for page_jobs in pages for job in page_jobs]
 
-    for page in range(start_page, start_page + num_pages):
-        page_jobs = fetch_category_jobs_page(category_id, page, lang, order_by)
-        if not page_jobs:  # Stop if no jobs found
-            print(f"No more jobs found at category page {page}, stopping...")
-            break
-        all_jobs.extend(page_jobs)
-        print(f"Found {len(page_jobs)} jobs on category page {page}")
 
-    return all_jobs
+def fetch_category_jobs_multiple_pages(
+    category_id: int,
+    start_page: int = 1,
+    num_pages: int = 3,
+    lang: str = "en",
+    order_by: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[JobOffer]:
+    """Fetch jobs from multiple pages of a specific category"""
+    return run_sync(
+        fetch_category_jobs_multiple_pages_async(
+            category_id, start_page, num_pages, lang, order_by, max_workers, use_cache
+        )
+    )
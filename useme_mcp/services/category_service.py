@@ -1,8 +1,11 @@
 import json
+import logging
 from typing import Optional, List
 from pathlib import Path
 from ..models import Category
 
+logger = logging.getLogger(__name__)
+
 
 def load_categories(lang: Optional[str] = None) -> List[Category]:
     """Load categories from static JSON file, optionally filtered by language"""
@@ -18,7 +21,7 @@ def load_categories(lang: Optional[str] = None) -> List[Category]:
 
         return categories
     except FileNotFoundError:
-        print("categories.json not found.")
+        logger.warning("categories.json not found.")
         return []
 
 
@@ -0,0 +1,433 @@
+import asyncio
+import concurrent.futures
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .http_client import RequestCount, request_count, run_in_background
+from .job_fields import expiry_time, parse_days_left
+from .metrics import metrics
+from .category_service import load_categories
+from .category_jobs import fetch_category_jobs_page_async
+from .job_scraper import (
+    competition_cache,
+    extract_job_id_from_url,
+    fetch_job_competition_async,
+    fetch_job_details_async,
+    fetch_jobs_page_async,
+)
+from ..settings import (
+    CRAWLER_BUDGET,
+    CRAWLER_LANGUAGE,
+    CRAWLER_CATEGORIES,
+    CRAWLER_PAGES,
+    CRAWLER_LISTING_INTERVAL,
+    CRAWLER_JOB_INTERVAL,
+)
+from ..models import JobOffer
+
+logger = logging.getLogger(__name__)
+
+# Tasks running at the same time; the budget and the per-host limiter pace them further
+CRAWLER_CONCURRENCY = 4
+
+# No task is refreshed more often than this (seconds), however volatile
+MIN_INTERVAL = 60.0
+
+# Jobs not seen in a crawled listing for this long (seconds) are no longer refreshed
+FORGET_AFTER = 86400.0
+
+# A job whose detail page failed this many times in a row is dropped
+MAX_JOB_FAILURES = 3
+
+# Weight of the newest observation in the offers-per-hour average
+OFFER_RATE_WEIGHT = 0.5
+
+# (kind, language, category ID or None, page) for listings, (kind, job URL) for jobs
+TaskKey = Tuple[Any, ...]
+
+
+class RequestBudget:
+    """Token bucket of outbound crawler requests per minute
+
+    Tasks take their estimated cost up front; the requests they really sent
+    (retries, hedges and challenge solves included) beyond the estimate are
+    charged afterwards and may leave the bucket in debt, which delays the next
+    tasks accordingly.
+    """
+
+    def __init__(self, per_minute: int = CRAWLER_BUDGET):
+        self.per_minute = max(1, per_minute)
+        self.tokens = float(self.per_minute)
+        self._updated = time.monotonic()
+        self.spent = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.per_minute, self.tokens + (now - self._updated) * self.per_minute / 60
+        )
+        self._updated = now
+
+    async def acquire(self, cost: int) -> None:
+        cost = min(cost, self.per_minute)
+        while True:
+            self._refill()
+            if self.tokens >= cost:
+                break
+            await asyncio.sleep((cost - self.tokens) * 60 / self.per_minute)
+        self.tokens -= cost
+        self.spent += cost
+
+    def charge(self, cost: int) -> None:
+        self._refill()
+        self.tokens -= cost
+        self.spent += cost
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+
+class JobVolatility:
+    """How fast one job is changing, from the offers counts and expiry seen so far"""
+
+    def __init__(self):
+        self.offers_count: Optional[int] = None
+        self.offers_per_hour = 0.0
+        self.observed_at = 0.0
+        self.expires_at: Optional[float] = None
+        self.last_listed = 0.0
+        self.competition_offers: Optional[int] = None  # offers count of the last snapshot
+        self.competition_pages = 1
+        self.failures = 0
+
+    def observe(self, offers_count: int, days_left: Optional[int], now: float) -> None:
+        if self.offers_count is not None and now > self.observed_at:
+            hours = (now - self.observed_at) / 3600
+            rate = max(0, offers_count - self.offers_count) / hours
+            self.offers_per_hour += OFFER_RATE_WEIGHT * (rate - self.offers_per_hour)
+        self.offers_count = offers_count
+        self.observed_at = now
+        if days_left is not None:
+            self.expires_at = expiry_time(days_left, now)
+
+    def interval(self, base: float, now: float) -> float:
+        """Refresh interval: shorter for jobs drawing offers fast or about to expire"""
+        interval = base / (1 + self.offers_per_hour)
+        if self.expires_at is not None:
+            interval = min(interval, (self.expires_at - now) / 4)
+        return max(MIN_INTERVAL, interval)
+
+    def needs_competition(self) -> bool:
+        return bool(self.offers_count) and self.offers_count != self.competition_offers
+
+
+@dataclass
+class CrawlTask:
+    key: TaskKey
+    interval: float
+    due: float
+    running: bool = False
+    runs: int = 0
+    failures: int = 0
+
+    @property
+    def kind(self) -> str:
+        return self.key[0]
+
+
+class Crawler:
+    """Background refresh of listings, job details and competition
+
+    Listing pages (the main listing and the configured categories, first
+    ``pages`` pages each) are re-fetched every ``listing_interval`` seconds,
+    deeper pages less often. Every job seen in them becomes a task that
+    refreshes its detail page, and its competition when the offers count
+    changed. Job tasks are due again after ``job_interval`` divided by
+    (1 + offers per hour), and at most a quarter of the time left before the
+    job expires. Tasks run in due order within a global budget of requests
+    per minute; fetches go through the normal caches, so tool calls find
+    them warm.
+    """
+
+    def __init__(
+        self,
+        budget: int = CRAWLER_BUDGET,
+        lang: str = CRAWLER_LANGUAGE,
+        categories: str = CRAWLER_CATEGORIES,
+        pages: int = CRAWLER_PAGES,
+        listing_interval: float = CRAWLER_LISTING_INTERVAL,
+        job_interval: float = CRAWLER_JOB_INTERVAL,
+    ):
+        self.budget = RequestBudget(budget)
+        self.lang = lang
+        self.categories = categories
+        self.pages = max(1, pages)
+        self.listing_interval = max(MIN_INTERVAL, listing_interval)
+        self.job_interval = max(MIN_INTERVAL, job_interval)
+        self._tasks: Dict[TaskKey, CrawlTask] = {}
+        self._jobs: Dict[str, JobVolatility] = {}
+        self._queue: List[Tuple[float, int, TaskKey]] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._future: Optional[concurrent.futures.Future] = None
+        self._started_at: Optional[float] = None
+        self.completed = 0
+        self.failed = 0
+
+    def category_ids(self) -> List[Optional[int]]:
+        """None (the main listing) followed by the configured category IDs"""
+        if self.categories.lower() == "all":
+            return [None] + [category.category_id for category in load_categories(self.lang)]
+        ids: List[Optional[int]] = [None]
+        for value in self.categories.split(","):
+            if value.strip():
+                try:
+                    ids.append(int(value))
+                except ValueError:
+                    logger.warning("Ignoring crawler category %r: not a category ID", value)
+        return ids
+
+    def _schedule(self, task: CrawlTask, due: float) -> None:
+        """Queue ``task`` at ``due``; caller holds the lock"""
+        task.due = due
+        self._sequence += 1
+        heapq.heappush(self._queue, (due, self._sequence, task.key))
+
+    def _add_task(self, key: TaskKey, interval: float, due: float) -> None:
+        with self._lock:
+            if key not in self._tasks:
+                self._tasks[key] = task = CrawlTask(key, interval, due)
+                self._schedule(task, due)
+
+    def _observe(self, job: JobOffer, now: float) -> None:
+        """Update a listed job's volatility and bring its refresh forward if needed"""
+        with self._lock:
+            volatility = self._jobs.get(job.url)
+            if volatility is None:
+                volatility = self._jobs[job.url] = JobVolatility()
+            volatility.observe(job.offers_count, job.days_left, now)
+            volatility.last_listed = now
+            interval = volatility.interval(self.job_interval, now)
+            task = self._tasks.get(("job", job.url))
+            if task is None:
+                self._tasks[("job", job.url)] = task = CrawlTask(("job", job.url), interval, now)
+                self._schedule(task, now)
+            else:
+                task.interval = interval
+                if not task.running and task.due > now + interval:
+                    self._schedule(task, now + interval)
+
+    def _forget(self, key: TaskKey) -> None:
+        with self._lock:
+            self._tasks.pop(key, None)
+            if key[0] == "job":
+                self._jobs.pop(key[1], None)
+
+    async def _next_task(self) -> CrawlTask:
+        """Wait for the earliest due task and mark it running"""
+        while True:
+            with self._lock:
+                now = time.time()
+                while self._queue:
+                    due, _, key = self._queue[0]
+                    task = self._tasks.get(key)
+                    if task is None or task.running or task.due != due:
+                        heapq.heappop(self._queue)  # superseded entry
+                        continue
+                    if due <= now:
+                        heapq.heappop(self._queue)
+                        task.running = True
+                        return task
+                    break
+                wait = self._queue[0][0] - now if self._queue else 1.0
+            await asyncio.sleep(min(wait, 1.0))
+
+    def _cost(self, task: CrawlTask) -> int:
+        if task.kind == "listing":
+            return 1
+        volatility = self._jobs.get(task.key[1])
+        if volatility is not None and volatility.needs_competition():
+            return 1 + volatility.competition_pages
+        return 1
+
+    async def _refresh_listing(self, key: TaskKey) -> bool:
+        _, lang, category_id, page = key
+        if category_id is None:
+            jobs = await fetch_jobs_page_async(page, lang, use_cache=False)
+        else:
+            jobs = await fetch_category_jobs_page_async(category_id, page, lang, use_cache=False)
+        now = time.time()
+        for job in jobs:
+            self._observe(job, now)
+        return True
+
+    async def _refresh_job(self, job_url: str) -> bool:
+        volatility = self._jobs.get(job_url)
+        now = time.time()
+        if (
+            volatility is None
+            or volatility.last_listed < now - FORGET_AFTER
+            or (volatility.expires_at is not None and volatility.expires_at < now)
+        ):
+            self._forget(("job", job_url))
+            return True
+
+        detail = await fetch_job_details_async(job_url)
+        if detail is None:
+            volatility.failures += 1
+            if volatility.failures >= MAX_JOB_FAILURES:
+                logger.info("Crawler dropping job after %d failures", volatility.failures)
+                self._forget(("job", job_url))
+            return False
+        volatility.failures = 0
+        with self._lock:
+            volatility.observe(detail.offers_count, parse_days_left(detail.valid_for), time.time())
+
+        if volatility.needs_competition():
+            job_id = extract_job_id_from_url(job_url)
+            competition_cache.invalidate((job_id, "pl" if "/pl/" in job_url else "en"))
+            competition = await fetch_job_competition_async(job_url)
+            if competition is None or competition.failed_pages or not competition.total_pages:
+                return False
+            volatility.competition_pages = competition.total_pages
+            volatility.competition_offers = volatility.offers_count
+        return True
+
+    async def _run_task(self, task: CrawlTask, cost: int) -> None:
+        counter = RequestCount()
+        request_count.set(counter)  # the task runs in its own copy of the context
+        try:
+            if task.kind == "listing":
+                ok = await self._refresh_listing(task.key)
+            else:
+                ok = await self._refresh_job(task.key[1])
+        except Exception as e:
+            ok = False
+            logger.warning("Crawler %s refresh failed: %s", task.kind, e)
+        if counter.value > cost:
+            self.budget.charge(counter.value - cost)
+        with self._lock:
+            task.running = False
+            task.runs += 1
+            if ok:
+                self.completed += 1
+                task.failures = 0
+            else:
+                self.failed += 1
+                task.failures += 1
+            if self._tasks.get(task.key) is task:
+                volatility = self._jobs.get(task.key[1]) if task.kind == "job" else None
+                if volatility is not None:
+                    task.interval = volatility.interval(self.job_interval, time.time())
+                # Failing tasks back off, up to eight intervals
+                interval = task.interval * min(2**task.failures, 8)
+                self._schedule(task, time.time() + interval)
+        metrics.count("crawler_tasks", kind=task.kind, outcome="ok" if ok else "failed")
+
+    async def run(self) -> None:
+        """Crawl until cancelled"""
+        now = time.time()
+        for category_id in self.category_ids():
+            for page in range(1, self.pages + 1):
+                # Deeper pages change more slowly
+                interval = self.listing_interval * page
+                self._add_task(("listing", self.lang, category_id, page), interval, now)
+
+        semaphore = asyncio.Semaphore(CRAWLER_CONCURRENCY)
+        running: Set[asyncio.Task] = set()
+        try:
+            while True:
+                await semaphore.acquire()
+                task = await self._next_task()
+                cost = self._cost(task)
+                await self.budget.acquire(cost)
+                worker = asyncio.create_task(self._run_task(task, cost))
+                running.add(worker)
+                worker.add_done_callback(running.discard)
+                worker.add_done_callback(lambda _: semaphore.release())
+        finally:
+            for worker in running:
+                worker.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    def start(self) -> None:
+        """Run the crawler on the background event loop of the sync facade"""
+        if self._future is not None and not self._future.done():
+            return
+        self._started_at = time.time()
+        self._future = run_in_background(self.run())
+        self._future.add_done_callback(self._stopped)
+        logger.info(
+            "Crawler started: %d listings, %d requests per minute",
+            len(self.category_ids()) * self.pages,
+            self.budget.per_minute,
+        )
+
+    def _stopped(self, future: concurrent.futures.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Crawler stopped: %s", future.exception())
+
+    def stop(self) -> None:
+        if self._future is not None:
+            self._future.cancel()
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def _queue_stats(self) -> Dict[str, Dict[str, float]]:
+        """Tasks, due tasks and the lag of the most overdue task per kind"""
+        now = time.time()
+        stats = {kind: {"tasks": 0, "due": 0, "lag_seconds": 0.0} for kind in ("listing", "job")}
+        with self._lock:
+            tasks = list(self._tasks.values())
+        for task in tasks:
+            row = stats[task.kind]
+            row["tasks"] += 1
+            if not task.running and task.due <= now:
+                row["due"] += 1
+                row["lag_seconds"] = max(row["lag_seconds"], round(now - task.due, 1))
+        return stats
+
+    def status(self) -> Dict[str, Any]:
+        queues = self._queue_stats()
+        with self._lock:
+            in_progress = sum(task.running for task in self._tasks.values())
+            volatile = sorted(
+                self._jobs.items(), key=lambda item: item[1].offers_per_hour, reverse=True
+            )[:5]
+        return {
+            "running": self.running,
+            "started_at": self._started_at,
+            "budget_per_minute": self.budget.per_minute,
+            "budget_available": round(self.budget.available(), 1),
+            "requests_spent": self.budget.spent,
+            "queue_depth": sum(row["due"] for row in queues.values()),
+            "lag_seconds": max(row["lag_seconds"] for row in queues.values()),
+            "in_progress": in_progress,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queues": queues,
+            "most_volatile_jobs": [
+                {"url": url, "offers_per_hour": round(volatility.offers_per_hour, 2)}
+                for url, volatility in volatile
+                if volatility.offers_per_hour > 0
+            ],
+        }
+
+    def gauges(self) -> Dict[str, Dict[str, float]]:
+        """Queue depth and lag per task kind exported as metric gauges"""
+        if not self.running:
+            return {}
+        queues = self._queue_stats()
+        return {
+            "crawler_queue_depth": {kind: row["due"] for kind, row in queues.items()},
+            "crawler_lag_seconds": {kind: row["lag_seconds"] for kind, row in queues.items()},
+        }
+
+
+crawler = Crawler()
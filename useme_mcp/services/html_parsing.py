@@ -0,0 +1,67 @@
+import bs4
+import logging
+from bs4.builder import builder_registry
+from typing import Dict, List, Optional, Union
+from ..settings import HTML_PARSER
+
+logger = logging.getLogger(__name__)
+
+# Parse functions accept raw markup (str or undecoded bytes) or an already-parsed node
+HtmlSource = Union[str, bytes, bs4.Tag]
+
+# Tree builders in order of preference; html.parser ships with Python and is the fallback
+PARSER_BACKENDS = ("lxml", "html.parser")
+
+
+def available_backends() -> List[str]:
+    """Parser backends whose libraries are installed"""
+    return [name for name in PARSER_BACKENDS if builder_registry.lookup(name) is not None]
+
+
+def select_backend(preferred: str = HTML_PARSER) -> str:
+    """Resolve the configured parser backend, falling back to html.parser"""
+    available = available_backends()
+    if preferred == "auto":
+        return available[0]
+    if preferred in available:
+        return preferred
+    logger.warning("HTML parser backend %r is not available, using html.parser", preferred)
+    return "html.parser"
+
+
+# Chosen once at startup; every parse_* function builds its trees with this backend
+parser_backend = select_backend()
+
+
+def parse_html(
+    source: HtmlSource, encoding: Optional[str] = None, backend: Optional[str] = None
+) -> bs4.Tag:
+    """Return a parsed tree for the source, parsing it only when it is not parsed yet"""
+    if isinstance(source, bs4.Tag):
+        return source
+    backend = backend or parser_backend
+    if isinstance(source, bytes):
+        return bs4.BeautifulSoup(source, backend, from_encoding=encoding)
+    return bs4.BeautifulSoup(source, backend)
+
+
+def parse_container(
+    content: Union[str, bytes],
+    name: str,
+    attrs: Dict[str, str],
+    encoding: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> Optional[bs4.Tag]:
+    """Parse only the first element matching name/attrs out of a full page
+
+    Everything outside the matching element is skipped while parsing (SoupStrainer),
+    so no tree is built for the page chrome and the container never has to be
+    serialised back to markup before the parse_* functions read it.
+    """
+    backend = backend or parser_backend
+    strainer = bs4.SoupStrainer(name, attrs)
+    if isinstance(content, bytes):
+        soup = bs4.BeautifulSoup(content, backend, parse_only=strainer, from_encoding=encoding)
+    else:
+        soup = bs4.BeautifulSoup(content, backend, parse_only=strainer)
+    return soup.find(name, attrs)
@@ -0,0 +1,248 @@
+import asyncio
+import concurrent.futures
+import httpx
+import json
+import logging
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, Dict, Optional, TypeVar
+from requests.structures import CaseInsensitiveDict
+from .http_session import session_pool, scraper_session
+from .metrics import metrics
+from .rate_limiter import THROTTLE_STATUS_CODES, parse_retry_after, rate_limiter
+from ..settings import HTTP_TRANSPORT, HTTP_TIMEOUT, POOL_SIZE, POOL_IDLE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CHALLENGE_STATUS_CODES = (403, 429, 503)
+CHALLENGE_MARKERS = (b"challenge-platform", b"cf-chl", b"Just a moment...")
+
+
+class HttpError(Exception):
+    """Raised by HttpResponse.raise_for_status for 4xx/5xx responses"""
+
+    def __init__(self, status_code: int, url: str):
+        super().__init__(f"HTTP {status_code} for url: {url}")
+        self.status_code = status_code
+        self.url = url
+
+
+@dataclass
+class HttpResponse:
+    """Transport-independent HTTP response"""
+
+    status_code: int
+    url: str
+    content: bytes
+    headers: CaseInsensitiveDict = field(default_factory=CaseInsensitiveDict)
+    challenged: bool = False  # True when a Cloudflare challenge had to be solved
+
+    @property
+    def encoding(self) -> str:
+        content_type = self.headers.get("content-type", "")
+        for param in content_type.split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "charset" and value:
+                return value.strip("\"'")
+        return "utf-8"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise HttpError(self.status_code, self.url)
+
+
+def is_challenge(status_code: int, headers: CaseInsensitiveDict, content: bytes) -> bool:
+    """Check whether a response is a Cloudflare challenge page"""
+    if status_code not in CHALLENGE_STATUS_CODES:
+        return False
+    if headers.get("cf-mitigated", "").lower() == "challenge":
+        return True
+    if not headers.get("server", "").lower().startswith("cloudflare"):
+        return False
+    return any(marker in content for marker in CHALLENGE_MARKERS)
+
+
+def _fetch_with_scraper(
+    method: str, url: str, headers: Optional[Dict[str, str]], data: Optional[str]
+) -> HttpResponse:
+    """Perform a request through a pooled cloudscraper session (solves challenges)"""
+    with scraper_session() as scraper:
+        response = scraper.request(method, url, headers=headers, data=data, timeout=HTTP_TIMEOUT)
+    return HttpResponse(
+        status_code=response.status_code,
+        url=response.url,
+        content=response.content,
+        headers=CaseInsensitiveDict(response.headers),
+    )
+
+
+# One httpx client per event loop: httpx connection pools cannot be shared across loops
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get the keep-alive httpx client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            # Share User-Agent and cookie jar with the cloudscraper pool so cookies from
+            # solved challenges are sent by the async client as well
+            seed = session_pool.seed()
+            client = httpx.AsyncClient(
+                headers=dict(seed.headers),
+                cookies=seed.cookies,
+                timeout=HTTP_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=POOL_SIZE * 4,
+                    max_keepalive_connections=POOL_SIZE * 4,
+                    keepalive_expiry=POOL_IDLE_TIMEOUT or None,
+                ),
+            )
+            _clients[loop] = client
+        return client
+
+
+class RequestCount:
+    """Outbound requests made in one context, retries and hedges included"""
+
+    def __init__(self):
+        self.value = 0
+
+
+# Set by callers that account for their own traffic (the crawler budget)
+request_count: ContextVar[Optional[RequestCount]] = ContextVar("request_count", default=None)
+
+
+async def request(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    data: Optional[str] = None,
+) -> HttpResponse:
+    """Perform an HTTP request without blocking the event loop
+
+    Requests go through a shared httpx client; when Cloudflare answers with a
+    challenge the request is repeated through a cloudscraper session in a worker
+    thread, which solves it and stores the clearance cookies in the shared jar.
+    With ``USEME_HTTP_TRANSPORT=cloudscraper`` every request uses that path.
+
+    Requests pass the shared per-host rate limiter, which backs off when a
+    response is a 429/503 or needed a challenge to be solved.
+    """
+    counter = request_count.get()
+    if counter is not None:
+        counter.value += 1
+    async with rate_limiter.limit(url) as permit:
+        started = time.perf_counter()
+        with metrics.timed("fetch"):
+            try:
+                response = await _request(method, url, headers, data)
+            except Exception as e:
+                metrics.count("http_errors")
+                logger.debug("%s failed: %s", method, e, extra={"url": url})
+                raise
+        if permit is not None:
+            if response.status_code in THROTTLE_STATUS_CODES:
+                retry_after = parse_retry_after(response.headers.get("retry-after"))
+                permit.throttle(str(response.status_code), retry_after)
+            elif response.challenged:
+                permit.throttle("challenge")
+    if counter is not None and response.challenged:
+        counter.value += 1  # the challenge was solved with a second request
+    logger.debug(
+        "%s %s",
+        method,
+        response.status_code,
+        extra={"url": url, "duration_ms": round((time.perf_counter() - started) * 1000, 1)},
+    )
+    metrics.count("http_requests", status=str(response.status_code))
+    metrics.count("http_response_bytes", len(response.content))
+    return response
+
+
+async def _request(
+    method: str, url: str, headers: Optional[Dict[str, str]], data: Optional[str]
+) -> HttpResponse:
+    if HTTP_TRANSPORT == "cloudscraper":
+        return await asyncio.to_thread(_fetch_with_scraper, method, url, headers, data)
+
+    response = await _get_client().request(method, url, headers=headers, content=data)
+    result = HttpResponse(
+        status_code=response.status_code,
+        url=str(response.url),
+        content=response.content,
+        headers=CaseInsensitiveDict(response.headers),
+    )
+    if not is_challenge(result.status_code, result.headers, result.content):
+        return result
+
+    logger.info("Cloudflare challenge, solving with cloudscraper", extra={"url": url})
+    metrics.count("challenges")
+    with metrics.timed("challenge"):
+        solved = await asyncio.to_thread(_fetch_with_scraper, method, url, headers, data)
+    solved.challenged = True
+    return solved
+
+
+async def get(url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+    """Perform a GET request"""
+    return await request("GET", url, headers=headers)
+
+
+async def post(
+    url: str, data: Optional[str] = None, headers: Optional[Dict[str, str]] = None
+) -> HttpResponse:
+    """Perform a POST request"""
+    return await request("POST", url, headers=headers, data=data)
+
+
+# Sync facade: all sync callers share one background event loop, so they also share
+# its httpx client and keep-alive connections
+_portal_loop: Optional[asyncio.AbstractEventLoop] = None
+_portal_lock = threading.Lock()
+
+
+def _get_portal_loop() -> asyncio.AbstractEventLoop:
+    global _portal_loop
+    with _portal_lock:
+        if _portal_loop is None:
+            _portal_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_portal_loop.run_forever, name="useme-sync-portal", daemon=True
+            ).start()
+        return _portal_loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion from synchronous code"""
+    loop = _get_portal_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the sync portal loop")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def run_in_background(coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future:
+    """Start a coroutine on the sync portal loop without waiting for it"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_portal_loop())
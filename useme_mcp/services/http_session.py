@@ -0,0 +1,121 @@
+import cloudscraper
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+from ..settings import POOL_SIZE, POOL_IDLE_TIMEOUT
+
+# Pin the browser profile so every pooled session presents the same
+# User-Agent / TLS fingerprint and can reuse the same challenge cookies
+BROWSER_PROFILE = {"browser": "chrome", "platform": "windows", "mobile": False}
+
+
+class SessionPool:
+    """Bounded, thread-safe pool of warm cloudscraper sessions
+
+    All sessions share one cookie jar and one set of headers with the first
+    (seed) session, so a Cloudflare challenge solved by any of them is reused
+    by the rest. Sessions keep their HTTP connections alive between calls and
+    are closed once they have been idle for longer than ``idle_timeout``.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, idle_timeout: float = POOL_IDLE_TIMEOUT):
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self._seed: Optional[cloudscraper.CloudScraper] = None
+        self._idle: List[Tuple[cloudscraper.CloudScraper, float]] = []
+        self._in_use = 0
+        self._created = 0
+        self._reused = 0
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+
+    def _new_session(self) -> cloudscraper.CloudScraper:
+        """Create a session sharing cookies, headers and cipher suite with the seed"""
+        if self._seed is None:
+            self._seed = cloudscraper.create_scraper(browser=BROWSER_PROFILE)
+            session = self._seed
+        else:
+            session = cloudscraper.create_scraper(
+                sess=self._seed,
+                browser=BROWSER_PROFILE,
+                cipherSuite=self._seed.cipherSuite,
+            )
+        self._created += 1
+        return session
+
+    def _evict_idle(self, now: float) -> None:
+        """Close sessions that have been idle for longer than idle_timeout"""
+        if self.idle_timeout <= 0:
+            return
+        fresh = []
+        for session, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                session.close()
+            else:
+                fresh.append((session, last_used))
+        self._idle = fresh
+
+    def seed(self) -> cloudscraper.CloudScraper:
+        """Session whose headers and cookie jar are shared by every pooled session"""
+        with self._lock:
+            if self._seed is None:
+                self._seed = cloudscraper.create_scraper(browser=BROWSER_PROFILE)
+            return self._seed
+
+    def acquire(self) -> cloudscraper.CloudScraper:
+        """Take a session from the pool, blocking while all sessions are busy"""
+        with self._released:
+            while True:
+                self._evict_idle(time.monotonic())
+                if self._idle:
+                    # Most recently used first - its connections are the warmest
+                    session, _ = self._idle.pop()
+                    self._in_use += 1
+                    self._reused += 1
+                    return session
+                if self._in_use < self.size:
+                    session = self._new_session()
+                    self._in_use += 1
+                    return session
+                self._released.wait()
+
+    def release(self, session: cloudscraper.CloudScraper) -> None:
+        """Return a session to the pool"""
+        with self._released:
+            self._in_use -= 1
+            self._idle.append((session, time.monotonic()))
+            self._released.notify()
+
+    def close(self) -> None:
+        """Close all idle sessions and forget the shared challenge cookies"""
+        with self._released:
+            for session, _ in self._idle:
+                session.close()
+            self._idle = []
+            self._seed = None
+
+    def stats(self) -> dict:
+        """Current pool usage counters"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle_timeout": self.idle_timeout,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "created": self._created,
+                "reused": self._reused,
+            }
+
+
+session_pool = SessionPool()
+
+
+@contextmanager
+def scraper_session() -> Iterator[cloudscraper.CloudScraper]:
+    """Borrow a warm session from the shared pool for the duration of a request"""
+    session = session_pool.acquire()
+    try:
+        yield session
+    finally:
+        session_pool.release(session)
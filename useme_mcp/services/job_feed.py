@@ -0,0 +1,214 @@
+import logging
+import sqlite3
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from .http_client import run_sync
+from .cache_store import cache_store, error_level
+from .category_jobs import fetch_category_jobs_page_async
+from .job_scraper import extract_job_id_from_url, fetch_jobs_page_async
+from .single_flight import SingleFlight, copy_model
+from ..settings import FEED_MAX_PAGES, FEED_SEEN_IDS
+from ..models import JobOffer, NewJobsFeed
+
+logger = logging.getLogger(__name__)
+
+FEED_ORDER = "-published_on"
+
+# Watermarks outlive the caches in the persistent store
+WATERMARK_TTL = 30 * 86400
+
+FeedKey = Tuple[str, Optional[int]]
+
+
+def job_id_of(job: JobOffer) -> Optional[int]:
+    """Numeric job ID from the ``,<id>/`` suffix of the job URL"""
+    job_id = extract_job_id_from_url(job.url)
+    return int(job_id) if job_id else None
+
+
+def page_ids(jobs: List[JobOffer]) -> List[int]:
+    return [job_id for job_id in map(job_id_of, jobs) if job_id is not None]
+
+
+class FeedWatermark:
+    """Job IDs a feed has already returned
+
+    Remembers the most recent ``size`` IDs. IDs lower than every remembered
+    one count as known as well, so jobs that fell out of the window, or that
+    slid onto the page because a newer job was closed, are not reported again.
+    """
+
+    def __init__(self, seen: Iterable[int] = (), size: int = FEED_SEEN_IDS):
+        self._order: Deque[int] = deque(maxlen=max(1, size))
+        self._seen: Set[int] = set()
+        self.add(seen)
+
+    @property
+    def highest_id(self) -> Optional[int]:
+        return max(self._seen) if self._seen else None
+
+    def is_known(self, job_id: int) -> bool:
+        if job_id in self._seen:
+            return True
+        return bool(self._seen) and job_id < min(self._seen)
+
+    def add(self, job_ids: Iterable[int]) -> None:
+        for job_id in job_ids:
+            if job_id in self._seen:
+                continue
+            if len(self._order) == self._order.maxlen:
+                self._seen.discard(self._order[0])
+            self._order.append(job_id)
+            self._seen.add(job_id)
+
+    def ids(self) -> List[int]:
+        return list(self._order)
+
+
+_watermarks: Dict[FeedKey, FeedWatermark] = {}
+_watermarks_lock = threading.Lock()
+
+# Concurrent polls of one feed share a single pass over the listing
+feed_flights: SingleFlight[NewJobsFeed] = SingleFlight("job_feed")
+
+
+def _store_key(key: FeedKey) -> str:
+    lang, category_id = key
+    return f"{lang}:{category_id if category_id is not None else ''}"
+
+
+def load_watermark(key: FeedKey) -> Optional[FeedWatermark]:
+    """Watermark of a feed from memory or the persistent cache, None before the first poll"""
+    with _watermarks_lock:
+        watermark = _watermarks.get(key)
+    if watermark is not None or cache_store is None:
+        return watermark
+    try:
+        entry = cache_store.get("feed", _store_key(key))
+    except sqlite3.Error as e:
+        logger.log(error_level(e), "Error reading feed watermark from disk cache: %s", e)
+        return None
+    if entry is None:
+        return None
+    watermark = FeedWatermark(entry[0])
+    with _watermarks_lock:
+        return _watermarks.setdefault(key, watermark)
+
+
+def save_watermark(key: FeedKey, watermark: FeedWatermark) -> None:
+    with _watermarks_lock:
+        _watermarks[key] = watermark
+    if cache_store is not None:
+        try:
+            cache_store.set("feed", _store_key(key), watermark.ids(), WATERMARK_TTL)
+        except sqlite3.Error as e:
+            logger.log(error_level(e), "Error writing feed watermark to disk cache: %s", e)
+
+
+def reset_watermark(key: FeedKey) -> None:
+    with _watermarks_lock:
+        _watermarks.pop(key, None)
+    if cache_store is not None:
+        try:
+            cache_store.delete("feed", _store_key(key))
+        except sqlite3.Error as e:
+            logger.log(error_level(e), "Error deleting feed watermark from disk cache: %s", e)
+
+
+async def poll_new_jobs_async(
+    lang: str = "en",
+    category_id: Optional[int] = None,
+    max_pages: int = FEED_MAX_PAGES,
+    reset: bool = False,
+) -> NewJobsFeed:
+    """Return the jobs published since the previous poll of the same feed
+
+    Walks the newest-first listing (of one category, or of all jobs) page by
+    page and stops at the first page whose oldest job is already known, so a
+    poll usually costs a single page. The first poll of a feed (or one with
+    ``reset``) returns the first page and sets the watermark.
+    """
+    key = (lang, category_id)
+    if reset:
+        reset_watermark(key)
+    return await feed_flights.run(
+        key, lambda: _poll_new_jobs(key, max(1, max_pages)), share=copy_model
+    )
+
+
+async def _poll_new_jobs(key: FeedKey, max_pages: int) -> NewJobsFeed:
+    lang, category_id = key
+    watermark = load_watermark(key)
+    first_poll = watermark is None
+
+    new_jobs: List[JobOffer] = []
+    new_ids: List[int] = []
+    returned: Set[int] = set()
+    pages_fetched = 0
+    reached_known = False
+    for page in range(1, max_pages + 1):
+        if category_id is None:
+            jobs = await fetch_jobs_page_async(page, lang, FEED_ORDER)
+        else:
+            jobs = await fetch_category_jobs_page_async(category_id, page, lang, FEED_ORDER)
+        pages_fetched += 1
+        if not jobs:
+            break
+
+        for job in jobs:
+            job_id = job_id_of(job)
+            if job_id is None or job_id in returned:  # listings shift while paging
+                continue
+            if watermark is None or not watermark.is_known(job_id):
+                new_jobs.append(job)
+                new_ids.append(job_id)
+                returned.add(job_id)
+
+        if first_poll:
+            break
+        # Promoted jobs may sit on top of the page; the tail shows where the listing is
+        oldest_id = job_id_of(jobs[-1])
+        if oldest_id is not None and watermark.is_known(oldest_id):
+            reached_known = True
+            break
+        # Nothing newer than the high-water mark: the rest of the listing is older
+        highest = watermark.highest_id
+        if highest is None or all(job_id <= highest for job_id in page_ids(jobs)):
+            reached_known = highest is not None
+            break
+
+    if watermark is None:
+        watermark = FeedWatermark()
+    # Oldest first, so the newest IDs stay in the window longest
+    watermark.add(reversed(new_ids))
+    # An empty first poll leaves no watermark, so the next call is a first poll again
+    if new_ids or not first_poll:
+        save_watermark(key, watermark)
+    logger.info(
+        "Feed %s/%s: %d new jobs from %d pages",
+        lang,
+        category_id if category_id is not None else "all",
+        len(new_jobs),
+        pages_fetched,
+    )
+
+    return NewJobsFeed(
+        language=lang,
+        category_id=category_id,
+        new_jobs=new_jobs,
+        pages_fetched=pages_fetched,
+        reached_known_jobs=reached_known,
+        first_poll=first_poll,
+        highest_job_id=watermark.highest_id,
+    )
+
+
+def poll_new_jobs(
+    lang: str = "en",
+    category_id: Optional[int] = None,
+    max_pages: int = FEED_MAX_PAGES,
+    reset: bool = False,
+) -> NewJobsFeed:
+    """Return the jobs published since the previous poll of the same feed"""
+    return run_sync(poll_new_jobs_async(lang, category_id, max_pages, reset))
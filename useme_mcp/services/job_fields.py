@@ -0,0 +1,71 @@
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Tuple
+
+# "1197 PLN", "1,000.50 PLN", "1 000,50 PLN", "2 500 zł": a comma followed by three
+# digits separates thousands, one followed by one or two digits starts the decimals
+BUDGET_PATTERN = re.compile(
+    r"(\d(?:[\d\s]|,(?=\d{3}(?!\d)))*(?:[.,]\d{1,2}(?!\d))?)\s*([A-Z]{3}|zł|ZŁ)(?!\w)"
+)
+
+# Currency symbols written instead of the ISO code
+CURRENCY_SYMBOLS = {"zł": "PLN"}
+
+
+def extract_job_id_from_url(job_url: str) -> Optional[str]:
+    """Extract job ID from Useme job URL"""
+    # Handle various URL formats
+    # https://useme.com/pl/jobs/nazwa-oferty,123456/
+    # https://useme.com/en/jobs/job-name,123456/
+
+    # Look for pattern with comma and numbers
+    match = re.search(r",(\d+)/?$", job_url)
+    if match:
+        return match.group(1)
+
+    # Fallback: look for any sequence of digits at the end
+    match = re.search(r"/(\d+)/?$", job_url)
+    if match:
+        return match.group(1)
+
+    return None
+
+
+def parse_days_left(text: str) -> Optional[int]:
+    """Whole days left from "X days left", "Znika za X dni", "X dni" or "X days"
+
+    Hours or minutes ("5 hours left", "3 godziny") mean the last day: 0. None
+    when the text holds no such number.
+    """
+    match = re.search(r"(\d+)\s*(?:days?|dni|dzie)", text, re.IGNORECASE)
+    if match:
+        return int(match.group(1))
+    if re.search(r"\d+\s*(?:hours?|godz|minut|min)", text, re.IGNORECASE):
+        return 0
+    match = re.search(r"(\d+)", text)
+    return int(match.group(1)) if match else None
+
+
+def expiry_time(days_left: int, now: float) -> float:
+    """Latest time a job with ``days_left`` whole days left can still be open
+
+    Listings round the time left down to whole days, so the job is open until
+    the end of its last listed day at the latest.
+    """
+    return now + (max(0, days_left) + 1) * 86400
+
+
+def parse_budget(budget: str) -> Tuple[Optional[Decimal], Optional[str]]:
+    """Amount and currency of a budget text, (None, None) when it has none"""
+    if budget == "Negotiable":
+        return None, None
+    match = BUDGET_PATTERN.search(budget)
+    if not match:
+        return None, None
+    number = re.sub(r",(\d{1,2})$", r".\1", match.group(1).strip())
+    try:
+        amount = Decimal(re.sub(r"[,\s]", "", number))
+    except InvalidOperation:
+        return None, None
+    currency = match.group(2)
+    return amount, CURRENCY_SYMBOLS.get(currency.lower(), currency)
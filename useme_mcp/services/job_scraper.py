@@ -1,13 +1,73 @@
-import cloudscraper
-import bs4
+import asyncio
+import logging
 import re
-from typing import Optional, List
-from ..models import JobOffer, JobDetail, JobCompetitor, JobCompetition
-
-
-def parse_jobs_from_html(html_content: str) -> List[JobOffer]:
-    """Parse job offers from HTML content"""
-    soup = bs4.BeautifulSoup(html_content, "html.parser")
+from typing import Awaitable, Callable, Dict, Optional, List, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from . import retry
+from .http_client import run_sync
+from .cache import TTLCache, DocumentCache
+from .html_parsing import HtmlSource, parse_container, parse_html
+from .job_fields import extract_job_id_from_url, parse_days_left
+from .job_store import job_store
+from .metrics import metrics
+from .single_flight import SingleFlight, copy_model, normalise_url
+from ..settings import (
+    BASE_URL,
+    FETCH_WORKERS,
+    COMPETITION_WORKERS,
+    DOCUMENT_CACHE_SIZE,
+    DOCUMENT_CACHE_MAX_AGE,
+    COMPETITION_CACHE_TTL,
+    LISTING_CACHE_SIZE,
+    LISTING_CACHE_TTL,
+    LISTING_CACHE_TTL_BY_ORDER,
+)
+from ..models import JobOffer, JobDetail, JobDetailsBatch, JobCompetitor, JobCompetition
+
+logger = logging.getLogger(__name__)
+
+# In-flight fetches shared by concurrent callers, keyed like the caches
+listing_flights: SingleFlight[List[JobOffer]] = SingleFlight("listing")
+job_detail_flights: SingleFlight[Optional[JobDetail]] = SingleFlight("job_detail")
+competition_page_flights: SingleFlight[Optional[dict]] = SingleFlight("competition_page")
+
+# Parsed listing pages keyed by (lang, page, order_by, category_id)
+listing_cache: TTLCache[List[JobOffer]] = TTLCache(
+    LISTING_CACHE_SIZE,
+    LISTING_CACHE_TTL,
+    kind="listing",
+    dump=lambda jobs: [job.model_dump(mode="json") for job in jobs],
+    load=lambda data: [JobOffer.model_validate(job) for job in data],
+)
+
+# Parsed job details keyed by URL, revalidated against the server on every fetch
+job_detail_cache = DocumentCache(
+    DOCUMENT_CACHE_SIZE, DOCUMENT_CACHE_MAX_AGE, kind="job_detail", model=JobDetail
+)
+
+# Complete competition snapshots keyed by (job_id, lang)
+competition_cache: TTLCache[JobCompetition] = TTLCache(
+    DOCUMENT_CACHE_SIZE,
+    COMPETITION_CACHE_TTL,
+    kind="competition",
+    dump=lambda competition: competition.model_dump(mode="json"),
+    load=JobCompetition.model_validate,
+)
+
+
+# Elements holding the parsed content of listing and job detail pages
+JOBS_CONTAINER = ("div", {"class": "jobs"})
+JOB_DETAIL_CONTAINER = ("div", {"class": "jobs-page__content row"})
+
+
+def listing_cache_ttl(order_by: Optional[str]) -> float:
+    """Cache TTL for a listing page with the given ordering"""
+    return LISTING_CACHE_TTL_BY_ORDER.get(order_by or "", LISTING_CACHE_TTL)
+
+
+def parse_jobs_from_html(html_content: HtmlSource) -> List[JobOffer]:
+    """Parse job offers from HTML content or an already-parsed node"""
+    soup = parse_html(html_content)
     jobs = []
 
     # Find all job articles
@@ -40,9 +100,7 @@ def parse_jobs_from_html(html_content: str) -> List[JobOffer]:
             days_left = 0
             if days_span:
                 # Handle both "X days left", "Znika za X dni", and "X dni" formats
-                days_match = re.search(r"(\d+)", days_span.text)
-                if days_match:
-                    days_left = int(days_match.group(1))
+                days_left = parse_days_left(days_span.text) or 0
 
             # Extract title and URL
             title_link = article.find("a", class_="job__title-link")
@@ -54,7 +112,7 @@ def parse_jobs_from_html(html_content: str) -> List[JobOffer]:
                 href = title_link.get("href")
                 # Make sure it's a complete URL
                 if href.startswith("/"):
-                    job_url = f"https://useme.com{href}"
+                    job_url = f"{BASE_URL}{href}"
                 else:
                     job_url = href
 
@@ -94,60 +152,142 @@ def parse_jobs_from_html(html_content: str) -> List[JobOffer]:
             jobs.append(job)
 
         except Exception as e:
-            print(f"Error parsing job: {e}")
+            logger.warning("Error parsing job: %s", e)
             continue
 
     return jobs
 
 
-def fetch_jobs_page(
-    page: int = 1, lang: str = "en", order_by: Optional[str] = None
+async def fetch_jobs_page_async(
+    page: int = 1, lang: str = "en", order_by: Optional[str] = None, use_cache: bool = True
 ) -> List[JobOffer]:
     """Fetch jobs from a specific page"""
-    scraper = cloudscraper.create_scraper()
+    cache_key = (lang, page, order_by or "", None)
+    if use_cache:
+        cached = listing_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
 
     # Build URL with optional ordering
-    url = f"https://useme.com/{lang}/jobs/?page={page}"
+    url = f"{BASE_URL}/{lang}/jobs/?page={page}"
     if order_by:
         url += f"&order_by={order_by}"
+    return await listing_flights.run(
+        cache_key, lambda: _fetch_jobs_page(cache_key, url, page, order_by), share=list
+    )
 
-    print(f"Fetching page {page} from {url}")
-    response = scraper.get(url)
 
-    # Extract HTML from <div class="jobs">
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
-    jobs_div = soup.find("div", class_="jobs")
+async def _fetch_jobs_page(
+    cache_key: tuple, url: str, page: int, order_by: Optional[str]
+) -> List[JobOffer]:
+    logger.debug("Fetching page %s", page, extra={"url": url})
+    response = await retry.get("listing", url)
+    if response.status_code == 404 and page > 1:
+        logger.info("Page %s not found, end of listing", page, extra={"url": url})
+        return []
+    response.raise_for_status()
+
+    # Parse only <div class="jobs"> out of the page
+    with metrics.timed("parse"):
+        jobs_div = parse_container(response.content, *JOBS_CONTAINER, response.encoding)
 
     if not jobs_div:
-        print(f"No jobs found on page {page}")
+        logger.info("No jobs found on page %s", page, extra={"url": url})
         return []
 
-    return parse_jobs_from_html(str(jobs_div))
+    with metrics.timed("extract"):
+        jobs = parse_jobs_from_html(jobs_div)
+    if jobs:
+        listing_cache.set(cache_key, jobs, listing_cache_ttl(order_by))
+        if job_store is not None:
+            job_store.add_listing(jobs)
+    return list(jobs)
 
 
-def fetch_multiple_pages(
+def fetch_jobs_page(
+    page: int = 1, lang: str = "en", order_by: Optional[str] = None, use_cache: bool = True
+) -> List[JobOffer]:
+    """Fetch jobs from a specific page"""
+    return run_sync(fetch_jobs_page_async(page, lang, order_by, use_cache))
+
+
+async def fetch_pages_concurrently(
+    fetch_page: Callable[[int], Awaitable[List[JobOffer]]],
+    pages: range,
+    max_workers: Optional[int] = None,
+) -> List[List[JobOffer]]:
+    """Fetch listing pages with bounded concurrency, keeping their original order
+
+    Results are collected in page order and collection stops at the first empty
+    page; requests for later pages that are still pending or in flight are cancelled.
+    A page after the first that fails also ends the collection, keeping the pages
+    loaded before it; a failing first page raises.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_workers or FETCH_WORKERS))
+
+    async def fetch_bounded(page: int) -> List[JobOffer]:
+        async with semaphore:
+            return await fetch_page(page)
+
+    tasks = [asyncio.create_task(fetch_bounded(page)) for page in pages]
+    results = []
+
+    try:
+        for page, task in zip(pages, tasks):
+            try:
+                page_jobs = await task
+            except Exception as e:
+                if not results:
+                    raise
+                logger.warning("Error fetching page %s, returning earlier pages: %s", page, e)
+                break
+            if not page_jobs:  # Stop if no jobs found
+                logger.debug("No more jobs found at page %s, stopping", page)
+                break
+            results.append(page_jobs)
+            logger.debug("Found %d jobs on page %s", len(page_jobs), page)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return results
+
+
+async def fetch_multiple_pages_async(
     start_page: int = 1,
     num_pages: int = 3,
     lang: str = "en",
     order_by: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
 ) -> List[JobOffer]:
     """Fetch jobs from multiple pages"""
-    all_jobs = []
+    pages = await fetch_pages_concurrently(
+        lambda page: fetch_jobs_page_async(page, lang, order_by, use_cache),
+        range(start_page, start_page + num_pages),
+        max_workers,
+    )
+    return [job for page_jobs in pages for job in page_jobs]
 
-    for page in range(start_page, start_page + num_pages):
-        page_jobs = fetch_jobs_page(page, lang, order_by)
-        if not page_jobs:  # Stop if no jobs found
-            print(f"No more jobs found at page {page}, stopping...")
-            break
-        all_jobs.extend(page_jobs)
-        print(f"Found {len(page_jobs)} jobs on page {page}")
 
-    return all_jobs
+def fetch_multiple_pages(
+    start_page: int = 1,
+    num_pages: int = 3,
+    lang: str = "en",
+    order_by: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[JobOffer]:
+    """Fetch jobs from multiple pages"""
+    return run_sync(
+        fetch_multiple_pages_async(start_page, num_pages, lang, order_by, max_workers, use_cache)
+    )
 
 
-def parse_job_detail_from_html(html_content: str, job_url: str) -> Optional[JobDetail]:
-    """Parse detailed job information from jobs-page__content HTML"""
-    soup = bs4.BeautifulSoup(html_content, "html.parser")
+def parse_job_detail_from_html(html_content: HtmlSource, job_url: str) -> Optional[JobDetail]:
+    """Parse detailed job information from jobs-page__content HTML or node"""
+    soup = parse_html(html_content)
 
     try:
         # Extract title
@@ -195,7 +335,7 @@ def parse_job_detail_from_html(html_content: str, job_url: str) -> Optional[JobD
                 href = link_elem.get("href")
                 # Make sure it's a complete URL
                 if href.startswith("/"):
-                    value = f"https://useme.com{href}"
+                    value = f"{BASE_URL}{href}"
                 else:
                     value = href
             else:
@@ -247,76 +387,174 @@ def parse_job_detail_from_html(html_content: str, job_url: str) -> Optional[JobD
         )
 
     except Exception as e:
-        print(f"Error parsing job detail: {e}")
+        logger.warning("Error parsing job detail: %s", e)
         return None
 
 
-def fetch_job_details(job_url: str) -> Optional[JobDetail]:
-    """Fetch and parse detailed job information from job URL"""
-    scraper = cloudscraper.create_scraper()
-    print(f"Fetching job details from: {job_url}")
+async def fetch_job_details_async(job_url: str) -> Optional[JobDetail]:
+    """Fetch and parse detailed job information from job URL
 
+    Concurrent calls for the same job share one fetch and parse.
+    """
     try:
-        response = scraper.get(job_url)
-        soup = bs4.BeautifulSoup(response.text, "html.parser")
+        return await _shared_job_details(job_url)
+    except Exception as e:
+        logger.warning("Error fetching job details: %s", e, extra={"url": job_url})
+        return None
 
-        # Find the jobs-page__content div
-        content_div = soup.find("div", class_="jobs-page__content row")
 
-        if content_div:
-            return parse_job_detail_from_html(str(content_div), job_url)
-        else:
-            print("Could not find jobs-page__content div")
-            return None
+async def _shared_job_details(job_url: str) -> Optional[JobDetail]:
+    """Job details through the shared in-flight fetch; raises on fetch errors"""
+    return await job_detail_flights.run(
+        normalise_url(job_url), lambda: _fetch_job_details(job_url), share=copy_model
+    )
 
-    except Exception as e:
-        print(f"Error fetching job details: {e}")
+
+async def _fetch_job_details(job_url: str) -> Optional[JobDetail]:
+    logger.debug("Fetching job details", extra={"url": job_url})
+
+    cached = job_detail_cache.get(job_url)
+    response = await retry.get(
+        "job_detail", job_url, headers=job_detail_cache.conditional_headers(cached)
+    )
+    unchanged = job_detail_cache.revalidate(cached, response)
+    if unchanged is not None:
+        return unchanged.model_copy(deep=True)
+    response.raise_for_status()
+
+    # Parse only the jobs-page__content div out of the page
+    with metrics.timed("parse"):
+        content_div = parse_container(response.content, *JOB_DETAIL_CONTAINER, response.encoding)
+
+    if not content_div:
+        logger.warning("Could not find jobs-page__content div", extra={"url": job_url})
         return None
 
+    with metrics.timed("extract"):
+        job_detail = parse_job_detail_from_html(content_div, job_url)
+    if job_detail:
+        job_detail_cache.store(job_url, response, job_detail.model_copy(deep=True))
+        if job_store is not None:
+            job_store.add_detail(job_detail)
+    return job_detail
 
-def extract_job_id_from_url(job_url: str) -> Optional[str]:
-    """Extract job ID from Useme job URL"""
-    # Handle various URL formats
-    # https://useme.com/pl/jobs/nazwa-oferty,123456/
-    # https://useme.com/en/jobs/job-name,123456/
 
-    import re
+def fetch_job_details(job_url: str) -> Optional[JobDetail]:
+    """Fetch and parse detailed job information from job URL"""
+    return run_sync(fetch_job_details_async(job_url))
+
+
+# Most job URLs accepted by one batch call
+MAX_BATCH_JOBS = 50
+
+
+def dedupe_job_urls(job_urls: List[str]) -> Tuple[Dict[str, str], Dict[str, str], int]:
+    """Split job URLs into {job ID: normalised URL} and {URL: error}
+
+    The first URL of each job ID wins, so the ``/en/`` and ``/pl/`` pages of one
+    job are fetched once. Relative URLs are resolved against the base URL. The
+    third value is the number of URLs dropped as duplicates.
+    """
+    unique: Dict[str, str] = {}
+    invalid: Dict[str, str] = {}
+    duplicates = 0
+    for job_url in job_urls:
+        url = job_url.strip()
+        if url.startswith("/"):
+            url = BASE_URL + url
+        url = normalise_url(url)
+        parts = urlsplit(url)
+        job_id = extract_job_id_from_url(parts.path)
+        if not parts.scheme or not job_id:
+            invalid[job_url] = "Not a job URL: no job ID found"
+        elif job_id in unique:
+            duplicates += 1
+        else:
+            unique[job_id] = urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+    return unique, invalid, duplicates
+
+
+async def fetch_job_details_batch_async(
+    job_urls: List[str], max_workers: Optional[int] = None, timeout: Optional[float] = None
+) -> JobDetailsBatch:
+    """Fetch the details of several jobs concurrently
+
+    URLs are deduplicated by job ID and fetched ``max_workers`` at a time. A job
+    that fails, or takes longer than ``timeout`` seconds, is reported in
+    ``errors`` without holding back the others.
+    """
+    if len(job_urls) > MAX_BATCH_JOBS:
+        raise ValueError(f"At most {MAX_BATCH_JOBS} job URLs per batch, got {len(job_urls)}")
+    unique, errors, duplicates = dedupe_job_urls(job_urls)
+    semaphore = asyncio.Semaphore(max(1, max_workers or FETCH_WORKERS))
+
+    async def fetch_bounded(job_url: str) -> Optional[JobDetail]:
+        async with semaphore:
+            async with asyncio.timeout(timeout):
+                return await _shared_job_details(job_url)
+
+    results = await asyncio.gather(
+        *(fetch_bounded(job_url) for job_url in unique.values()), return_exceptions=True
+    )
+    jobs: Dict[str, JobDetail] = {}
+    for (job_id, job_url), result in zip(unique.items(), results):
+        if isinstance(result, JobDetail):
+            jobs[job_id] = result
+        elif isinstance(result, TimeoutError) and timeout is not None:
+            errors[job_id] = f"Timed out after {timeout:g}s"
+        elif isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            logger.warning("Error fetching job details: %s", result, extra={"url": job_url})
+            errors[job_id] = str(result) or type(result).__name__
+        else:
+            errors[job_id] = "No job details found on the page"
+    return JobDetailsBatch(jobs=jobs, errors=errors, duplicates=duplicates)
 
-    # Look for pattern with comma and numbers
-    match = re.search(r",(\d+)/?$", job_url)
-    if match:
-        return match.group(1)
 
-    # Fallback: look for any sequence of digits at the end
-    match = re.search(r"/(\d+)/?$", job_url)
-    if match:
-        return match.group(1)
+def fetch_job_details_batch(
+    job_urls: List[str], max_workers: Optional[int] = None, timeout: Optional[float] = None
+) -> JobDetailsBatch:
+    """Fetch the details of several jobs concurrently"""
+    return run_sync(fetch_job_details_batch_async(job_urls, max_workers, timeout))
 
-    return None
 
+async def fetch_competition_page_async(
+    job_id: str, page: int = 1, lang: str = "pl"
+) -> Optional[dict]:
+    """Fetch single page of competition data from API
 
-def fetch_competition_page(job_id: str, page: int = 1, lang: str = "pl") -> Optional[dict]:
-    """Fetch single page of competition data from API"""
-    scraper = cloudscraper.create_scraper()
+    Concurrent calls for the same page share one request.
+    """
+    return await competition_page_flights.run(
+        (lang, job_id, page), lambda: _fetch_competition_page(job_id, page, lang)
+    )
 
+
+async def _fetch_competition_page(job_id: str, page: int, lang: str) -> Optional[dict]:
     # Build API URL
-    api_url = f"https://useme.com/{lang}/jobs/get-offers/{job_id}/"
+    api_url = f"{BASE_URL}/{lang}/jobs/get-offers/{job_id}/"
     if page > 1:
         api_url += f"?page={page}"
 
-    print(f"Fetching competition page {page} from: {api_url}")
+    logger.debug("Fetching competition page %s", page, extra={"url": api_url})
 
     try:
-        response = scraper.get(api_url)
+        response = await retry.get("competition", api_url)
         response.raise_for_status()
 
         return response.json()
 
     except Exception as e:
-        print(f"Error fetching competition page {page}: {e}")
+        logger.warning("Error fetching competition page %s: %s", page, e, extra={"url": api_url})
         return None
 
 
+def fetch_competition_page(job_id: str, page: int = 1, lang: str = "pl") -> Optional[dict]:
+    """Fetch single page of competition data from API"""
+    return run_sync(fetch_competition_page_async(job_id, page, lang))
+
+
 def parse_competition_from_api_data(api_data: dict, job_url: str, job_id: str) -> JobCompetition:
     """Parse competition data from API response"""
     competitors = []
@@ -355,7 +593,7 @@ def parse_competition_from_api_data(api_data: dict, job_url: str, job_id: str) -
             competitors.append(competitor)
 
         except Exception as e:
-            print(f"Error parsing competitor from API data: {e}")
+            logger.warning("Error parsing competitor from API data: %s", e)
             continue
 
     # Calculate total offers from all competitors found
@@ -371,14 +609,21 @@ def parse_competition_from_api_data(api_data: dict, job_url: str, job_id: str) -
     )
 
 
-def fetch_job_competition(job_url: str) -> Optional[JobCompetition]:
-    """Fetch and parse competition data from a job URL using API"""
-    print(f"Fetching job competition from: {job_url}")
+async def fetch_job_competition_async(
+    job_url: str, max_workers: Optional[int] = None
+) -> Optional[JobCompetition]:
+    """Fetch and parse competition data from a job URL using API
+
+    Page 1 is fetched first to learn ``total_pages``; the remaining pages are then
+    fetched concurrently (up to ``max_workers`` at a time) and merged in page order.
+    Pages that could not be fetched are listed in ``failed_pages``.
+    """
+    logger.debug("Fetching job competition", extra={"url": job_url})
 
     # Extract job ID from URL
     job_id = extract_job_id_from_url(job_url)
     if not job_id:
-        print(f"Could not extract job ID from URL: {job_url}")
+        logger.warning("Could not extract job ID from URL", extra={"url": job_url})
         return JobCompetition(
             job_url=job_url, job_id="", total_offers=0, total_pages=0, competitors=[]
         )
@@ -386,9 +631,13 @@ def fetch_job_competition(job_url: str) -> Optional[JobCompetition]:
     # Determine language from URL
     lang = "pl" if "/pl/" in job_url else "en"
 
+    cached = competition_cache.get((job_id, lang))
+    if cached is not None:
+        return cached.model_copy(update={"job_url": job_url}, deep=True)
+
     try:
         # Fetch first page to get total pages
-        first_page_data = fetch_competition_page(job_id, 1, lang)
+        first_page_data = await fetch_competition_page_async(job_id, 1, lang)
         if not first_page_data:
             return JobCompetition(
                 job_url=job_url,
@@ -396,34 +645,51 @@ def fetch_job_competition(job_url: str) -> Optional[JobCompetition]:
                 total_offers=0,
                 total_pages=0,
                 competitors=[],
+                failed_pages=[1],
             )
 
         total_pages = first_page_data.get("total_pages", 1)
         all_competitors = []
+        failed_pages = []
 
         # Parse first page
-        first_page_competition = parse_competition_from_api_data(first_page_data, job_url, job_id)
+        with metrics.timed("validate"):
+            first_page_competition = parse_competition_from_api_data(
+                first_page_data, job_url, job_id
+            )
         all_competitors.extend(first_page_competition.competitors)
 
-        # Fetch remaining pages if any
-        for page in range(2, total_pages + 1):
-            page_data = fetch_competition_page(job_id, page, lang)
+        # Fetch remaining pages concurrently, merging them in page order
+        remaining_pages = range(2, total_pages + 1)
+        semaphore = asyncio.Semaphore(max(1, max_workers or COMPETITION_WORKERS))
+
+        async def fetch_bounded(page: int) -> Optional[dict]:
+            async with semaphore:
+                return await fetch_competition_page_async(job_id, page, lang)
+
+        pages_data = await asyncio.gather(*(fetch_bounded(page) for page in remaining_pages))
+        for page, page_data in zip(remaining_pages, pages_data):
             if page_data:
-                page_competition = parse_competition_from_api_data(page_data, job_url, job_id)
+                with metrics.timed("validate"):
+                    page_competition = parse_competition_from_api_data(page_data, job_url, job_id)
                 all_competitors.extend(page_competition.competitors)
             else:
-                print(f"Failed to fetch page {page}, continuing with partial data")
+                failed_pages.append(page)
 
-        return JobCompetition(
+        competition = JobCompetition(
             job_url=job_url,
             job_id=job_id,
             total_offers=len(all_competitors),
             total_pages=total_pages,
             competitors=all_competitors,
+            failed_pages=failed_pages,
         )
+        if not failed_pages:
+            competition_cache.set((job_id, lang), competition.model_copy(deep=True))
+        return competition
 
     except Exception as e:
-        print(f"Error fetching job competition: {e}")
+        logger.warning("Error fetching job competition: %s", e, extra={"url": job_url})
         return JobCompetition(
             job_url=job_url,
             job_id=job_id,
@@ -431,3 +697,10 @@ def fetch_job_competition(job_url: str) -> Optional[JobCompetition]:
             total_pages=0,
             competitors=[],
         )
+
+
+def fetch_job_competition(
+    job_url: str, max_workers: Optional[int] = None
+) -> Optional[JobCompetition]:
+    """Fetch and parse competition data from a job URL using API"""
+    return run_sync(fetch_job_competition_async(job_url, max_workers))
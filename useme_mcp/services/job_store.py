@@ -0,0 +1,370 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .cache_store import BUSY_TIMEOUT, error_level
+from .job_fields import expiry_time, extract_job_id_from_url, parse_budget, parse_days_left
+from .metrics import metrics
+from ..settings import JOB_STORE_ENABLED, JOB_STORE_PATH
+from ..models import JobDetail, JobOffer, JobSearchHit
+
+logger = logging.getLogger(__name__)
+
+# How many stored jobs happen between two removals of long-expired jobs
+PRUNE_INTERVAL = 500
+
+# Expired jobs are kept this long (seconds) before being removed from the index
+EXPIRED_RETENTION = 7 * 86400
+
+# Search results carry at most this much of a (possibly long) detail description
+DESCRIPTION_PREVIEW = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY,
+    lang TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    category TEXT NOT NULL,
+    client TEXT NOT NULL,
+    budget TEXT NOT NULL,
+    amount REAL,
+    currency TEXT,
+    offers_count INTEGER NOT NULL,
+    expires_at REAL,
+    has_details INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_amount ON jobs (amount);
+CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+CREATE INDEX IF NOT EXISTS jobs_offers_count ON jobs (offers_count);
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, description, tags, category, client,
+    content = 'jobs', content_rowid = 'job_id', tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts (rowid, title, description, tags, category, client)
+    VALUES (new.job_id, new.title, new.description, new.tags, new.category, new.client);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, description, tags, category, client)
+    VALUES ('delete', old.job_id, old.title, old.description, old.tags, old.category, old.client);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, description, tags, category, client)
+    VALUES ('delete', old.job_id, old.title, old.description, old.tags, old.category, old.client);
+    INSERT INTO jobs_fts (rowid, title, description, tags, category, client)
+    VALUES (new.job_id, new.title, new.description, new.tags, new.category, new.client);
+END;
+"""
+
+# Listing rows never replace the full description or skills read from a detail page
+UPSERT_LISTING = """
+INSERT INTO jobs (job_id, lang, url, title, description, tags, category, client, budget,
+                  amount, currency, offers_count, expires_at, has_details, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
+ON CONFLICT (job_id) DO UPDATE SET
+    lang = excluded.lang,
+    url = excluded.url,
+    title = excluded.title,
+    description = CASE WHEN has_details THEN description ELSE excluded.description END,
+    tags = CASE WHEN has_details THEN tags ELSE excluded.tags END,
+    category = excluded.category,
+    client = excluded.client,
+    budget = excluded.budget,
+    amount = excluded.amount,
+    currency = excluded.currency,
+    offers_count = excluded.offers_count,
+    expires_at = excluded.expires_at,
+    updated_at = excluded.updated_at
+"""
+
+UPSERT_DETAIL = """
+INSERT INTO jobs (job_id, lang, url, title, description, tags, category, client, budget,
+                  amount, currency, offers_count, expires_at, has_details, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)
+ON CONFLICT (job_id) DO UPDATE SET
+    title = excluded.title,
+    description = excluded.description,
+    tags = excluded.tags,
+    client = excluded.client,
+    budget = excluded.budget,
+    amount = excluded.amount,
+    currency = excluded.currency,
+    offers_count = excluded.offers_count,
+    expires_at = COALESCE(excluded.expires_at, expires_at),
+    has_details = 1,
+    updated_at = excluded.updated_at
+"""
+
+ORDERINGS = {
+    "relevance": "rank",
+    "newest": "jobs.job_id DESC",
+    "expires": "jobs.expires_at",
+    "offer_count": "jobs.offers_count",
+    "-offer_count": "jobs.offers_count DESC",
+    # Jobs without a parsed amount (Negotiable) come last in both directions
+    "amount": "jobs.amount IS NULL, jobs.amount",
+    "-amount": "jobs.amount IS NULL, jobs.amount DESC",
+}
+
+
+def job_id_of(url: str) -> Optional[int]:
+    job_id = extract_job_id_from_url(url)
+    return int(job_id) if job_id else None
+
+
+def budget_columns(budget: str) -> Tuple[Optional[float], Optional[str]]:
+    """Amount and currency columns parsed from the budget text"""
+    amount, currency = parse_budget(budget)
+    return (float(amount) if amount is not None else None), currency
+
+
+def lang_from_url(url: str) -> str:
+    match = re.search(r"/(en|pl)/", url)
+    return match.group(1) if match else "pl"
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, ``word*`` is a prefix"""
+    terms = []
+    for word in re.findall(r"[\w*]+", text):
+        prefix = word.endswith("*")
+        word = word.strip("*")
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+class JobStore:
+    """SQLite index of the jobs seen in listing and detail pages
+
+    Rows are keyed by job ID (the ``,<id>/`` URL suffix) and mirrored into an
+    FTS5 table over title, description, tags, category and client, so keyword
+    and budget / competition / expiry queries run locally. A detail page
+    upgrades a job's row with the full description and skills; later listing
+    fetches only refresh the volatile fields. One connection serves all
+    threads behind a lock.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = os.path.expanduser(path) if path else ":memory:"
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None
+            )
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _write(self, statement: str, rows: List[Tuple]) -> None:
+        if not rows:
+            return
+        try:
+            with metrics.timed("index"), self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(statement, rows)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                self._writes += len(rows)
+                prune = self._writes >= PRUNE_INTERVAL
+                if prune:
+                    self._writes = 0
+                    conn.execute(
+                        "DELETE FROM jobs WHERE expires_at < ?", (time.time() - EXPIRED_RETENTION,)
+                    )
+        except sqlite3.Error as e:
+            logger.log(error_level(e), "Error writing to the job store: %s", e)
+
+    def add_listing(self, jobs: Iterable[JobOffer]) -> None:
+        """Index the jobs of a listing page"""
+        now = time.time()
+        rows = []
+        for job in jobs:
+            job_id = job_id_of(job.url)
+            if job_id is None:
+                continue
+            amount, currency = budget_columns(job.budget)
+            rows.append(
+                (
+                    job_id,
+                    lang_from_url(job.url),
+                    job.url,
+                    job.title,
+                    job.description,
+                    json.dumps(job.tags, ensure_ascii=False),
+                    job.category,
+                    job.client,
+                    job.budget,
+                    amount,
+                    currency,
+                    job.offers_count,
+                    expiry_time(job.days_left, now),
+                    now,
+                )
+            )
+        self._write(UPSERT_LISTING, rows)
+
+    def add_detail(self, detail: JobDetail) -> None:
+        """Index a job detail page (full description and skills)"""
+        job_id = job_id_of(detail.url)
+        if job_id is None:
+            return
+        now = time.time()
+        amount, currency = budget_columns(detail.budget)
+        days_left = parse_days_left(detail.valid_for)
+        self._write(
+            UPSERT_DETAIL,
+            [
+                (
+                    job_id,
+                    lang_from_url(detail.url),
+                    detail.url,
+                    detail.title,
+                    detail.description,
+                    json.dumps(list(dict.fromkeys(detail.skills)), ensure_ascii=False),
+                    detail.category,
+                    detail.client,
+                    detail.budget,
+                    amount,
+                    currency,
+                    detail.offers_count,
+                    expiry_time(days_left, now) if days_left is not None else None,
+                    now,
+                )
+            ],
+        )
+
+    def search(
+        self,
+        query: str = "",
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        currency: Optional[str] = None,
+        max_offers: Optional[int] = None,
+        min_days_left: Optional[int] = None,
+        lang: Optional[str] = None,
+        order_by: str = "relevance",
+        limit: int = 20,
+    ) -> List[JobSearchHit]:
+        """Keyword and range search over the indexed jobs
+
+        ``query`` words must all appear (title, description, tags, category or
+        client; ``word*`` matches a prefix). Expired jobs are left out.
+        """
+        now = time.time()
+        match = fts_query(query)
+        columns = (
+            "jobs.job_id, jobs.url, jobs.title, jobs.description, jobs.category, jobs.tags, "
+            "jobs.client, jobs.budget, jobs.amount, jobs.currency, jobs.offers_count, "
+            "jobs.expires_at, jobs.has_details"
+        )
+        if match:
+            sql = (
+                f"SELECT {columns}, snippet(jobs_fts, 1, '[', ']', '…', 12) "
+                "FROM jobs_fts JOIN jobs ON jobs.job_id = jobs_fts.rowid WHERE jobs_fts MATCH ?"
+            )
+            params: List[Any] = [match]
+        else:
+            sql = f"SELECT {columns}, NULL FROM jobs WHERE 1 = 1"
+            params = []
+            if order_by == "relevance":
+                order_by = "newest"
+
+        sql += " AND (jobs.expires_at IS NULL OR jobs.expires_at > ?)"
+        params.append(now)
+        if category:
+            sql += " AND jobs.category LIKE ?"
+            params.append(f"%{category}%")
+        for tag in tags or []:
+            sql += " AND EXISTS (SELECT 1 FROM json_each(jobs.tags) WHERE lower(value) = lower(?))"
+            params.append(tag)
+        if min_amount is not None:
+            sql += " AND jobs.amount >= ?"
+            params.append(min_amount)
+        if max_amount is not None:
+            sql += " AND jobs.amount <= ?"
+            params.append(max_amount)
+        if currency:
+            sql += " AND jobs.currency = ?"
+            params.append(currency.upper())
+        if max_offers is not None:
+            sql += " AND jobs.offers_count <= ?"
+            params.append(max_offers)
+        if min_days_left is not None:
+            sql += " AND jobs.expires_at >= ?"
+            params.append(now + min_days_left * 86400)
+        if lang:
+            sql += " AND jobs.lang = ?"
+            params.append(lang)
+        sql += f" ORDER BY {ORDERINGS.get(order_by, ORDERINGS['newest'])} LIMIT ?"
+        params.append(max(1, limit))
+
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+
+        hits = []
+        for row in rows:
+            (job_id, url, title, description, category_name, tags_json, client, budget) = row[:8]
+            amount, currency_code, offers_count, expires_at, has_details, snippet = row[8:]
+            if len(description) > DESCRIPTION_PREVIEW:
+                description = description[:DESCRIPTION_PREVIEW].rstrip() + "…"
+            hits.append(
+                JobSearchHit(
+                    job_id=job_id,
+                    url=url,
+                    title=title,
+                    description=description,
+                    category=category_name,
+                    tags=json.loads(tags_json),
+                    client=client,
+                    budget=budget,
+                    amount=amount,
+                    currency=currency_code,
+                    offers_count=offers_count,
+                    days_left=int((expires_at - now) // 86400) if expires_at else None,
+                    has_details=bool(has_details),
+                    snippet=snippet,
+                )
+            )
+        return hits
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs, details, expired = (
+                self._connect()
+                .execute(
+                    "SELECT COUNT(*), COALESCE(SUM(has_details), 0), "
+                    "COALESCE(SUM(expires_at <= ?), 0) FROM jobs",
+                    (time.time(),),
+                )
+                .fetchone()
+            )
+        return {"path": self.path, "jobs": jobs, "with_details": details, "expired": expired}
+
+
+job_store: Optional[JobStore] = JobStore() if JOB_STORE_ENABLED else None
@@ -0,0 +1,249 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from ..settings import METRICS_ENABLED
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stages timed inside a tool call:
+#   rate_limit - waiting for the per-host rate limiter (only recorded when it had to wait)
+#   fetch      - HTTP round trip (including the challenge solve, which is also timed alone)
+#   challenge  - Cloudflare challenge solved through cloudscraper
+#   parse      - building the HTML tree of the content container
+#   extract    - parse_* functions: reading fields and constructing the models
+#   validate   - validating JSON (API responses, disk cache entries) into models
+#   index      - writing fetched jobs to the local search index
+#   serialise  - model_dump() of tool results
+STAGES = (
+    "rate_limit",
+    "fetch",
+    "challenge",
+    "parse",
+    "extract",
+    "validate",
+    "index",
+    "serialise",
+)
+
+# Tool whose call is being handled, so stage timings can be attributed to it
+current_tool: ContextVar[str] = ContextVar("current_tool", default="")
+
+_NULL_CONTEXT = nullcontext()
+
+
+def _escape(value: object) -> str:
+    """Escape a Prometheus label value"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 3) if value is not None else None
+
+        return {
+            "count": self.count,
+            "sum_ms": ms(self.sum),
+            "mean_ms": ms(self.sum / self.count) if self.count else None,
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+        }
+
+
+class Metrics:
+    """Process-wide latency histograms and traffic counters
+
+    Tool calls are timed by ``MetricsMiddleware``; code inside a call times its
+    stages with ``metrics.timed(stage)``, which attributes them to the running
+    tool. When disabled every entry point returns immediately, so instrumented
+    code pays one attribute check per call.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.tools: Dict[str, Histogram] = {}
+        self.stages: Dict[Tuple[str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._collectors: List[Callable[[], Dict[str, Dict[str, float]]]] = []
+
+    def _histogram(self, table: dict, key) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram()
+        return histogram
+
+    def observe_tool(self, tool: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._histogram(self.tools, tool).observe(seconds)
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._histogram(self.stages, (current_tool.get() or "-", stage)).observe(seconds)
+
+    def count(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Increase a counter, e.g. count("http_response_bytes", 1234)"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextmanager
+    def _timer(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - started)
+
+    def timed(self, stage: str):
+        """Context manager timing a stage of the current tool call"""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timer(stage)
+
+    def add_collector(self, collector: Callable[[], Dict[str, Dict[str, float]]]) -> None:
+        """Register a callback returning gauges as {metric name: {label value: value}}"""
+        self._collectors.append(collector)
+
+    def gauges(self) -> Dict[str, Dict[str, float]]:
+        gauges: Dict[str, Dict[str, float]] = {}
+        for collector in self._collectors:
+            for name, values in collector().items():
+                gauges.setdefault(name, {}).update(values)
+        return gauges
+
+    def reset(self) -> None:
+        with self._lock:
+            self.tools.clear()
+            self.stages.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> Dict[str, object]:
+        """JSON-friendly view of all metrics"""
+        with self._lock:
+            tools = {tool: histogram.summary() for tool, histogram in sorted(self.tools.items())}
+            stages: Dict[str, Dict[str, dict]] = {}
+            for (tool, stage), histogram in sorted(self.stages.items()):
+                stages.setdefault(tool, {})[stage] = histogram.summary()
+            counters: Dict[str, object] = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                if labels:
+                    label = ",".join(f"{key}={val}" for key, val in labels)
+                    counters.setdefault(name, {})[label] = value
+                else:
+                    counters[name] = value
+        return {
+            "enabled": self.enabled,
+            "tools": tools,
+            "stages": stages,
+            "counters": counters,
+            "gauges": self.gauges(),
+        }
+
+    def prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+
+        def labels(pairs) -> str:
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+        def histogram_lines(name: str, pairs, histogram: Histogram) -> List[str]:
+            lines = []
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{labels((*pairs, ('le', bound)))} {cumulative}")
+            lines.append(f"{name}_sum{labels(pairs)} {histogram.sum}")
+            lines.append(f"{name}_count{labels(pairs)} {histogram.count}")
+            return lines
+
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP useme_tool_duration_seconds MCP tool call latency",
+                "# TYPE useme_tool_duration_seconds histogram",
+            ]
+            for tool, histogram in sorted(self.tools.items()):
+                lines += histogram_lines(
+                    "useme_tool_duration_seconds", (("tool", tool),), histogram
+                )
+            lines += [
+                "# HELP useme_stage_duration_seconds Latency of a stage within a tool call",
+                "# TYPE useme_stage_duration_seconds histogram",
+            ]
+            for (tool, stage), histogram in sorted(self.stages.items()):
+                lines += histogram_lines(
+                    "useme_stage_duration_seconds", (("tool", tool), ("stage", stage)), histogram
+                )
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f"# TYPE useme_{name}_total counter")
+                for (counter, pairs), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"useme_{name}_total{labels(pairs)} {value}")
+        for name, values in sorted(self.gauges().items()):
+            lines.append(f"# TYPE useme_{name} gauge")
+            for label, value in sorted(values.items()):
+                lines.append(f"useme_{name}{labels((('name', label),))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware(Middleware):
+    """Times every tool call and makes the tool name available to stage timers"""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext):
+        tool = context.message.name
+        token = current_tool.set(tool)
+        started = time.perf_counter()
+        try:
+            return await call_next(context)
+        except Exception:
+            metrics.count("tool_errors", tool=tool)
+            raise
+        finally:
+            metrics.observe_tool(tool, time.perf_counter() - started)
+            current_tool.reset(token)
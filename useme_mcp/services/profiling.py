@@ -0,0 +1,183 @@
+import cProfile
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from ..settings import (
+    PROFILE_DIR,
+    PROFILER,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_SLOW_MS,
+    PROFILE_INTERVAL_MS,
+)
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILERS = ("sampling", "cprofile")
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_sequence = itertools.count(1)
+
+
+class StackSampler:
+    """Samples the Python stack of one thread at a fixed interval
+
+    Runs in its own thread, so the profiled code is not instrumented; every
+    sample is weighted with the time since the previous one. Produces a
+    speedscope "sampled" profile.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames: List[Dict[str, object]] = []
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="useme-profiler", daemon=True)
+        self.duration = 0.0
+
+    def _index(self, code) -> int:
+        key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+        return index
+
+    def _run(self) -> None:
+        started = last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(self._index(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+        self.duration = time.perf_counter() - started
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def speedscope(self, name: str) -> Dict[str, object]:
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "useme-mcp",
+            "shared": {"frames": self.frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(self.weights),
+                    "samples": self.samples,
+                    "weights": self.weights,
+                }
+            ],
+        }
+
+
+class ProfilingMiddleware(Middleware):
+    """Profiles a sample of tool calls and writes the slow ones to a directory
+
+    Only one call is profiled at a time (cProfile cannot run twice in a thread);
+    calls starting while another one is profiled run unprofiled. Both profilers
+    follow the event loop thread, so work of other calls interleaved on the loop
+    shows up in the profile as well.
+    """
+
+    def __init__(
+        self,
+        directory: str = PROFILE_DIR,
+        profiler: str = PROFILER,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        slow_ms: float = PROFILE_SLOW_MS,
+        interval_ms: float = PROFILE_INTERVAL_MS,
+    ):
+        if profiler not in PROFILERS:
+            logger.warning("Unknown profiler %r, using 'sampling'", profiler)
+            profiler = "sampling"
+        self.directory = directory
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.interval = max(interval_ms, 0.1) / 1000
+        self._busy = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, tool: str, elapsed_ms: float) -> str:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        safe_tool = re.sub(r"[^A-Za-z0-9_.-]", "_", tool)
+        extension = ".pstats" if self.profiler == "cprofile" else ".speedscope.json"
+        name = f"{stamp}-{os.getpid()}-{next(_sequence)}-{safe_tool}-{elapsed_ms:.0f}ms{extension}"
+        return os.path.join(self.directory, name)
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext):
+        if random.random() >= self.sample_rate or not self._busy.acquire(blocking=False):
+            return await call_next(context)
+
+        tool = context.message.name
+        profile: Optional[cProfile.Profile] = None
+        sampler: Optional[StackSampler] = None
+        try:
+            if self.profiler == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+            else:
+                sampler = StackSampler(threading.get_ident(), self.interval)
+                sampler.start()
+            started = time.perf_counter()
+            try:
+                return await call_next(context)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if profile is not None:
+                    profile.disable()
+                if sampler is not None:
+                    sampler.stop()
+                if elapsed_ms >= self.slow_ms:
+                    self._write(tool, elapsed_ms, profile, sampler)
+        finally:
+            self._busy.release()
+
+    def _write(
+        self,
+        tool: str,
+        elapsed_ms: float,
+        profile: Optional[cProfile.Profile],
+        sampler: Optional[StackSampler],
+    ) -> None:
+        path = self._path(tool, elapsed_ms)
+        try:
+            if profile is not None:
+                profile.dump_stats(path)
+            elif sampler is not None:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(sampler.speedscope(f"{tool} ({elapsed_ms:.0f} ms)"), f)
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", path, e)
+            return
+        metrics.count("profiles_written", tool=tool)
+        logger.info("Profiled %s (%.0f ms) to %s", tool, elapsed_ms, path)
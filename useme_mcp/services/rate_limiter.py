@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from .metrics import metrics
+from ..settings import (
+    RATE_LIMIT,
+    RATE_LIMIT_BURST,
+    HOST_CONCURRENCY,
+    RATE_LIMIT_BACKOFF,
+    RATE_LIMIT_MAX_BACKOFF,
+)
+
+logger = logging.getLogger(__name__)
+
+# Responses meaning "slow down"; challenges are reported separately by the HTTP client
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Multiplicative decrease applied to the rate and concurrency limit when throttled
+DECREASE_FACTOR = 0.5
+
+MIN_RATE = 0.2  # requests per second
+
+
+class Permit:
+    """Outcome report of one request admitted by a HostLimiter"""
+
+    def __init__(self):
+        self.throttled = False
+        self.failed = False  # no response (network error), leaves the limits unchanged
+        self.retry_after: Optional[float] = None
+        self.reason = ""
+
+    def throttle(self, reason: str, retry_after: Optional[float] = None) -> None:
+        self.throttled = True
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class HostLimiter:
+    """Token bucket plus AIMD concurrency limit for one host
+
+    Requests need a free concurrency slot and a token. Every unthrottled
+    response raises the rate and the concurrency limit by 1/current value
+    (about +1 per round of requests); a throttled one halves both, at most
+    once per ``backoff`` seconds, and pauses the host for Retry-After or an
+    exponential backoff, either capped at ``max_backoff``. State is guarded by
+    a thread lock, so one limiter serves every event loop and thread of the
+    process.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float = RATE_LIMIT,
+        burst: float = RATE_LIMIT_BURST,
+        concurrency: int = HOST_CONCURRENCY,
+        backoff: float = RATE_LIMIT_BACKOFF,
+        max_backoff: float = RATE_LIMIT_MAX_BACKOFF,
+    ):
+        self.host = host
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.max_concurrency = max(1, concurrency)
+        self.limit = float(self.max_concurrency)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttles = 0  # consecutive decreases, the backoff exponent
+        self._last_decrease = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self.admitted = 0
+        self.throttled_total = 0
+        self.wait_total = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _delay(self, now: float) -> Optional[float]:
+        """Seconds until a request may start, 0 when it may start now, None when
+        it has to wait for a concurrency slot"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= int(self.limit):
+            return None
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.0
+
+    async def acquire(self) -> Permit:
+        """Wait until a request to the host may start"""
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        while True:
+            waiter = None
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                delay = self._delay(now)
+                if delay == 0:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    self.admitted += 1
+                    waited = now - started
+                    self.wait_total += waited
+                    break
+                if delay is None:
+                    waiter = loop.create_future()
+                    self._waiters.append((loop, waiter))
+            if waiter is None:
+                await asyncio.sleep(delay)
+                continue
+            # A release wakes one waiter; the timeout guards against a missed wakeup
+            try:
+                await asyncio.wait({waiter}, timeout=1.0)
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+        if waited > 0:
+            metrics.observe_stage("rate_limit", waited)
+        return Permit()
+
+    def release(self, permit: Permit) -> None:
+        """Return the slot and adapt the limits to the response"""
+        with self._lock:
+            now = time.monotonic()
+            self.in_flight -= 1
+            if permit.throttled:
+                self.throttled_total += 1
+                if now - self._last_decrease >= self.backoff:
+                    self.throttles += 1
+                    self.limit = max(1.0, self.limit * DECREASE_FACTOR)
+                    self.rate = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+                    self.tokens = min(self.tokens, 0.0)
+                    self._last_decrease = now
+                # A server Retry-After is honoured up to the same cap as our own backoff
+                pause = permit.retry_after
+                if pause is None:
+                    pause = self.backoff * 2 ** (self.throttles - 1)
+                pause = min(self.max_backoff, pause)
+                self.paused_until = max(self.paused_until, now + pause)
+            elif not permit.failed:
+                self.throttles = 0
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                self.rate = min(self.max_rate, self.rate + 1 / self.rate)
+            free = int(self.limit) - self.in_flight
+            woken = []
+            while free > 0 and self._waiters:
+                woken.append(self._waiters.popleft())
+                free -= 1
+        for loop, waiter in woken:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:  # loop closed, nobody is waiting any more
+                pass
+        if permit.throttled:
+            metrics.count("rate_limit_throttled", host=self.host, reason=permit.reason)
+            logger.warning(
+                "Throttled by %s (%s), limits now %.1f req/s, %d concurrent",
+                self.host,
+                permit.reason,
+                self.rate,
+                int(self.limit),
+                extra={"retry_after": permit.retry_after},
+            )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 2),
+                "max_rate": self.max_rate,
+                "concurrency_limit": int(self.limit),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "waiting": len(self._waiters),
+                "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 2),
+                "admitted": self.admitted,
+                "throttled": self.throttled_total,
+                "mean_wait_ms": round(self.wait_total / self.admitted * 1000, 3)
+                if self.admitted
+                else 0.0,
+            }
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RateLimiter:
+    """Per-host limiters shared by all outbound requests (disabled when rate <= 0)"""
+
+    def __init__(self, rate: float = RATE_LIMIT):
+        self.enabled = rate > 0
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = self._hosts[host] = HostLimiter(host)
+            return limiter
+
+    @asynccontextmanager
+    async def limit(self, url: str) -> AsyncIterator[Optional[Permit]]:
+        """Hold a request slot for ``url``; report throttling on the yielded permit"""
+        if not self.enabled:
+            yield None
+            return
+        limiter = self.host(url)
+        permit = await limiter.acquire()
+        try:
+            yield permit
+        except BaseException:
+            permit.failed = not permit.throttled
+            raise
+        finally:
+            limiter.release(permit)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            hosts = list(self._hosts.items())
+        return {host: limiter.stats() for host, limiter in hosts}
+
+    def gauges(self) -> Dict[str, Dict[str, float]]:
+        """Current limits exported as metric gauges"""
+        stats = self.stats()
+        return {
+            "rate_limit_rate": {host: row["rate"] for host, row in stats.items()},
+            "rate_limit_concurrency": {
+                host: row["concurrency_limit"] for host, row in stats.items()
+            },
+            "rate_limit_in_flight": {host: row["in_flight"] for host, row in stats.items()},
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,225 @@
+import asyncio
+import httpx
+import logging
+import random
+import requests
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+from . import http_client
+from .http_client import HttpResponse
+from .metrics import metrics
+from .rate_limiter import parse_retry_after
+from ..settings import (
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    RETRY_DEADLINE,
+    HEDGE_REQUESTS,
+    HEDGE_MIN_DELAY,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Transport failures worth another attempt (httpx client and cloudscraper sessions)
+RETRYABLE_EXCEPTIONS = (httpx.TransportError, requests.RequestException, OSError)
+
+# Latency samples an operation needs before its p95 is trusted as hedge delay
+HEDGE_MIN_SAMPLES = 20
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How one kind of request is retried
+
+    ``attempts`` counts the first try. Backoff before attempt n is a random
+    value in [0, min(max_delay, base_delay * 2**n)] ("full jitter"), or the
+    server's Retry-After when that is longer. With ``hedge`` a duplicate
+    request is sent when the first has not answered within the operation's
+    p95 latency, and the first usable answer wins. ``deadline`` bounds the
+    whole call, backoff included.
+    """
+
+    attempts: int = RETRY_ATTEMPTS
+    base_delay: float = RETRY_BASE_DELAY
+    max_delay: float = RETRY_MAX_DELAY
+    retry_statuses: Tuple[int, ...] = RETRYABLE_STATUS_CODES
+    hedge: bool = False
+    deadline: Optional[float] = RETRY_DEADLINE
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+# Per-operation policies; page GETs are idempotent and may be hedged, the billing POST not
+RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    "listing": RetryPolicy(hedge=HEDGE_REQUESTS),
+    "job_detail": RetryPolicy(hedge=HEDGE_REQUESTS),
+    "profile": RetryPolicy(hedge=HEDGE_REQUESTS),
+    "competition": RetryPolicy(hedge=HEDGE_REQUESTS),
+    "billing": RetryPolicy(),
+}
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful requests of one operation"""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+_latencies: Dict[str, LatencyWindow] = {name: LatencyWindow() for name in RETRY_POLICIES}
+
+
+async def _timed_request(
+    operation: str,
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]],
+    data: Optional[str],
+    retry_statuses: Tuple[int, ...],
+) -> HttpResponse:
+    started = time.perf_counter()
+    response = await http_client.request(method, url, headers=headers, data=data)
+    if response.status_code not in retry_statuses:
+        _latencies.setdefault(operation, LatencyWindow()).add(time.perf_counter() - started)
+    return response
+
+
+async def _hedged_request(
+    operation: str,
+    policy: RetryPolicy,
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]],
+    data: Optional[str],
+) -> HttpResponse:
+    """One attempt, duplicated when it is slower than the operation's p95"""
+    args = (operation, method, url, headers, data, policy.retry_statuses)
+    delay = _latencies.setdefault(operation, LatencyWindow()).p95() if policy.hedge else None
+    if delay is None:
+        return await _timed_request(*args)
+
+    first = asyncio.ensure_future(_timed_request(*args))
+    done, _ = await asyncio.wait({first}, timeout=max(delay, HEDGE_MIN_DELAY))
+    if done:
+        return first.result()
+
+    metrics.count("hedged_requests", operation=operation)
+    second = asyncio.ensure_future(_timed_request(*args))
+    pending = {first, second}
+    finished = []
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                finished.append(task)
+                if task.exception() is None and (
+                    task.result().status_code not in policy.retry_statuses
+                ):
+                    if task is second:
+                        metrics.count("hedge_wins", operation=operation)
+                    return task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    # Neither answer is usable: prefer a response over an exception
+    for task in finished:
+        if task.exception() is None:
+            return task.result()
+    return finished[0].result()
+
+
+async def request(
+    operation: str,
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    data: Optional[str] = None,
+    policy: Optional[RetryPolicy] = None,
+) -> HttpResponse:
+    """Perform a request under the retry policy of ``operation``
+
+    Returns the first response whose status is not retryable, or the last
+    response once the attempts (or the time before the deadline) are used up;
+    re-raises the last transport error in that case. Raises TimeoutError when
+    the deadline passes while a request is in flight.
+    """
+    policy = policy or RETRY_POLICIES.get(operation) or RetryPolicy()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + policy.deadline if policy.deadline else None
+
+    async with asyncio.timeout_at(deadline):
+        for attempt in range(max(1, policy.attempts)):
+            last_attempt = attempt + 1 >= policy.attempts
+            response: Optional[HttpResponse] = None
+            error: Optional[Exception] = None
+            try:
+                response = await _hedged_request(operation, policy, method, url, headers, data)
+            except RETRYABLE_EXCEPTIONS as e:
+                if last_attempt:
+                    raise
+                error, reason, retry_after = e, type(e).__name__, None
+            else:
+                if response.status_code not in policy.retry_statuses or last_attempt:
+                    return response
+                reason = str(response.status_code)
+                retry_after = parse_retry_after(response.headers.get("retry-after"))
+
+            pause = policy.backoff(attempt)
+            if retry_after is not None:
+                pause = max(pause, min(retry_after, policy.max_delay))
+            if deadline is not None and loop.time() + pause >= deadline:
+                logger.warning(
+                    "Giving up on %s after %d attempts (%s): deadline reached",
+                    operation,
+                    attempt + 1,
+                    reason,
+                    extra={"url": url},
+                )
+                if error is not None:
+                    raise error
+                return response
+            metrics.count("retries", operation=operation, reason=reason)
+            logger.info(
+                "Retrying %s in %.2fs (attempt %d, %s)",
+                operation,
+                pause,
+                attempt + 2,
+                reason,
+                extra={"url": url},
+            )
+            await asyncio.sleep(pause)
+
+
+async def get(operation: str, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+    """Perform a GET request under the retry policy of ``operation``"""
+    return await request(operation, "GET", url, headers=headers)
+
+
+async def post(
+    operation: str,
+    url: str,
+    data: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> HttpResponse:
+    """Perform a POST request under the retry policy of ``operation``"""
+    return await request(operation, "POST", url, headers=headers, data=data)
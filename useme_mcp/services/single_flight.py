@@ -0,0 +1,88 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+from urllib.parse import urlsplit, urlunsplit
+from pydantic import BaseModel
+from .metrics import metrics
+
+T = TypeVar("T")
+M = TypeVar("M", bound=BaseModel)
+
+
+def normalise_url(url: str) -> str:
+    """Key of a page URL: lower-case scheme and host, trailing slash, no fragment"""
+    parts = urlsplit(url.strip())
+    path = parts.path if parts.path.endswith("/") else parts.path + "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def copy_model(value: Optional[M]) -> Optional[M]:
+    """Deep copy of an optional model, so every caller gets its own instance"""
+    return value.model_copy(deep=True) if value is not None else None
+
+
+class SingleFlight(Generic[T]):
+    """Runs at most one fetch per key at a time and shares its result
+
+    The first caller for a key (the leader) runs the fetch; callers arriving
+    while it is in flight wait for the leader's result instead of starting
+    their own, and receive ``share(result)`` so they can be handed a copy of
+    a mutable value. The pending result is a concurrent.futures.Future, so
+    callers on other event loops or threads (the sync facade) join as well.
+    If the leader is cancelled, a waiting caller takes over the fetch.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._calls: Dict[Hashable, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    async def run(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[T]],
+        share: Optional[Callable[[T], T]] = None,
+    ) -> T:
+        while True:
+            with self._lock:
+                pending = self._calls.get(key)
+                if pending is None:
+                    pending = self._calls[key] = concurrent.futures.Future()
+                    self.leaders += 1
+                    break
+                self.followers += 1
+            metrics.count("coalesced_requests", kind=self.kind)
+            try:
+                result = await asyncio.shield(asyncio.wrap_future(pending))
+            except asyncio.CancelledError:
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    continue  # the leader was cancelled: try to become the leader
+                raise
+            return share(result) if share else result
+
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            pending.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is pending:
+                    del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "followers": self.followers,
+            }
@@ -0,0 +1,170 @@
+import atexit
+import itertools
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from ..settings import LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_SAMPLE_RATE
+from .metrics import current_tool
+
+logger = logging.getLogger(__name__)
+
+# Sequence number of the tool call being handled, shared by all its log records
+current_call: ContextVar[int] = ContextVar("current_call", default=0)
+
+_call_ids = itertools.count(1)
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+_listener: Optional[QueueListener] = None
+
+
+def record_fields(record: logging.LogRecord) -> dict:
+    """Request-scoped and ``extra`` fields of a record"""
+    return {
+        key: value
+        for key, value in record.__dict__.items()
+        if key not in _RECORD_ATTRS and value not in (None, "", 0)
+    }
+
+
+class ContextFilter(logging.Filter):
+    """Adds the tool call fields and drops a share of DEBUG/INFO records
+
+    Runs in the caller's thread before the record is queued, where the context
+    variables of the call are visible; WARNING and above are never sampled away.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if (
+            self.sample_rate < 1.0
+            and record.levelno < logging.WARNING
+            and random.random() >= self.sample_rate
+        ):
+            return False
+        record.tool = current_tool.get()
+        record.call_id = current_call.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """``time level logger message key=value ...``"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **record_fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+# Third-party loggers quieted to WARNING unless the level is DEBUG
+NOISY_LOGGERS = ("httpx", "httpcore")
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    log_format: str = LOG_FORMAT,
+    path: str = LOG_FILE,
+    sample_rate: float = LOG_SAMPLE_RATE,
+) -> None:
+    """Route all logging through a queue to stderr or a file
+
+    Callers only pay for building the record and putting it on the queue;
+    formatting and writing happen in a listener thread. Nothing is written to
+    stdout, which carries the MCP protocol under the stdio transport.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if path:
+        output: logging.Handler = logging.FileHandler(path, encoding="utf-8")
+    else:
+        output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+    handler = QueueHandler(queue.SimpleQueue())
+    handler.addFilter(ContextFilter(sample_rate))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    numeric_level = logging.getLevelName(level.upper())
+    root.setLevel(numeric_level if isinstance(numeric_level, int) else logging.INFO)
+    # The HTTP libraries log every request at INFO; http_client logs them at DEBUG
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(
+            logging.NOTSET if root.level <= logging.DEBUG else logging.WARNING
+        )
+    if not isinstance(numeric_level, int):
+        logger.warning("Unknown log level %r, using INFO", level)
+    if log_format not in ("text", "json"):
+        logger.warning("Unknown log format %r, using text", log_format)
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class LoggingMiddleware(Middleware):
+    """Tags the records of a tool call and logs the call with its duration"""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext):
+        tool = context.message.name
+        tool_token = current_tool.set(tool)
+        call_token = current_call.set(next(_call_ids))
+        started = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception as e:
+            logger.warning(
+                "Tool call failed: %s",
+                e,
+                extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)},
+            )
+            raise
+        else:
+            logger.info(
+                "Tool call finished",
+                extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)},
+            )
+            return result
+        finally:
+            current_call.reset(call_token)
+            current_tool.reset(tool_token)
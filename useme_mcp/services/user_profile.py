@@ -1,7 +1,13 @@
-import cloudscraper
-import bs4
+import logging
 import re
 from typing import Optional
+from . import retry
+from .http_client import run_sync
+from .cache import DocumentCache
+from .html_parsing import HtmlSource, parse_container, parse_html
+from .metrics import metrics
+from .single_flight import SingleFlight, copy_model, normalise_url
+from ..settings import DOCUMENT_CACHE_SIZE, DOCUMENT_CACHE_MAX_AGE
 from ..models import (
     UserProfile,
     UserProfileStats,
@@ -13,10 +19,25 @@ from ..models import (
     UserCompletedJob,
 )
 
+logger = logging.getLogger(__name__)
+
+# Parsed profiles keyed by URL, revalidated against the server on every fetch
+profile_cache = DocumentCache(
+    DOCUMENT_CACHE_SIZE, DOCUMENT_CACHE_MAX_AGE, kind="profile", model=UserProfile
+)
+
+# In-flight profile fetches shared by concurrent callers
+profile_flights: SingleFlight[Optional[UserProfile]] = SingleFlight("profile")
+
+# Element holding the parsed content of profile pages
+PROFILE_CONTAINER = ("div", {"id": "public_user_profile"})
 
-def parse_user_profile_from_html(html_content: str, profile_url: str) -> Optional[UserProfile]:
-    """Parse user profile data from public_user_profile HTML content"""
-    soup = bs4.BeautifulSoup(html_content, "html.parser")
+
+def parse_user_profile_from_html(
+    html_content: HtmlSource, profile_url: str
+) -> Optional[UserProfile]:
+    """Parse user profile data from public_user_profile HTML content or node"""
+    soup = parse_html(html_content)
 
     try:
         # Extract username
@@ -260,7 +281,7 @@ def parse_user_profile_from_html(html_content: str, profile_url: str) -> Optiona
                     user_opinions.append(opinion)
 
                 except Exception as e:
-                    print(f"Error parsing opinion: {e}")
+                    logger.warning("Error parsing opinion: %s", e)
                     continue
 
         # Parse completed jobs
@@ -290,7 +311,7 @@ def parse_user_profile_from_html(html_content: str, profile_url: str) -> Optiona
                         completed_jobs.append(job)
 
                 except Exception as e:
-                    print(f"Error parsing completed job: {e}")
+                    logger.warning("Error parsing completed job: %s", e)
                     continue
 
         return UserProfile(
@@ -308,30 +329,52 @@ def parse_user_profile_from_html(html_content: str, profile_url: str) -> Optiona
         )
 
     except Exception as e:
-        print(f"Error parsing user profile: {e}")
+        logger.warning("Error parsing user profile: %s", e)
         return None
 
 
-def fetch_user_profile(profile_url: str) -> Optional[UserProfile]:
-    """Fetch and parse user profile data from profile URL"""
-    scraper = cloudscraper.create_scraper()
-    print(f"Fetching user profile from: {profile_url}")
+async def fetch_user_profile_async(profile_url: str) -> Optional[UserProfile]:
+    """Fetch and parse user profile data from profile URL
+
+    Concurrent calls for the same profile share one fetch and parse.
+    """
+    return await profile_flights.run(
+        normalise_url(profile_url), lambda: _fetch_user_profile(profile_url), share=copy_model
+    )
+
+
+async def _fetch_user_profile(profile_url: str) -> Optional[UserProfile]:
+    logger.debug("Fetching user profile", extra={"url": profile_url})
 
     try:
-        response = scraper.get(profile_url)
+        cached = profile_cache.get(profile_url)
+        response = await retry.get(
+            "profile", profile_url, headers=profile_cache.conditional_headers(cached)
+        )
+        unchanged = profile_cache.revalidate(cached, response)
+        if unchanged is not None:
+            return unchanged.model_copy(deep=True)
         response.raise_for_status()
 
-        soup = bs4.BeautifulSoup(response.text, "html.parser")
-
-        # Find the public_user_profile div
-        profile_div = soup.find("div", id="public_user_profile")
+        # Parse only the public_user_profile div out of the page
+        with metrics.timed("parse"):
+            profile_div = parse_container(response.content, *PROFILE_CONTAINER, response.encoding)
 
         if profile_div:
-            return parse_user_profile_from_html(str(profile_div), profile_url)
+            with metrics.timed("extract"):
+                profile = parse_user_profile_from_html(profile_div, profile_url)
+            if profile:
+                profile_cache.store(profile_url, response, profile.model_copy(deep=True))
+            return profile
         else:
-            print("Could not find public_user_profile div")
+            logger.warning("Could not find public_user_profile div", extra={"url": profile_url})
             return None
 
     except Exception as e:
-        print(f"Error fetching user profile: {e}")
+        logger.warning("Error fetching user profile: %s", e, extra={"url": profile_url})
         return None
+
+
+def fetch_user_profile(profile_url: str) -> Optional[UserProfile]:
+    """Fetch and parse user profile data from profile URL"""
+    return run_sync(fetch_user_profile_async(profile_url))
@@ -0,0 +1,145 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("Invalid value for %s: %r, using %s", name, value, default)
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning("Invalid value for %s: %r, using %s", name, value, default)
+        return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read an on/off setting from the environment"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# MCP transport of server.py: "stdio" (default) or "http" (streamable HTTP on host:port)
+MCP_TRANSPORT = os.environ.get("USEME_MCP_TRANSPORT", "stdio").strip().lower()
+MCP_HOST = os.environ.get("USEME_MCP_HOST", "127.0.0.1").strip()
+MCP_PORT = env_int("USEME_MCP_PORT", 8000)
+
+# Site the scrapers talk to (point at a local stand-in for offline load tests)
+BASE_URL = os.environ.get("USEME_BASE_URL", "https://useme.com").strip().rstrip("/")
+
+# HTTP transport: "httpx" (async client, cloudscraper only for challenges) or "cloudscraper"
+HTTP_TRANSPORT = os.environ.get("USEME_HTTP_TRANSPORT", "httpx").strip().lower()
+HTTP_TIMEOUT = env_float("USEME_HTTP_TIMEOUT", 30.0)
+
+# HTML parser backend: "auto" (lxml when installed, html.parser otherwise), "lxml" or "html.parser"
+HTML_PARSER = os.environ.get("USEME_HTML_PARSER", "auto").strip().lower()
+
+# HTTP session pool
+POOL_SIZE = env_int("USEME_POOL_SIZE", 4)
+POOL_IDLE_TIMEOUT = env_float("USEME_POOL_IDLE_TIMEOUT", 300.0)
+
+# Concurrent fetching
+FETCH_WORKERS = env_int("USEME_FETCH_WORKERS", 4)
+COMPETITION_WORKERS = env_int("USEME_COMPETITION_WORKERS", 4)
+
+# Listing page cache (TTL in seconds, newest-first listings change fastest)
+LISTING_CACHE_SIZE = env_int("USEME_LISTING_CACHE_SIZE", 256)
+LISTING_CACHE_TTL = env_float("USEME_LISTING_CACHE_TTL", 60.0)
+LISTING_CACHE_TTL_BY_ORDER = {
+    "-published_on": env_float("USEME_LISTING_CACHE_TTL_NEWEST", 15.0),
+    "offer_count": LISTING_CACHE_TTL / 2,
+    "-offer_count": LISTING_CACHE_TTL / 2,
+}
+
+# Job detail / profile cache, revalidated on every request (max age in seconds)
+DOCUMENT_CACHE_SIZE = env_int("USEME_DOCUMENT_CACHE_SIZE", 512)
+DOCUMENT_CACHE_MAX_AGE = env_float("USEME_DOCUMENT_CACHE_MAX_AGE", 86400.0)
+
+# Competition snapshots and billing results (TTL in seconds)
+COMPETITION_CACHE_TTL = env_float("USEME_COMPETITION_CACHE_TTL", 120.0)
+BILLING_CACHE_TTL = env_float("USEME_BILLING_CACHE_TTL", 86400.0)
+
+# Persistent on-disk cache (disabled unless a path is given)
+CACHE_PATH = os.environ.get("USEME_CACHE_PATH", "").strip()
+CACHE_MAX_BYTES = env_int("USEME_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+
+# Billing: "api" (Useme billing API), "local" (offline engine) or "auto" (engine, API fallback)
+BILLING_MODE = os.environ.get("USEME_BILLING_MODE", "api").strip().lower()
+BILLING_WORKERS = env_int("USEME_BILLING_WORKERS", 4)
+# Recordings written by ``billing_engine record``; the engine only answers locally for the
+# documented example and the scenarios whose recordings all match it
+BILLING_CALIBRATION = os.environ.get("USEME_BILLING_CALIBRATION", "").strip()
+
+# Latency / traffic metrics (useme://metrics resource, /metrics in HTTP mode)
+METRICS_ENABLED = env_bool("USEME_METRICS", False)
+
+# Per-call profiling (disabled unless a directory is given): "sampling" (stack sampler,
+# speedscope JSON) or "cprofile" (deterministic, pstats); only calls slower than
+# PROFILE_SLOW_MS out of a PROFILE_SAMPLE_RATE share of calls are written
+PROFILE_DIR = os.environ.get("USEME_PROFILE_DIR", "").strip()
+PROFILER = os.environ.get("USEME_PROFILER", "sampling").strip().lower()
+PROFILE_SAMPLE_RATE = env_float("USEME_PROFILE_SAMPLE_RATE", 1.0)
+PROFILE_SLOW_MS = env_float("USEME_PROFILE_SLOW_MS", 0.0)
+PROFILE_INTERVAL_MS = env_float("USEME_PROFILE_INTERVAL_MS", 1.0)
+
+# Logging (stderr unless a file is given): level, "text" or "json" lines, and the share
+# of DEBUG/INFO records kept (warnings and errors are always written)
+LOG_LEVEL = os.environ.get("USEME_LOG_LEVEL", "INFO").strip()
+LOG_FORMAT = os.environ.get("USEME_LOG_FORMAT", "text").strip().lower()
+LOG_FILE = os.environ.get("USEME_LOG_FILE", "").strip()
+LOG_SAMPLE_RATE = env_float("USEME_LOG_SAMPLE_RATE", 1.0)
+
+# Adaptive per-host rate limiting of outbound requests (USEME_RATE_LIMIT=0 disables it):
+# maximum requests per second and burst, maximum concurrent requests, and the backoff
+# (seconds, doubling up to the maximum) after 429/503/challenge responses
+RATE_LIMIT = env_float("USEME_RATE_LIMIT", 10.0)
+RATE_LIMIT_BURST = env_float("USEME_RATE_LIMIT_BURST", 10.0)
+HOST_CONCURRENCY = env_int("USEME_HOST_CONCURRENCY", 8)
+RATE_LIMIT_BACKOFF = env_float("USEME_RATE_LIMIT_BACKOFF", 1.0)
+RATE_LIMIT_MAX_BACKOFF = env_float("USEME_RATE_LIMIT_MAX_BACKOFF", 60.0)
+
+# Retries of outbound requests: attempts (including the first), jittered exponential
+# backoff bounds and overall deadline in seconds; optional hedging of page GETs, which
+# sends a duplicate once a request is slower than the operation's p95 latency
+RETRY_ATTEMPTS = env_int("USEME_RETRY_ATTEMPTS", 3)
+RETRY_BASE_DELAY = env_float("USEME_RETRY_BASE_DELAY", 0.5)
+RETRY_MAX_DELAY = env_float("USEME_RETRY_MAX_DELAY", 10.0)
+RETRY_DEADLINE = env_float("USEME_RETRY_DEADLINE", 60.0)
+HEDGE_REQUESTS = env_bool("USEME_HEDGE_REQUESTS", False)
+HEDGE_MIN_DELAY = env_float("USEME_HEDGE_MIN_DELAY", 0.05)
+
+# Incremental "new jobs" feed: page limit per poll and job IDs remembered per feed
+FEED_MAX_PAGES = env_int("USEME_FEED_MAX_PAGES", 10)
+FEED_SEEN_IDS = env_int("USEME_FEED_SEEN_IDS", 2000)
+
+# Local full-text job index filled from listing and detail fetches (search_jobs tool);
+# kept in memory unless a path is given
+JOB_STORE_ENABLED = env_bool("USEME_JOB_STORE", True)
+JOB_STORE_PATH = os.environ.get("USEME_JOB_STORE_PATH", "").strip()
+
+# Optional background crawler keeping listings, job details and competition warm.
+# USEME_CRAWLER_CATEGORIES is a comma-separated list of category IDs or "all"
+CRAWLER_ENABLED = env_bool("USEME_CRAWLER", False)
+CRAWLER_BUDGET = env_int("USEME_CRAWLER_BUDGET", 30)  # requests per minute
+CRAWLER_LANGUAGE = os.environ.get("USEME_CRAWLER_LANGUAGE", "en").strip() or "en"
+CRAWLER_CATEGORIES = os.environ.get("USEME_CRAWLER_CATEGORIES", "").strip()
+CRAWLER_PAGES = env_int("USEME_CRAWLER_PAGES", 2)
+CRAWLER_LISTING_INTERVAL = env_float("USEME_CRAWLER_LISTING_INTERVAL", 300.0)
+CRAWLER_JOB_INTERVAL = env_float("USEME_CRAWLER_JOB_INTERVAL", 3600.0)